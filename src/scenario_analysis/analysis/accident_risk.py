@@ -1,68 +1,113 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RiskConfig:
+    """
+    Normalization maxima and weights of the hybrid risk formula.
+
+    The defaults are the values used in the thesis.
+    """
+    # We need normalizations. We use reasonable maximums to normalize to [0,1].
+    # These can be adjusted based on experience.
+    max_entities: float = 10.0
+    max_nodes: float = 50.0  # num_roads as proxy for N
+    max_junctions: float = 10.0  # num_intersections as proxy for J
+    max_triggers: float = 15.0  # num_triggers as proxy for T
+    max_conflicts: float = 5.0  # total hotspot severity as proxy for C
+    # Assume 36 m/s (~130 km/h) as max reasonable speed for scaling
+    max_speed: float = 36.0
+
+    # Structural weights
+    w_entities: float = 0.20
+    w_nodes: float = 0.20
+    w_junctions: float = 0.15
+    w_triggers: float = 0.15
+    w_conflicts: float = 0.15
+    w_speed: float = 0.15
+
+    # Blend of structural and LLM risk
+    w_struct: float = 0.3
+    w_llm: float = 0.7
+
+
+def semantic_risk_value(raw_risk) -> float:
+    """
+    Map the LLM riskEstimate to [0, 1].
+
+    Numbers are used as-is (clamped); strings fall back to a keyword mapping.
+    """
+    try:
+        rllm_val = float(raw_risk)
+    except (ValueError, TypeError):
+        # Fallback mapping if LLM returns a string despite instructions
+        raw_str = str(raw_risk).lower()
+        if any(word in raw_str for word in ["severe", "critical", "extreme"]):
+            rllm_val = 0.9
+        elif any(word in raw_str for word in ["high", "elevated", "significant"]):
+            rllm_val = 0.8
+        elif any(word in raw_str for word in ["medium", "moderate"]):
+            rllm_val = 0.5
+        elif any(word in raw_str for word in ["low", "minimal", "safe"]):
+            rllm_val = 0.2
+        else:
+            rllm_val = 0.5
+
+    # Ensure RLLM is between 0 and 1
+    return min(1.0, max(0.0, rllm_val))
+
+
 class AccidentRiskEstimator:
     """
     Hybrid accident risk estimator.
     Combines structural, road-based and AI-derived semantic risk.
     """
 
-    def estimate(self, feature_vector: dict) -> float:
-        # We need normalizations. We use reasonable maximums to normalize to [0,1].
-        # These can be adjusted based on experience.
-        max_entities = 10.0
-        max_nodes = 50.0  # num_roads as proxy for N
-        max_junctions = 10.0 # num_intersections as proxy for J
-        max_triggers = 15.0 # num_triggers as proxy for T
-        max_conflicts = 5.0 # Max node degree or intersections as proxy for C
-
-        Enorm = min(1.0, feature_vector.get("num_entities", 0) / max_entities)
-        Nnorm = min(1.0, feature_vector.get("num_roads", 0) / max_nodes)
-        Jnorm = min(1.0, feature_vector.get("num_intersections", 0) / max_junctions)
-        Tnorm = min(1.0, feature_vector.get("num_triggers", 0) / max_triggers)
-        
+    def __init__(self, config: RiskConfig | None = None):
+        self.config = config or RiskConfig()
+
+    def structural_risk(self, feature_vector: dict) -> float:
+        cfg = self.config
+
+        Enorm = min(1.0, feature_vector.get("num_entities", 0) / cfg.max_entities)
+        Nnorm = min(1.0, feature_vector.get("num_roads", 0) / cfg.max_nodes)
+        Jnorm = min(1.0, feature_vector.get("num_intersections", 0) / cfg.max_junctions)
+        Tnorm = min(1.0, feature_vector.get("num_triggers", 0) / cfg.max_triggers)
+
         # We use the aggregated total severity of all detected risk_hotspots for Cnorm
         # instead of a rough proxy like max_node_degree + num_intersections.
-        risk_hotspots = feature_vector.get("risk_hotspots", [])
-        total_hotspot_severity = sum(spot.get("severity", 0.0) for spot in risk_hotspots)
-        Cnorm = min(1.0, total_hotspot_severity / max_conflicts)
-        
+        # risk_hotspots may be a list of dicts or a HotspotTable (extract_bulk);
+        # imported only when there are hotspots, so structure-only runs do
+        # not load numpy
+        hotspots = feature_vector.get("risk_hotspots")
+        if hotspots:
+            from scenario_analysis.features.road_graph_features import total_hotspot_severity
+            total_severity = total_hotspot_severity(hotspots)
+        else:
+            total_severity = 0.0
+        Cnorm = min(1.0, total_severity / cfg.max_conflicts)
+
         # Kinematics Factor (Vnorm)
-        # Assume 36 m/s (~130 km/h) as max reasonable speed for scaling
-        max_speed = 36.0 
-        Vnorm = min(1.0, feature_vector.get("max_speed_ms", 0.0) / max_speed)
+        Vnorm = min(1.0, feature_vector.get("max_speed_ms", 0.0) / cfg.max_speed)
 
         # Adjusted struct formula including kinematics
-        Rstruct = (
-            0.20 * Enorm +
-            0.20 * Nnorm +
-            0.15 * Jnorm +
-            0.15 * Tnorm +
-            0.15 * Cnorm +
-            0.15 * Vnorm
+        return (
+            cfg.w_entities * Enorm +
+            cfg.w_nodes * Nnorm +
+            cfg.w_junctions * Jnorm +
+            cfg.w_triggers * Tnorm +
+            cfg.w_conflicts * Cnorm +
+            cfg.w_speed * Vnorm
         )
-        
+
+    def estimate(self, feature_vector: dict) -> float:
+        Rstruct = self.structural_risk(feature_vector)
+
         # AI semantic risk
         semantic = feature_vector.get("semantic_analysis", {})
-        raw_risk = semantic.get("riskEstimate", 0.0)
-        
-        try:
-            rllm_val = float(raw_risk)
-        except (ValueError, TypeError):
-            # Fallback mapping if LLM returns a string despite instructions
-            raw_str = str(raw_risk).lower()
-            if any(word in raw_str for word in ["severe", "critical", "extreme"]):
-                rllm_val = 0.9
-            elif any(word in raw_str for word in ["high", "elevated", "significant"]):
-                rllm_val = 0.8
-            elif any(word in raw_str for word in ["medium", "moderate"]):
-                rllm_val = 0.5
-            elif any(word in raw_str for word in ["low", "minimal", "safe"]):
-                rllm_val = 0.2
-            else:
-                rllm_val = 0.5
-                
-        # Ensure RLLM is between 0 and 1
-        RLLM = min(1.0, max(0.0, rllm_val))
+        RLLM = semantic_risk_value(semantic.get("riskEstimate", 0.0))
 
         # Final weighted probability according to thesis
-        Rfinal = 0.3 * Rstruct + 0.7 * RLLM
+        Rfinal = self.config.w_struct * Rstruct + self.config.w_llm * RLLM
 
         return round(Rfinal, 3)
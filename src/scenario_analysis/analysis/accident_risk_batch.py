@@ -0,0 +1,110 @@
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from scenario_analysis.analysis.accident_risk import RiskConfig, semantic_risk_value
+from scenario_analysis.features.road_graph_features import total_hotspot_severity
+
+
+# Columns read by BatchAccidentRiskEstimator
+FEATURE_COLUMNS = (
+    "num_entities",
+    "num_roads",
+    "num_intersections",
+    "num_triggers",
+    "total_hotspot_severity",
+    "max_speed_ms",
+    "llm_risk",  # riskEstimate already mapped to [0, 1]
+)
+
+# (feature column, normalization maximum, weight) in the summation order of
+# AccidentRiskEstimator, so both produce bit-identical Rstruct values
+_STRUCT_TERMS = (
+    ("num_entities", "max_entities", "w_entities"),
+    ("num_roads", "max_nodes", "w_nodes"),
+    ("num_intersections", "max_junctions", "w_junctions"),
+    ("num_triggers", "max_triggers", "w_triggers"),
+    ("total_hotspot_severity", "max_conflicts", "w_conflicts"),
+    ("max_speed_ms", "max_speed", "w_speed"),
+)
+
+
+def feature_table(feature_vectors: Iterable[dict]) -> dict[str, np.ndarray]:
+    """
+    Convert feature vectors (as produced by FeatureVectorBuilder) into the
+    columnar table used by BatchAccidentRiskEstimator.
+
+    The riskEstimate keyword fallback is evaluated once per distinct value.
+    """
+    columns = {name: [] for name in FEATURE_COLUMNS}
+    llm_risk_memo = {}
+
+    for fv in feature_vectors:
+        columns["num_entities"].append(fv.get("num_entities", 0))
+        columns["num_roads"].append(fv.get("num_roads", 0))
+        columns["num_intersections"].append(fv.get("num_intersections", 0))
+        columns["num_triggers"].append(fv.get("num_triggers", 0))
+        columns["total_hotspot_severity"].append(total_hotspot_severity(fv.get("risk_hotspots", [])))
+        columns["max_speed_ms"].append(fv.get("max_speed_ms", 0.0))
+
+        raw_risk = fv.get("semantic_analysis", {}).get("riskEstimate", 0.0)
+        memo_key = (type(raw_risk), raw_risk) if isinstance(raw_risk, (str, int, float)) else None
+        if memo_key is None:
+            columns["llm_risk"].append(semantic_risk_value(raw_risk))
+        else:
+            if memo_key not in llm_risk_memo:
+                llm_risk_memo[memo_key] = semantic_risk_value(raw_risk)
+            columns["llm_risk"].append(llm_risk_memo[memo_key])
+
+    return {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+
+
+class BatchAccidentRiskEstimator:
+    """
+    Vectorized AccidentRiskEstimator over a whole corpus.
+
+    The input is a columnar table with FEATURE_COLUMNS, either a dict of
+    1-D arrays or a NumPy structured array. Results are unrounded
+    (AccidentRiskEstimator rounds Rfinal to 3 decimals).
+    """
+
+    def __init__(self, config: RiskConfig | None = None):
+        self.config = config or RiskConfig()
+
+    def estimate(self, table: Mapping[str, np.ndarray] | np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Rstruct, RLLM and Rfinal for every row, each of shape (n_rows,).
+        """
+        result = self.estimate_grid(table, [self.config])
+        return {name: values[0] for name, values in result.items()}
+
+    def estimate_grid(
+        self,
+        table: Mapping[str, np.ndarray] | np.ndarray,
+        configs: Sequence[RiskConfig],
+    ) -> dict[str, np.ndarray]:
+        """
+        Evaluate many weight/normalization configurations at once.
+
+        Returns Rstruct, RLLM and Rfinal of shape (n_configs, n_rows); row i
+        of each array belongs to configs[i].
+        """
+        n_rows = len(table["llm_risk"])
+        n_configs = len(configs)
+
+        def param(name: str) -> np.ndarray:
+            # (n_configs, 1), broadcast against the (n_rows,) feature columns
+            return np.array([getattr(c, name) for c in configs], dtype=np.float64)[:, None]
+
+        Rstruct = np.zeros((n_configs, n_rows), dtype=np.float64)
+        for column, max_name, weight_name in _STRUCT_TERMS:
+            values = np.asarray(table[column], dtype=np.float64)
+            normalized = np.minimum(1.0, values / param(max_name))
+            Rstruct += param(weight_name) * normalized
+
+        RLLM = np.clip(np.asarray(table["llm_risk"], dtype=np.float64), 0.0, 1.0)
+        RLLM = np.broadcast_to(RLLM, (n_configs, n_rows))
+
+        Rfinal = param("w_struct") * Rstruct + param("w_llm") * RLLM
+
+        return {"Rstruct": Rstruct, "RLLM": RLLM, "Rfinal": Rfinal}
@@ -0,0 +1,124 @@
+from typing import List
+
+import numpy as np
+
+
+def concatenated_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """
+    The indices start..end-1 of every (start, end) pair, concatenated.
+    """
+    counts = ends - starts
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+
+class RoadGeometry:
+    """
+    planView reference lines of all roads of a RoadNetwork, as arrays.
+
+    The geometry records of road i are rows indptr[i]:indptr[i + 1], in
+    file order (ascending s). Per record: start s, start point x/y,
+    heading hdg, length and curvature.
+
+    Lines and arcs are evaluated exactly. Spirals are evaluated as arcs
+    with their mean curvature, poly3 and paramPoly3 as straight lines
+    along the start heading; good enough to place positions and roads in
+    a spatial index, not for driving.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        s: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        hdg: np.ndarray,
+        length: np.ndarray,
+        curvature: np.ndarray,
+    ):
+        self.indptr = indptr
+        self.s = s
+        self.x = x
+        self.y = y
+        self.hdg = hdg
+        self.length = length
+        self.curvature = curvature
+
+    @property
+    def num_roads(self) -> int:
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_records(cls, counts: List[int], records: List[tuple]) -> "RoadGeometry":
+        """
+        counts: geometry records per road; records: (s, x, y, hdg, length,
+        curvature) tuples of all roads, concatenated in road order.
+        """
+        indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        columns = np.asarray(records, dtype=np.float64).reshape(-1, 6).T
+        return cls(indptr, *(np.ascontiguousarray(c) for c in columns))
+
+    def point_at(self, road: int, s: float) -> tuple[float, float] | None:
+        """
+        Reference line point of road at s (clamped to the road), None if
+        the road has no geometry.
+        """
+        x, y, valid = self.points_at(np.array([road]), np.array([s], dtype=np.float64))
+        return (float(x[0]), float(y[0])) if valid[0] else None
+
+    def points_at(self, roads: np.ndarray, s: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorized point_at: (x, y, valid) per (road, s) pair, where valid
+        is False (and x, y are NaN) for roads without geometry.
+        """
+        starts, ends = self.indptr[roads], self.indptr[roads + 1]
+        valid = ends > starts
+
+        # The record of each pair is the last one of its road starting at or before s
+        rows = concatenated_ranges(starts, ends)
+        pair = np.repeat(np.arange(len(roads)), ends - starts)
+        before = np.bincount(pair, weights=self.s[rows] <= s[pair], minlength=len(roads)).astype(np.int64)
+        row = np.where(valid, starts + np.maximum(before - 1, 0), 0)
+
+        x = np.full(len(roads), np.nan)
+        y = np.full(len(roads), np.nan)
+        if valid.any():
+            row = row[valid]
+            ds = np.clip(s[valid] - self.s[row], 0.0, self.length[row])
+            x[valid], y[valid] = self._evaluate(row, ds)
+        return x, y, valid
+
+    def sample(self, step: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Points along every reference line, at most step apart, including
+        the start and end of each geometry record.
+
+        Returns (indptr, x, y): the points of road i are
+        x[indptr[i]:indptr[i + 1]], y[indptr[i]:indptr[i + 1]].
+        """
+        intervals = np.maximum(1, np.ceil(self.length / step)).astype(np.int64)
+        per_record = intervals + 1
+
+        rows = np.repeat(np.arange(len(self.length)), per_record)
+        first = np.cumsum(per_record) - per_record
+        k = np.arange(len(rows)) - np.repeat(first, per_record)
+        ds = self.length[rows] * k / intervals[rows]
+        x, y = self._evaluate(rows, ds)
+
+        road_of_record = np.repeat(np.arange(self.num_roads), np.diff(self.indptr))
+        indptr = np.zeros(self.num_roads + 1, dtype=np.int64)
+        np.cumsum(np.bincount(road_of_record, weights=per_record, minlength=self.num_roads).astype(np.int64),
+                  out=indptr[1:])
+        return indptr, x, y
+
+    def _evaluate(self, rows: np.ndarray, ds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # Point at distance ds along each record in rows
+        x0, y0, hdg, curvature = self.x[rows], self.y[rows], self.hdg[rows], self.curvature[rows]
+
+        straight = curvature == 0.0
+        c = np.where(straight, 1.0, curvature)
+        end_hdg = hdg + curvature * ds
+
+        x = np.where(straight, x0 + ds * np.cos(hdg), x0 + (np.sin(end_hdg) - np.sin(hdg)) / c)
+        y = np.where(straight, y0 + ds * np.sin(hdg), y0 - (np.cos(end_hdg) - np.cos(hdg)) / c)
+        return x, y
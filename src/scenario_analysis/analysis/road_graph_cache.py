@@ -0,0 +1,226 @@
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.analysis.road_network import RoadNetwork
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+
+
+# Bump when the graph or feature layout changes, so stale disk entries are ignored
+CACHE_VERSION = "3"
+
+
+@dataclass
+class RoadNetworkEntry:
+    """
+    A cached road network: the graph and its derived road features.
+
+    The graph is shared between callers and must be treated as read-only;
+    every caller gets its own copy of the features.
+    """
+    graph: RoadNetwork
+    features: Dict[str, Any]
+    source: str = "miss"  # "memory", "disk" or "miss"
+
+
+class RoadGraphCache:
+    """
+    Content-addressed cache of parsed OpenDRIVE road networks.
+
+    Entries are keyed by the SHA-256 of the .xodr file content, so renamed
+    or touched files still hit and edited files never do, and by the
+    class and instance attributes of both extractors, so differently
+    configured extractors do not share entries.
+
+    - Memory tier: LRU of the most recently used networks (per process)
+    - Disk tier: pickled entries in cache_dir, shared between processes
+      and runs (writes are atomic, concurrent writers are harmless)
+
+    Safe to share between threads: a network missing from memory is
+    loaded or parsed by one thread, others asking for it wait and then
+    hit the memory tier.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None, max_memory_entries: int = 32):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_memory_entries = max_memory_entries
+
+        self._memory: OrderedDict[str, RoadNetworkEntry] = OrderedDict()
+        # (path, size, mtime_ns) -> content hash; only saves re-hashing,
+        # the key itself is always the content hash
+        self._hash_memo: Dict[tuple, str] = {}
+
+        # Guards the memory tier and the counters; one more lock per key
+        # serializes loading / parsing of the same network
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(
+        self,
+        xodr_path: str | Path,
+        road_graph_extractor: RoadGraphExtractor,
+        road_graph_feature_extractor: RoadGraphFeatureExtractor,
+    ) -> RoadNetworkEntry:
+        key = self._key(xodr_path, road_graph_extractor, road_graph_feature_extractor)
+
+        entry = self._from_memory(key)
+        if entry is not None:
+            return entry
+
+        with self._key_lock(key):
+            # Another thread may have loaded it while we waited
+            entry = self._from_memory(key)
+            if entry is not None:
+                return entry
+
+            entry = self._load(key)
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, entry)
+                return _copy(entry, "disk")
+
+            with self._lock:
+                self.misses += 1
+            graph = road_graph_extractor.extract_network(xodr_path)
+            features = road_graph_feature_extractor.extract(graph)
+            entry = RoadNetworkEntry(graph, features)
+
+            self._store(key, entry)
+            with self._lock:
+                self._remember(key, entry)
+            return _copy(entry, "miss")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def content_hash(self, xodr_path: str | Path) -> str:
+        xodr_path = Path(xodr_path)
+        st = xodr_path.stat()
+        memo_key = (str(xodr_path.resolve()), st.st_size, st.st_mtime_ns)
+
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            h = hashlib.sha256()
+            with xodr_path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._hash_memo[memo_key] = digest
+
+        return digest
+
+    def _key(self, xodr_path, road_graph_extractor, road_graph_feature_extractor) -> str:
+        variant = "|".join([
+            CACHE_VERSION,
+            _configuration(road_graph_extractor),
+            _configuration(road_graph_feature_extractor),
+        ])
+        variant_hash = hashlib.sha256(variant.encode("utf-8")).hexdigest()[:16]
+        return f"{self.content_hash(xodr_path)}-{variant_hash}"
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _from_memory(self, key: str) -> RoadNetworkEntry | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+        return _copy(entry, "memory")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _remember(self, key: str, entry: RoadNetworkEntry) -> None:
+        # Called with self._lock held
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pkl"
+
+    def _load(self, key: str) -> RoadNetworkEntry | None:
+        if self.cache_dir is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                graph, features = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupt entry, or a stale one whose classes were moved or
+            # renamed (AttributeError, ModuleNotFoundError): recompute and
+            # overwrite
+            return None
+
+        return RoadNetworkEntry(graph, features)
+
+    def _store(self, key: str, entry: RoadNetworkEntry) -> None:
+        if self.cache_dir is None:
+            return
+
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename, so readers in other processes
+        # never see a partially written entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((entry.graph, entry.features), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+
+def _configuration(extractor) -> str:
+    # Class and settings of an extractor, as part of the cache key
+    cls = type(extractor)
+    settings = sorted(vars(extractor).items()) if hasattr(extractor, "__dict__") else []
+    return f"{cls.__module__}.{cls.__qualname__}{settings!r}"
+
+
+def _copy(entry: RoadNetworkEntry, source: str) -> RoadNetworkEntry:
+    # Callers may modify the features, which must not reach the cache
+    return RoadNetworkEntry(entry.graph, copy.deepcopy(entry.features), source=source)
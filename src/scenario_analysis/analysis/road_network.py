@@ -0,0 +1,390 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+from lxml import etree
+
+from scenario_analysis.analysis.road_geometry import RoadGeometry, concatenated_ranges
+from scenario_analysis.analysis.spatial_index import SpatialGrid
+
+if TYPE_CHECKING:
+    # networkx is only needed for the conversions and imported there
+    import networkx as nx
+
+
+# Spacing of the reference line sample points in the spatial index and
+# the grid cell size, in meters
+SAMPLE_STEP = 10.0
+GRID_CELL_SIZE = 50.0
+
+
+class RoadNetwork:
+    """
+    Array-backed, junction-aware road network.
+
+    Roads are numbered 0..num_roads-1 in file order. The directed road
+    connectivity is stored in CSR form: the successors of road i are
+    successors[indptr[i]:indptr[i + 1]].
+
+    - road_ids: OpenDRIVE road id per road (str array)
+    - num_lanes: driving lanes per road, summed over lane sections
+    - junction: index into junction_ids of the junction a road belongs
+      to, -1 for roads outside junctions
+    - junction_ids: OpenDRIVE junction ids (str array)
+    - geometry: planView reference lines (RoadGeometry), None if unknown
+
+    The road id lookup, in-degrees and the spatial index are computed on
+    first use and kept; they are not pickled.
+    """
+
+    def __init__(
+        self,
+        road_ids: np.ndarray,
+        num_lanes: np.ndarray,
+        junction: np.ndarray,
+        junction_ids: np.ndarray,
+        indptr: np.ndarray,
+        successors: np.ndarray,
+        geometry: RoadGeometry | None = None,
+    ):
+        self.road_ids = road_ids
+        self.num_lanes = num_lanes
+        self.junction = junction
+        self.junction_ids = junction_ids
+        self.indptr = indptr
+        self.successors = successors
+        self.geometry = geometry
+
+        self._road_index: Dict[str, int] | None = None
+        self._in_degree: np.ndarray | None = None
+        self._spatial_index: SpatialGrid | None = None
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def num_roads(self) -> int:
+        return len(self.road_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.successors)
+
+    @property
+    def num_junctions(self) -> int:
+        return len(self.junction_ids)
+
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degree(self) -> np.ndarray:
+        if self._in_degree is None:
+            self._in_degree = np.bincount(self.successors, minlength=self.num_roads)
+        return self._in_degree
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (source, target) road indices of all edges.
+        """
+        sources = np.repeat(np.arange(self.num_roads, dtype=self.successors.dtype), self.out_degree())
+        return sources, self.successors
+
+    def successors_of(self, roads: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (source, target) road indices of the edges leaving roads.
+        """
+        starts, ends = self.indptr[roads], self.indptr[roads + 1]
+        return np.repeat(roads, ends - starts), self.successors[concatenated_ranges(starts, ends)]
+
+    def road_index(self, road_id: str) -> int | None:
+        if self._road_index is None:
+            self._road_index = {road_id: i for i, road_id in enumerate(self.road_ids.tolist())}
+        return self._road_index.get(road_id)
+
+    # ------------------------------------------------------------------
+    # Spatial queries
+    # ------------------------------------------------------------------
+
+    def spatial_index(self) -> SpatialGrid | None:
+        """
+        Grid index over reference line points every SAMPLE_STEP meters;
+        None without geometry.
+        """
+        if self.geometry is None:
+            return None
+        if self._spatial_index is None:
+            indptr, x, y = self.geometry.sample(SAMPLE_STEP)
+            owner = np.repeat(np.arange(self.num_roads, dtype=np.int32), np.diff(indptr))
+            self._spatial_index = SpatialGrid(x, y, owner, GRID_CELL_SIZE)
+        return self._spatial_index
+
+    def roads_near(self, points: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Sorted indices of the roads whose reference line passes within
+        radius of any of points (shape (k, 2)). Empty without geometry.
+
+        The radius is padded by half the sample spacing, so a road is never
+        missed between two sample points.
+        """
+        index = self.spatial_index()
+        if index is None or not len(points):
+            return np.zeros(0, dtype=np.int32)
+        # Duplicate start points are common (entities on the same lane)
+        points = np.unique(points, axis=0)
+        return index.query(points[:, 0], points[:, 1], radius + SAMPLE_STEP / 2)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_edges(
+        cls,
+        road_ids: List[str],
+        num_lanes: List[int],
+        junction: List[int],
+        junction_ids: List[str],
+        sources: np.ndarray,
+        targets: np.ndarray,
+        geometry: RoadGeometry | None = None,
+    ) -> "RoadNetwork":
+        n = len(road_ids)
+        index_dtype = np.int32 if n < 2**31 else np.int64
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        # Sort by (source, target) and drop duplicate edges
+        codes = np.unique(sources * n + targets) if n else np.zeros(0, dtype=np.int64)
+        sources, targets = np.divmod(codes, n) if n else (codes, codes)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=indptr[1:])
+
+        return cls(
+            road_ids=np.asarray(road_ids, dtype=str),
+            num_lanes=np.asarray(num_lanes, dtype=np.int32),
+            junction=np.asarray(junction, dtype=np.int32),
+            junction_ids=np.asarray(junction_ids, dtype=str),
+            indptr=indptr,
+            successors=targets.astype(index_dtype),
+            geometry=geometry,
+        )
+
+    @classmethod
+    def from_networkx(cls, graph: "nx.DiGraph") -> "RoadNetwork":
+        """
+        Convert a road graph as produced by to_networkx(). Junctions are
+        recovered from the junction node attribute, if present.
+        """
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = np.array([(index[u], index[v]) for u, v in graph.edges], dtype=np.int64).reshape(-1, 2)
+
+        junction_index: Dict[str, int] = {}
+        junction = []
+        for node in nodes:
+            junction_id = graph.nodes[node].get("junction")
+            if junction_id is None:
+                junction.append(-1)
+            else:
+                junction.append(junction_index.setdefault(str(junction_id), len(junction_index)))
+
+        return cls.from_edges(
+            road_ids=[str(node) for node in nodes],
+            num_lanes=[graph.nodes[node].get("num_lanes", 0) for node in nodes],
+            junction=junction,
+            junction_ids=list(junction_index),
+            sources=edges[:, 0],
+            targets=edges[:, 1],
+        )
+
+    def to_networkx(self) -> "nx.DiGraph":
+        """
+        The network as an nx.DiGraph: nodes are road ids with a num_lanes
+        attribute (and junction, for roads inside a junction).
+        """
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        road_ids = self.road_ids.tolist()
+        lanes = self.num_lanes.tolist()
+        junction_ids = self.junction_ids.tolist()
+
+        for i, (road_id, junction) in enumerate(zip(road_ids, self.junction.tolist())):
+            if junction >= 0:
+                graph.add_node(road_id, num_lanes=lanes[i], junction=junction_ids[junction])
+            else:
+                graph.add_node(road_id, num_lanes=lanes[i])
+
+        sources, targets = self.edges()
+        graph.add_edges_from(zip(
+            (road_ids[s] for s in sources.tolist()),
+            (road_ids[t] for t in targets.tolist()),
+        ))
+        return graph
+
+
+# ----------------------------------------------------------------------
+# Extraction
+# ----------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def _driving_lane_counter(ns: str) -> etree.XPath:
+    # Compiled once per namespace ("" or "{uri}")
+    if not ns:
+        return etree.XPath("count(lanes/laneSection/*[self::left or self::right]/lane[@type='driving'])")
+    return etree.XPath(
+        "count(o:lanes/o:laneSection/*[self::o:left or self::o:right]/o:lane[@type='driving'])",
+        namespaces={"o": ns[1:-1]},
+    )
+
+
+class RoadNetworkExtractor:
+    """
+    Builds a RoadNetwork from an OpenDRIVE file in a single streaming pass.
+
+    Edges follow the road reference line: predecessor -> road -> successor
+    for road-to-road links, and incomingRoad -> connectingRoad for every
+    junction connection. Connecting roads entered at their end
+    (contactPoint="end") are driven against their reference line, so the
+    edges from their own links are reversed. Links to unknown roads are
+    ignored.
+
+    The planView geometry of every road is kept as a RoadGeometry.
+    """
+
+    def extract(self, xodr_path: str | Path) -> RoadNetwork:
+        road_ids: List[str] = []
+        num_lanes: List[int] = []
+        road_junction: List[str] = []
+        # planView records per road, and (s, x, y, hdg, length, curvature) of all roads
+        geometry_counts: List[int] = []
+        geometry_records: List[tuple] = []
+        # (road index, linked road id, True if the link is a successor)
+        links: List[tuple[int, str, bool]] = []
+
+        junction_ids: List[str] = []
+        # (incoming road id, connecting road id, contact point)
+        connections: List[tuple[str, str, str]] = []
+
+        ns = None
+        for _, element in etree.iterparse(str(xodr_path), events=("end",), tag=("{*}road", "{*}junction")):
+            parent = element.getparent()
+            if parent is None or parent.getparent() is not None:
+                # Only top-level road / junction elements
+                continue
+
+            if ns is None:
+                tag = element.tag
+                ns = tag[:tag.index("}") + 1] if tag.startswith("{") else ""
+
+            if element.tag == f"{ns}road":
+                road_id = element.attrib.get("id")
+                if road_id is not None:
+                    index = len(road_ids)
+                    road_ids.append(road_id)
+                    road_junction.append(element.attrib.get("junction", "-1"))
+                    num_lanes.append(self._count_driving_lanes(element, ns))
+                    geometry_counts.append(self._read_plan_view(element, ns, geometry_records))
+
+                    link = element.find(f"{ns}link")
+                    if link is not None:
+                        for child, is_successor in ((f"{ns}predecessor", False), (f"{ns}successor", True)):
+                            target = link.find(child)
+                            if target is not None and target.attrib.get("elementType", "road") == "road":
+                                target_id = target.attrib.get("elementId")
+                                if target_id:
+                                    links.append((index, target_id, is_successor))
+            else:
+                junction_ids.append(element.attrib.get("id", ""))
+                for connection in element.iterfind(f"{ns}connection"):
+                    incoming = connection.attrib.get("incomingRoad")
+                    connecting = connection.attrib.get("connectingRoad")
+                    if incoming and connecting:
+                        connections.append((incoming, connecting, connection.attrib.get("contactPoint", "start")))
+
+            # Free the subtree, the network is kept in the lists above
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+        geometry = RoadGeometry.from_records(geometry_counts, geometry_records)
+        return self._build(road_ids, num_lanes, road_junction, links, junction_ids, connections, geometry)
+
+    @staticmethod
+    def _count_driving_lanes(road, ns: str) -> int:
+        # Driving lanes on the left and right of all lane sections
+        return int(_driving_lane_counter(ns)(road))
+
+    @staticmethod
+    def _read_plan_view(road, ns: str, records: List[tuple]) -> int:
+        """
+        Append the planView geometry records of road; returns their number.
+        Records with missing or malformed attributes are skipped.
+        """
+        plan_view = road.find(f"{ns}planView")
+        if plan_view is None:
+            return 0
+
+        count = 0
+        for geometry in plan_view.iterfind(f"{ns}geometry"):
+            attrib = geometry.attrib
+            try:
+                s, x, y, hdg, length = (float(attrib[k]) for k in ("s", "x", "y", "hdg", "length"))
+            except (KeyError, ValueError):
+                continue
+
+            # The first child is the geometry type; spirals get their mean curvature
+            curvature = 0.0
+            shape = next((child for child in geometry if isinstance(child.tag, str)), None)
+            try:
+                if shape is None:
+                    pass
+                elif shape.tag == f"{ns}arc":
+                    curvature = float(shape.attrib.get("curvature", 0.0))
+                elif shape.tag == f"{ns}spiral":
+                    curvature = (float(shape.attrib.get("curvStart", 0.0)) + float(shape.attrib.get("curvEnd", 0.0))) / 2
+            except ValueError:
+                curvature = 0.0
+
+            records.append((s, x, y, hdg, length, curvature))
+            count += 1
+        return count
+
+    @staticmethod
+    def _build(road_ids, num_lanes, road_junction, links, junction_ids, connections, geometry=None) -> RoadNetwork:
+        index: Dict[str, int] = {road_id: i for i, road_id in enumerate(road_ids)}
+        junction_index = {junction_id: i for i, junction_id in enumerate(junction_ids)}
+        junction = [junction_index.get(j, -1) for j in road_junction]
+
+        reversed_roads = {
+            index[connecting] for _, connecting, contact in connections
+            if contact == "end" and connecting in index
+        }
+
+        sources, targets = [], []
+        for road, target_id, is_successor in links:
+            other = index.get(target_id)
+            if other is None:
+                continue
+            if is_successor != (road in reversed_roads):
+                sources.append(road)
+                targets.append(other)
+            else:
+                sources.append(other)
+                targets.append(road)
+
+        for incoming, connecting, _ in connections:
+            if incoming in index and connecting in index:
+                sources.append(index[incoming])
+                targets.append(index[connecting])
+
+        return RoadNetwork.from_edges(
+            road_ids, num_lanes, junction, junction_ids,
+            np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+            geometry=geometry,
+        )
@@ -0,0 +1,75 @@
+import numpy as np
+
+from scenario_analysis.analysis.road_geometry import concatenated_ranges
+
+
+# Grid cell coordinates are packed into one int64 key: (ix << 32) + iy + 2**31
+_Y_OFFSET = 1 << 31
+
+
+class SpatialGrid:
+    """
+    Uniform grid index over points that belong to numbered owners (here:
+    sample points of road reference lines, owned by their road).
+
+    Points are sorted by grid cell once; a radius query visits only the
+    cells overlapping the query circle, so its cost depends on the number
+    of points nearby, not on the total number of points.
+    """
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, owner: np.ndarray, cell_size: float):
+        self.cell_size = float(cell_size)
+
+        keys = self._keys(np.floor(x / self.cell_size), np.floor(y / self.cell_size))
+        order = np.argsort(keys, kind="stable")
+
+        self.x = x[order]
+        self.y = y[order]
+        self.owner = owner[order]
+
+        # Sorted distinct cell keys; the points of cells[i] are
+        # cell_indptr[i]:cell_indptr[i + 1] of the sorted arrays
+        self.cells, starts = np.unique(keys[order], return_index=True)
+        self.cell_indptr = np.append(starts, len(order)).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.owner)
+
+    @staticmethod
+    def _keys(ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+        return (ix.astype(np.int64) << 32) + (iy.astype(np.int64) + _Y_OFFSET)
+
+    def query(self, x: np.ndarray, y: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Sorted distinct owners with at least one point within radius of
+        any of the query points (x[i], y[i]).
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if not len(self.cells) or not len(x):
+            return np.zeros(0, dtype=self.owner.dtype)
+
+        # The cells overlapping the bounding square of each query circle,
+        # as (query, cell key) pairs
+        size = self.cell_size
+        ix0, ix1 = np.floor((x - radius) / size), np.floor((x + radius) / size)
+        iy0, iy1 = np.floor((y - radius) / size), np.floor((y + radius) / size)
+        width, height = (ix1 - ix0 + 1).astype(np.int64), (iy1 - iy0 + 1).astype(np.int64)
+        per_query = width * height
+        query = np.repeat(np.arange(len(x)), per_query)
+        k = np.arange(per_query.sum()) - np.repeat(np.cumsum(per_query) - per_query, per_query)
+        keys = self._keys(ix0[query] + k // height[query], iy0[query] + k % height[query])
+
+        found = np.searchsorted(self.cells, keys)
+        hit = (found < len(self.cells)) & (self.cells[np.minimum(found, len(self.cells) - 1)] == keys)
+        found, query = found[hit], query[hit]
+        if not len(found):
+            return np.zeros(0, dtype=self.owner.dtype)
+
+        # Concatenated point ranges of the visited cells
+        starts, ends = self.cell_indptr[found], self.cell_indptr[found + 1]
+        points = concatenated_ranges(starts, ends)
+        query = np.repeat(query, ends - starts)
+
+        near = (self.x[points] - x[query]) ** 2 + (self.y[points] - y[query]) ** 2 <= radius * radius
+        return np.unique(self.owner[points[near]])
@@ -0,0 +1,78 @@
+import argparse
+import json
+import logging
+import tempfile
+
+from scenario_analysis.benchmark.suite import CASES, compare, run_benchmarks, save_results
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark der Pipeline-Stufen mit synthetischen Szenarien und Straßennetzen"
+    )
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=sorted(CASES),
+        default=["small", "medium"],
+        help="Zu messende Größenklassen"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Wiederholungen pro Stufe (nach einem Aufwärmlauf)"
+    )
+    parser.add_argument(
+        "--output",
+        default="data/processed/benchmark.json",
+        help="JSON-Datei für die Ergebnisse"
+    )
+    parser.add_argument(
+        "--compare",
+        help="Frühere Ergebnisdatei, gegen die verglichen wird"
+    )
+    parser.add_argument(
+        "--workdir",
+        help="Verzeichnis für die generierten Dateien (Standard: temporär)"
+    )
+    parser.add_argument(
+        "--scenarios",
+        metavar="VERZEICHNIS",
+        help="Zusätzlich den Parser-Durchsatz auf allen .xosc-Dateien dieses Verzeichnisses messen "
+             "(z. B. esmini/resources/xosc)"
+    )
+
+    args = parser.parse_args()
+    cases = [CASES[name] for name in args.cases]
+
+    if args.workdir:
+        results = run_benchmarks(cases, args.workdir, repeat=args.repeat, corpus=args.scenarios)
+    else:
+        with tempfile.TemporaryDirectory() as workdir:
+            results = run_benchmarks(cases, workdir, repeat=args.repeat, corpus=args.scenarios)
+
+    save_results(results, args.output)
+
+    for r in results["results"]:
+        logging.info(f"{r['case']:<8} {r['stage']:<22} median {r['median_s'] * 1000:10.3f} ms")
+    for r in results["results"]:
+        if "files_per_s" in r:
+            logging.info(f"{r['case']:<8} {r['stage']:<22} {r['files_per_s']:10.1f} Dateien/s "
+                         f"({r['params']['num_files']} Dateien, {r['params']['failed_files']} nicht lesbar)")
+    for case in dict.fromkeys(r["case"] for r in results["results"] if r["case"] in CASES):
+        params = next(r["params"] for r in results["results"] if r["case"] == case)
+        logging.info(f"{case:<8} {'scenario_bytes':<22} {params['scenario_bytes'] / 1024:13.1f} KiB")
+    logging.info(f"Ergebnisse gespeichert: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for row in compare(baseline, results):
+            logging.info(f"{row['case']:<8} {row['stage']:<22} {row['ratio']:6.2f}x gegenüber Baseline")
+
+
+if __name__ == "__main__":
+    main()
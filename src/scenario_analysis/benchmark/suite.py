@@ -0,0 +1,311 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.scenario_store import ScenarioStore
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.benchmark.synthetic import generate_openscenario, generate_opendrive
+
+
+RESULTS_VERSION = 1
+
+# Radius of the road_graph_features_local stage, in meters
+LOCAL_RADIUS = 200.0
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    """
+    Size parameters of one synthetic scenario / road network pair.
+    """
+    name: str
+    num_entities: int
+    num_stories: int
+    events_per_story: int
+    conditions_per_event: int
+    num_junctions: int
+    connections_per_junction: int = 4
+    lanes_per_side: int = 2
+
+
+CASES = {
+    "small": BenchmarkCase("small", 4, 1, 5, 1, 2),
+    "medium": BenchmarkCase("medium", 20, 5, 40, 2, 25),
+    "large": BenchmarkCase("large", 100, 20, 200, 3, 250),
+}
+
+
+class StubLLMClient:
+    """
+    Stands in for OpenAIClient so the LLM stage measures prompt building
+    and result handling without network latency.
+    """
+
+    model = "stub"
+    temperature = 0.0
+
+    def analyze_scenario(self, prompt: str) -> dict:
+        return {
+            "reasoning_path": "stub",
+            "scenarioType": "Synthetic",
+            "interactionDescription": "Synthetic benchmark scenario.",
+            "scenarioComplexity": 3,
+            "potentialRiskFactors": [],
+            "riskEstimate": 0.5,
+            "riskLevel": "medium",
+        }
+
+
+def time_stage(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    Run fn once to warm up, then repeat times; durations in seconds.
+    """
+    fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+    }
+
+
+def memory_footprint(fn: Callable[[], object], copies: int = 5) -> int:
+    """
+    Bytes allocated per result of fn that stay alive while the result is
+    held, averaged over copies results (e.g. one parsed scenario).
+    """
+    fn()
+    tracemalloc.start()
+    try:
+        results = [fn() for _ in range(copies)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del results
+    return current // copies
+
+
+def _run_cli(*args: str) -> None:
+    """
+    Run the CLI in a fresh interpreter, so import and setup costs count.
+    """
+    src = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
+    subprocess.run(
+        [sys.executable, "-m", "scenario_analysis.cli", *args],
+        env=env, capture_output=True, check=True,
+    )
+
+
+def generate_case(case: BenchmarkCase, workdir: str | Path) -> tuple[Path, Path]:
+    workdir = Path(workdir)
+    xodr = generate_opendrive(
+        workdir / f"{case.name}.xodr",
+        num_junctions=case.num_junctions,
+        connections_per_junction=case.connections_per_junction,
+        lanes_per_side=case.lanes_per_side,
+    )
+    xosc = generate_openscenario(
+        workdir / f"{case.name}.xosc",
+        num_entities=case.num_entities,
+        num_stories=case.num_stories,
+        events_per_story=case.events_per_story,
+        conditions_per_event=case.conditions_per_event,
+        logic_file=xodr.name,
+    )
+    return xosc, xodr
+
+
+def run_case(case: BenchmarkCase, workdir: str | Path, repeat: int = 5) -> List[dict]:
+    """
+    Time every pipeline stage on one synthetic case. Each stage gets the
+    output of the previous stages as input, computed once up front.
+
+    cli_startup (--help) and cli_no_llm (a complete run without the LLM)
+    start a new interpreter each time and track startup cost.
+    """
+    xosc, xodr = generate_case(case, workdir)
+
+    parser = OpenScenarioXMLParser()
+    scenario_store = ScenarioStore(Path(workdir) / "scenario_store")
+    road_graph_extractor = RoadGraphExtractor()
+    road_graph_feature_extractor = RoadGraphFeatureExtractor()
+    structural_extractor = BasicStatsExtractor()
+    semantic_extractor = AISemanticFeatureExtractor(StubLLMClient())
+    risk_estimator = AccidentRiskEstimator()
+
+    scenario = parser.parse(xosc)
+    graph = road_graph_extractor.extract_network(xodr)
+    feature_vector = {}
+    feature_vector.update(structural_extractor.extract(scenario))
+    feature_vector.update(road_graph_feature_extractor.extract(graph))
+    feature_vector["semantic_analysis"] = semantic_extractor.extract(scenario)
+
+    stages = {
+        "parse_openscenario": lambda: parser.parse(xosc),
+        "load_scenario_store": lambda: scenario_store.get(xosc, parser),
+        "road_graph": lambda: road_graph_extractor.extract_network(xodr),
+        "road_graph_features": lambda: road_graph_feature_extractor.extract(graph),
+        "road_graph_features_bulk": lambda: road_graph_feature_extractor.extract_bulk(graph),
+        "road_graph_features_local": lambda: road_graph_feature_extractor.extract(
+            graph,
+            road_graph_feature_extractor.local_roads(graph, scenario.init_positions, LOCAL_RADIUS),
+        ),
+        "structural_features": lambda: structural_extractor.extract(scenario),
+        "semantic_llm_stub": lambda: semantic_extractor.extract(scenario),
+        "accident_risk": lambda: risk_estimator.estimate(feature_vector),
+        "cli_startup": lambda: _run_cli("--help"),
+        "cli_no_llm": lambda: _run_cli(
+            "--xosc", str(xosc), "--xodr", str(xodr), "--no-llm", "--outdir", str(Path(workdir) / "cli_out")
+        ),
+    }
+
+    params = asdict(case)
+    params.update(
+        xosc_bytes=xosc.stat().st_size,
+        xodr_bytes=xodr.stat().st_size,
+        num_roads=graph.num_roads,
+        num_events=feature_vector["num_events"],
+        scenario_bytes=memory_footprint(lambda: parser.parse(xosc)),
+    )
+
+    return [
+        {"case": case.name, "stage": stage, "repeat": repeat, "params": params, **time_stage(fn, repeat)}
+        for stage, fn in stages.items()
+    ]
+
+
+def run_corpus(directory: str | Path, repeat: int = 5, threads: int = 4) -> List[dict]:
+    """
+    Parse throughput on a directory of real scenarios, e.g. the xosc
+    resources of esmini: every .xosc file below directory, parsed by one
+    shared parser, sequentially and from threads threads, and loaded
+    from a scenario store filled by the warm-up run (in a temporary
+    directory). Files the parser rejects are counted and left out of
+    the timing.
+    """
+    parser = OpenScenarioXMLParser()
+    files, failed = [], 0
+    for path in sorted(Path(directory).rglob("*.xosc")):
+        try:
+            parser.parse(path)
+            files.append(path)
+        except Exception:
+            failed += 1
+    if not files:
+        raise ValueError(f"No parseable .xosc files in {directory}")
+
+    def parse_threaded():
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(parser.parse, files))
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        scenario_store = ScenarioStore(store_dir)
+        stages = {
+            "parse_corpus": lambda: [parser.parse(path) for path in files],
+            "parse_corpus_threads": parse_threaded,
+            "load_corpus_store": lambda: [scenario_store.get(path, parser) for path in files],
+        }
+        timings = {stage: time_stage(fn, repeat) for stage, fn in stages.items()}
+
+    params = {
+        "directory": str(directory),
+        "num_files": len(files),
+        "failed_files": failed,
+        "xosc_bytes": sum(path.stat().st_size for path in files),
+        "threads": threads,
+    }
+
+    rows = []
+    for stage, timing in timings.items():
+        rows.append({
+            "case": "corpus", "stage": stage, "repeat": repeat, "params": params, **timing,
+            "files_per_s": len(files) / timing["median_s"],
+        })
+    return rows
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    cases: Iterable[BenchmarkCase], workdir: str | Path, repeat: int = 5, corpus: str | Path | None = None
+) -> dict:
+    """
+    Run all cases, and the parse throughput on a scenario corpus if given;
+    the result is JSON-serializable and carries enough metadata (commit,
+    Python, platform) to compare runs across commits.
+    """
+    results = []
+    for case in cases:
+        results.extend(run_case(case, workdir, repeat=repeat))
+    if corpus is not None:
+        results.extend(run_corpus(corpus, repeat=repeat))
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> List[dict]:
+    """
+    Median ratio current / baseline for every (case, stage) in both runs;
+    values above 1 are slowdowns.
+    """
+    base = {(r["case"], r["stage"]): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        old = base.get((r["case"], r["stage"]))
+        if old is None or old["median_s"] == 0:
+            continue
+        rows.append({
+            "case": r["case"],
+            "stage": r["stage"],
+            "baseline_median_s": old["median_s"],
+            "median_s": r["median_s"],
+            "ratio": r["median_s"] / old["median_s"],
+        })
+    return rows
+
+
+def save_results(results: dict, path: str | Path) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
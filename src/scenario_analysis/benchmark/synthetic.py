@@ -0,0 +1,206 @@
+import random
+from pathlib import Path
+
+from lxml import etree
+
+
+# Condition elements cycled through by the scenario generator:
+# (ByValueCondition | ByEntityCondition, inner condition tag, attributes)
+_CONDITIONS = (
+    ("ByValueCondition", "SimulationTimeCondition", {"value": "4", "rule": "greaterThan"}),
+    ("ByEntityCondition", "TimeToCollisionCondition", {"value": "2.5", "freespace": "false", "rule": "lessThan"}),
+    ("ByEntityCondition", "RelativeDistanceCondition", {
+        "relativeDistanceType": "longitudinal", "value": "15", "freespace": "false", "rule": "lessThan"
+    }),
+    ("ByValueCondition", "StoryboardElementStateCondition", {
+        "storyboardElementType": "event", "state": "endTransition"
+    }),
+)
+
+
+def _sub(parent, tag: str, **attrib) -> etree._Element:
+    return etree.SubElement(parent, tag, {k: str(v) for k, v in attrib.items()})
+
+
+def _speed_action(parent, speed: float) -> None:
+    priv_action = _sub(parent, "PrivateAction")
+    speed_act = _sub(_sub(priv_action, "LongitudinalAction"), "SpeedAction")
+    _sub(speed_act, "SpeedActionDynamics", dynamicsShape="step", value=0, dynamicsDimension="time")
+    _sub(_sub(speed_act, "SpeedActionTarget"), "AbsoluteTargetSpeed", value=f"{speed:.1f}")
+
+
+# ----------------------------------------------------------------------
+# OpenSCENARIO
+# ----------------------------------------------------------------------
+
+def generate_openscenario(
+    path: str | Path,
+    num_entities: int = 3,
+    num_stories: int = 1,
+    events_per_story: int = 3,
+    conditions_per_event: int = 1,
+    logic_file: str | None = None,
+    seed: int = 0,
+) -> Path:
+    """
+    Write a synthetic OpenSCENARIO 1.x file.
+
+    Every third entity is a pedestrian, the rest are vehicles; each entity
+    gets a teleport and a speed action in Init. Each story has one act with
+    one maneuver group per entity (up to events_per_story), and the events
+    are spread over their maneuvers. Every event carries a speed action and
+    a start trigger with conditions_per_event conditions.
+    """
+    path = Path(path)
+    rng = random.Random(seed)
+
+    root = etree.Element("OpenSCENARIO")
+    _sub(root, "FileHeader", revMajor=1, revMinor=0, date="2024-01-01T00:00:00",
+         description="Synthetic benchmark scenario", author="benchmark")
+    _sub(root, "ParameterDeclarations")
+    _sub(root, "CatalogLocations")
+    road_network = _sub(root, "RoadNetwork")
+    if logic_file:
+        _sub(road_network, "LogicFile", filepath=logic_file)
+
+    entity_names = [f"Entity{i}" for i in range(num_entities)]
+    entities = _sub(root, "Entities")
+    for i, name in enumerate(entity_names):
+        obj = _sub(entities, "ScenarioObject", name=name)
+        if i % 3 == 2:
+            _sub(obj, "Pedestrian", name="pedestrian_adult", model="male", mass=80, pedestrianCategory="pedestrian")
+        else:
+            vehicle = _sub(obj, "Vehicle", name="car", vehicleCategory="car")
+            _sub(vehicle, "Performance", maxSpeed=69, maxAcceleration=10, maxDeceleration=10)
+
+    storyboard = _sub(root, "Storyboard")
+    actions = _sub(_sub(storyboard, "Init"), "Actions")
+    for i, name in enumerate(entity_names):
+        private = _sub(actions, "Private", entityRef=name)
+        teleport = _sub(_sub(private, "PrivateAction"), "TeleportAction")
+        _sub(_sub(teleport, "Position"), "LanePosition", roadId=i % 4, laneId=-1, offset=0, s=10 + 5 * i)
+        speed = rng.uniform(1.0, 36.0) if i % 3 != 2 else rng.uniform(0.5, 2.0)
+        _speed_action(private, speed)
+
+    for story_index in range(num_stories):
+        story = _sub(storyboard, "Story", name=f"Story{story_index}")
+        act = _sub(story, "Act", name=f"Act{story_index}")
+
+        num_groups = max(1, min(num_entities, events_per_story))
+        maneuvers = []
+        for g in range(num_groups):
+            group = _sub(act, "ManeuverGroup", maximumExecutionCount=1, name=f"Group{story_index}_{g}")
+            actors = _sub(group, "Actors", selectTriggeringEntities="false")
+            if entity_names:
+                _sub(actors, "EntityRef", entityRef=entity_names[g % num_entities])
+            maneuvers.append(_sub(group, "Maneuver", name=f"Maneuver{story_index}_{g}"))
+
+        for e in range(events_per_story):
+            event = _sub(maneuvers[e % num_groups], "Event", name=f"Event{story_index}_{e}", priority="overwrite")
+            _speed_action(_sub(event, "Action", name=f"Action{story_index}_{e}"), rng.uniform(0.0, 36.0))
+
+            group = _sub(_sub(event, "StartTrigger"), "ConditionGroup")
+            for c in range(conditions_per_event):
+                by_type, inner, attrib = _CONDITIONS[(e + c) % len(_CONDITIONS)]
+                condition = _sub(group, "Condition", name=f"Condition{e}_{c}", delay=0, conditionEdge="rising")
+                by_el = _sub(condition, by_type)
+                if by_type == "ByEntityCondition":
+                    triggering = _sub(by_el, "TriggeringEntities", triggeringEntitiesRule="any")
+                    if entity_names:
+                        _sub(triggering, "EntityRef", entityRef=entity_names[e % num_entities])
+                    _sub(_sub(by_el, "EntityCondition"), inner, **attrib)
+                else:
+                    _sub(by_el, inner, **attrib)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    etree.ElementTree(root).write(str(path), xml_declaration=True, encoding="UTF-8", pretty_print=True)
+    return path
+
+
+# ----------------------------------------------------------------------
+# OpenDRIVE
+# ----------------------------------------------------------------------
+
+def _road(parent, road_id: int, junction: int, x: float, y: float, hdg: float, length: float,
+          lanes_per_side: int) -> etree._Element:
+    road = _sub(parent, "road", name=f"Road{road_id}", length=length, id=road_id, junction=junction)
+    link = _sub(road, "link")
+    geometry = _sub(_sub(road, "planView"), "geometry", s=0.0, x=x, y=y, hdg=hdg, length=length)
+    _sub(geometry, "line")
+
+    section = _sub(_sub(road, "lanes"), "laneSection", s=0.0)
+    left = _sub(section, "left")
+    for i in range(lanes_per_side, 0, -1):
+        _sub(left, "lane", id=i, type="driving", level="false")
+    _sub(_sub(section, "center"), "lane", id=0, type="none", level="false")
+    right = _sub(section, "right")
+    for i in range(1, lanes_per_side + 1):
+        _sub(right, "lane", id=-i, type="driving", level="false")
+    _sub(right, "lane", id=-(lanes_per_side + 1), type="sidewalk", level="false")
+
+    return link
+
+
+def generate_opendrive(
+    path: str | Path,
+    num_junctions: int = 4,
+    connections_per_junction: int = 4,
+    lanes_per_side: int = 2,
+    arm_length: float = 100.0,
+) -> Path:
+    """
+    Write a synthetic OpenDRIVE network: a chain of junctions joined by arm
+    roads, each junction with connections_per_junction connecting roads.
+
+    Arm k runs from junction k-1 to junction k (num_junctions + 1 arms);
+    connecting roads alternate between both driving directions. The
+    network has num_junctions * (connections_per_junction + 1) + 1 roads.
+    """
+    path = Path(path)
+
+    root = etree.Element("OpenDRIVE")
+    _sub(root, "header", revMajor=1, revMinor=4, name="synthetic", version="1.00",
+         north=0, south=0, east=0, west=0)
+
+    junction_length = 20.0
+    pitch = arm_length + junction_length
+    # Junction ids follow the road ids so the two never collide
+    num_roads = num_junctions * (connections_per_junction + 1) + 1
+    junction_ids = [num_roads + j for j in range(num_junctions)]
+
+    for k in range(num_junctions + 1):
+        link = _road(root, k, -1, k * pitch, 0.0, 0.0, arm_length, lanes_per_side)
+        if k > 0:
+            _sub(link, "predecessor", elementType="junction", elementId=junction_ids[k - 1])
+        if k < num_junctions:
+            _sub(link, "successor", elementType="junction", elementId=junction_ids[k])
+
+    next_id = num_junctions + 1
+    for j, junction_id in enumerate(junction_ids):
+        junction = etree.Element("junction", id=str(junction_id), name=f"Junction{j}")
+        incoming, outgoing = j, j + 1
+        x = j * pitch + arm_length
+
+        for c in range(connections_per_junction):
+            road_id = next_id
+            next_id += 1
+            forward = c % 2 == 0
+            start, end = (incoming, outgoing) if forward else (outgoing, incoming)
+            y = 3.5 * (c // 2)
+
+            link = _road(root, road_id, junction_id, x if forward else x + junction_length, y,
+                         0.0 if forward else 3.14159, junction_length, 1)
+            _sub(link, "predecessor", elementType="road", elementId=start,
+                 contactPoint="end" if forward else "start")
+            _sub(link, "successor", elementType="road", elementId=end,
+                 contactPoint="start" if forward else "end")
+
+            connection = _sub(junction, "connection", id=c, incomingRoad=start,
+                              connectingRoad=road_id, contactPoint="start")
+            _sub(connection, "laneLink", **{"from": -1 if forward else 1, "to": -1})
+
+        root.append(junction)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    etree.ElementTree(root).write(str(path), xml_declaration=True, encoding="UTF-8", pretty_print=True)
+    return path
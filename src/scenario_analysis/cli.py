@@ -1,48 +1,598 @@
 import argparse
 import logging
 import sys
-from dotenv import load_dotenv
+from collections import Counter
+from dataclasses import replace
+from functools import partial
 
-load_dotenv()
-
-from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
-from scenario_analysis.features.basic_stats import BasicStatsExtractor
-from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
-from scenario_analysis.features.feature_vector import FeatureVectorBuilder
-from scenario_analysis.llm.openai_client import OpenAIClient
-from scenario_analysis.analysis.road_graph import RoadGraphExtractor
-from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
-from scenario_analysis.output.json_writer import JSONFeatureWriter
+# Only the standard library is imported at module load. The pipeline
+# (lxml, numpy, networkx) and the LLM client (openai, dotenv) are imported
+# by the commands that need them, so --help and runs without the LLM
+# stage start fast.
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 def get_parser():
     parser = argparse.ArgumentParser(description="Scenario Analysis CLI")
-    parser.add_argument("--xosc", required=True, help="Pfad zur OpenScenario (.xosc) XML Datei")
-    parser.add_argument("--xodr", required=True, help="Pfad zur OpenDrive (.xodr) Datei")
+    add_xosc_argument(parser)
+    add_xodr_argument(parser)
     parser.add_argument("--outdir", default="data/processed/feature_vectors", help="Ausgabeverzeichnis für die JSON")
+    add_streaming_argument(parser)
+    add_local_radius_argument(parser)
+    parser.add_argument("--stage-threads", type=int, help="Threads für unabhängige Stufen (Parsen, Straßennetz, LLM) eines Szenarios; 0 = nacheinander (Standard: 2, für batch 0 pro Worker)")
+    add_param_argument(parser)
+    add_stage_arguments(parser)
+    add_prompt_arguments(parser)
+    add_llm_response_arguments(parser)
+    add_llm_cache_arguments(parser)
+    add_profile_arguments(parser)
+    parser.set_defaults(param=[])
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="Analysiert ein ganzes Korpus von Szenarien parallel")
+    batch.add_argument("--input", required=True, help="Verzeichnis, Glob-Muster oder Manifest (.csv/.json/.jsonl) mit (xosc, xodr) Paaren")
+    batch.add_argument("--output", default="data/processed/batch_features.jsonl", help="Aggregierte JSON-Lines Ausgabedatei")
+    batch.add_argument("--columnar", default=None, help="Zusätzlich spaltenorientierten Datensatz (.npy Partitionen) in dieses Verzeichnis schreiben")
+    batch.add_argument("--workers", type=int, default=None, help="Anzahl Worker-Prozesse (Standard: CPU-Kerne)")
+    batch.add_argument("--chunksize", type=int, default=4, help="Szenarien pro Task, die an einen Worker geschickt werden")
+    batch.add_argument("--async-llm", action="store_true", help="LLM-Anfragen asynchron und überlappend mit Parsing/Graph-Analyse in einem Prozess ausführen")
+    batch.add_argument("--llm-concurrency", type=int, default=8, help="Maximale Anzahl gleichzeitiger LLM-Anfragen im --async-llm Modus")
+    batch.add_argument("--incremental", action="store_true", help="Nur geänderte Szenarien/Stufen neu berechnen (Manifest neben der Ausgabedatei)")
+    batch.add_argument("--manifest", default=None, help="Pfad des Manifests für --incremental (Standard: <output>.manifest.json)")
+    batch.add_argument("--cache-dir", default=None, help="Verzeichnis für den gemeinsamen Cache geparster Straßennetze")
+    batch.add_argument("--scenario-store", default=None, help="Verzeichnis für binär gespeicherte, bereits geparste Szenarien (überspringt das XML-Parsen unveränderter Dateien)")
+    batch.add_argument("--dedupe", action="store_true", help="Strukturgleiche Szenarien gruppieren und nur eine LLM-Anfrage pro Gruppe senden")
+    batch.add_argument("--near-duplicates", type=float, default=None, metavar="SCHWELLE", help="Zusätzlich ähnliche Szenarien (geschätzte Jaccard-Ähnlichkeit >= SCHWELLE, z.B. 0.8) gruppieren; impliziert --dedupe")
+    batch.add_argument("--pack-llm", type=int, default=None, metavar="N", help="Bis zu N Szenarien in einer LLM-Anfrage bündeln (Anweisungen nur einmal pro Anfrage)")
+    batch.add_argument("--pack-token-budget", type=int, default=6000, help="Geschätzte maximale Prompt-Tokens einer gebündelten LLM-Anfrage")
+    batch.add_argument("--llm-batch-api", action="store_true", help="Alle LLM-Anfragen als einen OpenAI Batch-API-Job einreichen (günstiger, Ergebnis erst nach Abschluss des Jobs, bis zu 24 h)")
+    batch.add_argument("--llm-batch-poll", type=float, default=30.0, metavar="SEKUNDEN", help="Abfrageintervall des Batch-API-Jobs")
+    shared = shared_arguments(batch)
+    add_xodr_argument(shared)
+    add_streaming_argument(shared)
+    add_local_radius_argument(shared)
+    shared.add_argument("--stage-threads", type=int, help="Threads pro Worker für unabhängige Stufen eines Szenarios (Standard: 0 = nacheinander)")
+    add_stage_arguments(shared)
+    add_prompt_arguments(shared)
+    add_llm_response_arguments(shared)
+    add_llm_cache_arguments(shared)
+    add_profile_arguments(shared)
+
+    service = subparsers.add_parser("serve", help="Startet einen lokalen HTTP-Bewertungsdienst mit warmen Caches")
+    service.add_argument("--host", default="127.0.0.1", help="Adresse, an die der Dienst gebunden wird")
+    service.add_argument("--port", type=int, default=8765, help="Port des Dienstes")
+    service.add_argument("--workers", type=int, default=4, help="Anzahl Worker-Threads")
+    service.add_argument("--queue-size", type=int, default=64, help="Maximale Anzahl wartender Aufträge (darüber: HTTP 503)")
+    service.add_argument("--request-timeout", type=float, default=300.0, help="Maximale Wartezeit pro Anfrage in Sekunden")
+    service.add_argument("--cache-dir", default=None, help="Verzeichnis für den gemeinsamen Cache geparster Straßennetze")
+    service.add_argument("--scenario-store", default=None, help="Verzeichnis für binär gespeicherte, bereits geparste Szenarien (überspringt das XML-Parsen unveränderter Dateien)")
+    shared = shared_arguments(service)
+    add_streaming_argument(shared)
+    add_local_radius_argument(shared)
+    add_stage_arguments(shared)
+    add_prompt_arguments(shared)
+    add_llm_response_arguments(shared)
+    add_llm_cache_arguments(shared)
+
+    sweep = subparsers.add_parser("sweep", help="Bewertet Parametervarianten eines Szenarios, ohne die Datei erneut zu lesen")
+    sweep.add_argument("--sweep", default=None, help="JSON-Datei mit Parameterwerten und -verteilungen (ohne: nur die deklarierten Werte)")
+    sweep.add_argument("--output", default="data/processed/sweep_features.jsonl", help="JSON-Lines Ausgabedatei mit einem Eintrag pro Variante")
+    sweep.add_argument("--cache-dir", default=None, help="Verzeichnis für den gemeinsamen Cache geparster Straßennetze")
+    shared = shared_arguments(sweep)
+    add_xosc_argument(shared)
+    add_xodr_argument(shared)
+    add_local_radius_argument(shared)
+    add_param_argument(shared)
+    add_stage_arguments(shared)
+    add_prompt_arguments(shared)
+    add_llm_response_arguments(shared)
+    add_llm_cache_arguments(shared)
+    add_profile_arguments(shared)
+
     return parser
 
+def shared_arguments(subparser):
+    """
+    Group for the options a subcommand shares with the top-level parser.
+    They have no default there, so a value given before the subcommand is
+    not overwritten by the subcommand's default.
+    """
+    return subparser.add_argument_group(
+        "gemeinsame Optionen", "auch vor dem Unterbefehl möglich", argument_default=argparse.SUPPRESS
+    )
+
+def add_xosc_argument(parser):
+    parser.add_argument("--xosc", help="Pfad zur OpenScenario (.xosc) XML Datei")
+
+def add_xodr_argument(parser):
+    parser.add_argument("--xodr", help="Pfad zur OpenDrive (.xodr) Datei; für batch die Datei aller Szenarien, sonst aus RoadNetwork/LogicFile gelesen")
+
+def add_streaming_argument(parser):
+    parser.add_argument("--streaming", action="store_true", help="Speicherschonender iterparse-Parser für sehr große .xosc Dateien")
+
+def add_local_radius_argument(parser):
+    parser.add_argument("--local-radius", type=float, help="Straßennetz-Features nur im Umkreis (Meter) der Startpositionen berechnen")
+
+def add_param_argument(parser):
+    parser.add_argument("--param", action="append", metavar="NAME=WERT", help="Deklarierten Szenario-Parameter überschreiben (mehrfach möglich)")
+
+def parameter_overrides(values) -> dict:
+    """
+    {name: value} of the --param NAME=VALUE arguments.
+    """
+    overrides = {}
+    for item in values:
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Ungültiger Parameter '{item}' (erwartet NAME=WERT)")
+        overrides[name.strip()] = value.strip()
+    return overrides
+
+def add_stage_arguments(parser):
+    parser.add_argument("--stages", help="Kommagetrennte Feature-Stufen: structural, road, semantic (Standard: alle)")
+    parser.add_argument("--no-llm", action="store_true", help="LLM-Stufe überspringen und keinen LLM-Client erzeugen (nur strukturelles Risiko)")
+
+def selected_stages(args) -> tuple:
+    """
+    The feature stages of --stages / --no-llm, in pipeline order.
+    """
+    from scenario_analysis.features.feature_vector import STAGES
+
+    if args.stages:
+        requested = {stage.strip() for stage in args.stages.split(",") if stage.strip()}
+        unknown = requested - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unbekannte Stufen: {', '.join(sorted(unknown))} (erlaubt: {', '.join(STAGES)})")
+    else:
+        requested = set(STAGES)
+    if args.no_llm:
+        requested.discard("semantic")
+    return tuple(stage for stage in STAGES if stage in requested)
+
+def add_prompt_arguments(parser):
+    parser.add_argument("--compact-prompt", action="store_true", help="Wiederholte Struktur im LLM-Prompt zusammenfassen (kürzere Prompts bei großen Szenarien)")
+    parser.add_argument("--prompt-token-budget", type=int, metavar="N", help="Maximale geschätzte Prompt-Tokens pro Szenario; weniger risikorelevante Ereignisse werden ausgelassen (impliziert --compact-prompt)")
+
+def add_llm_response_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--llm-reasoning", action="store_true", help="Schrittweise Begründung des LLM anfordern und im Ergebnis behalten (Audit-Läufe, langsamer)")
+    group.add_argument("--llm-risk-only", action="store_true", help="LLM-Antwort nach riskEstimate und riskLevel abbrechen (keine beschreibenden Felder)")
+
+def llm_response_options(args) -> dict:
+    """
+    Keyword arguments of PipelineConfig for --llm-reasoning / --llm-risk-only.
+    """
+    return {"llm_reasoning": args.llm_reasoning, "llm_risk_only": args.llm_risk_only}
+
+def log_prompt_sizes(sizes: Counter):
+    """
+    Summary of the prompt_size entries of the records, summed in sizes
+    (plus the number of prompts under "prompts").
+    """
+    if not sizes["prompts"]:
+        return
+    saved = 1 - sizes["tokens"] / sizes["full_tokens"] if sizes["full_tokens"] else 0.0
+    logging.info(
+        f"Prompt-Größe: {sizes['tokens']} geschätzte Tokens für {sizes['prompts']} Prompts "
+        f"(Ø {sizes['tokens'] / sizes['prompts']:.0f}, ohne Kompaktierung {sizes['full_tokens']}, "
+        f"{saved:.0%} eingespart), {sizes['omitted_events']} Ereignisse wegen Token-Budget ausgelassen"
+    )
+
+def add_llm_cache_arguments(parser):
+    parser.add_argument("--llm-cache", help="SQLite-Datei für den Cache der LLM-Antworten")
+    parser.add_argument("--llm-cache-only", action="store_true", help="Nur gecachte LLM-Antworten verwenden (offline Neubewertung)")
+    parser.add_argument("--llm-cache-ttl", type=float, help="Maximales Alter eines Cache-Eintrags in Sekunden")
+    parser.add_argument("--llm-cache-max-entries", type=int, help="Maximale Anzahl Einträge im LLM-Cache")
+
+def add_profile_arguments(parser):
+    parser.add_argument("--profile", action="store_true", help="Laufzeit pro Pipeline-Stufe messen und am Ende als Bericht ausgeben")
+    parser.add_argument("--profile-memory", action="store_true", help="Zusätzlich Spitzen-Speicherverbrauch pro Stufe messen (tracemalloc, langsamer)")
+    parser.add_argument("--metrics-jsonl", help="Stufen-Messwerte als JSON-Lines in diese Datei anhängen")
+    parser.add_argument("--metrics-prom", help="Aggregierte Stufen-Messwerte im Prometheus-Textformat in diese Datei schreiben")
+
+def make_instrumentation(args):
+    """
+    Instrumentation with the sinks selected on the command line, plus the
+    collector for the --profile report; (None, None) if profiling is off.
+    """
+    if not (args.profile or args.profile_memory or args.metrics_jsonl or args.metrics_prom):
+        return None, None
+
+    from scenario_analysis.instrumentation import CollectorSink, Instrumentation, JSONLinesSink, PrometheusTextSink
+
+    report = CollectorSink()
+    sinks = [report]
+    if args.metrics_jsonl:
+        sinks.append(JSONLinesSink(args.metrics_jsonl))
+    if args.metrics_prom:
+        sinks.append(PrometheusTextSink(args.metrics_prom))
+    return Instrumentation(sinks, trace_memory=args.profile_memory), report
+
+def finish_instrumentation(args, instrumentation, report):
+    if instrumentation is None:
+        return
+    from scenario_analysis.instrumentation import format_report
+    instrumentation.close()
+    if args.profile or args.profile_memory:
+        logging.info("Profil pro Stufe:\n" + format_report(report.summary()))
+
+def make_llm_client(args):
+    from scenario_analysis.llm.openai_client import RISK_KEYS, OpenAIClient
+    from scenario_analysis.llm.response_cache import LLMResponseCache
+
+    cache = None
+    if args.llm_cache:
+        cache = LLMResponseCache(args.llm_cache, ttl_seconds=args.llm_cache_ttl, max_entries=args.llm_cache_max_entries)
+    elif args.llm_cache_only:
+        raise ValueError("--llm-cache-only benötigt --llm-cache")
+    return OpenAIClient(
+        cache=cache,
+        cache_only=args.llm_cache_only,
+        response_mode="audit" if args.llm_reasoning else "fast",
+        stop_after=RISK_KEYS if args.llm_risk_only else None,
+    )
+
+def run_batch(args, stages):
+    from scenario_analysis.output.batch_writer import BatchResultWriter
+    from scenario_analysis.output.columnar_writer import ColumnarFeatureWriter
+    from scenario_analysis.pipeline.batch import BatchScenarioRunner, PipelineConfig, default_pipeline, discover_jobs
+    from scenario_analysis.pipeline.async_runner import AsyncScenarioRunner
+    from scenario_analysis.pipeline.incremental import IncrementalManifest, IncrementalRunner
+    from scenario_analysis.pipeline.dedup import DeduplicatingRunner
+    from scenario_analysis.pipeline.packed import PackedLLMRunner
+    from scenario_analysis.pipeline.batch_api import BatchAPIRunner
+    from scenario_analysis.instrumentation import StageRecord
+    from scenario_analysis.features.feature_vector import STAGES
+
+    jobs = discover_jobs(args.input, default_xodr=args.xodr)
+    if not jobs:
+        logging.error(f"Keine Szenarien gefunden für: {args.input}")
+        sys.exit(1)
+
+    if args.llm_cache_only and not args.llm_cache:
+        logging.error("--llm-cache-only benötigt --llm-cache")
+        sys.exit(1)
+
+    logging.info(f"Starte Batch-Analyse von {len(jobs)} Szenarien...")
+
+    config = PipelineConfig(
+        cache_dir=args.cache_dir,
+        streaming=args.streaming,
+        async_llm=args.async_llm,
+        llm_concurrency=args.llm_concurrency,
+        llm_cache=args.llm_cache,
+        llm_cache_only=args.llm_cache_only,
+        llm_cache_ttl=args.llm_cache_ttl,
+        llm_cache_max_entries=args.llm_cache_max_entries,
+        local_radius=args.local_radius,
+        stages=stages,
+        stage_threads=args.stage_threads or 0,
+        scenario_store=args.scenario_store,
+        compact_prompts=args.compact_prompt,
+        prompt_token_budget=args.prompt_token_budget,
+        **llm_response_options(args),
+    )
+    instrumentation, report = make_instrumentation(args)
+    if instrumentation is not None:
+        # Workers measure, this process emits to the sinks
+        config = replace(config, profile=True, profile_memory=args.profile_memory)
+
+    if args.async_llm and args.incremental:
+        logging.error("--incremental kann nicht mit --async-llm kombiniert werden")
+        sys.exit(1)
+
+    if args.async_llm and args.profile_memory:
+        # Concurrent scenarios would share the global tracemalloc peak
+        logging.error("--profile-memory kann nicht mit --async-llm kombiniert werden")
+        sys.exit(1)
+
+    if args.async_llm and "semantic" not in stages:
+        logging.error("--async-llm benötigt die Stufe semantic")
+        sys.exit(1)
+
+    if args.incremental and stages != STAGES:
+        logging.error("--incremental unterstützt nur alle Stufen (kein --stages/--no-llm)")
+        sys.exit(1)
+
+    dedupe = args.dedupe or args.near_duplicates is not None
+    if dedupe and (args.async_llm or args.incremental):
+        logging.error("--dedupe/--near-duplicates kann nicht mit --async-llm oder --incremental kombiniert werden")
+        sys.exit(1)
+
+    if dedupe and "semantic" not in stages:
+        logging.error("--dedupe/--near-duplicates benötigt die Stufe semantic")
+        sys.exit(1)
+
+    packed = args.pack_llm is not None
+    if packed and (args.async_llm or args.incremental or dedupe):
+        logging.error("--pack-llm kann nicht mit --async-llm, --incremental oder --dedupe kombiniert werden")
+        sys.exit(1)
+
+    if packed and ("semantic" not in stages or args.pack_llm < 1):
+        logging.error("--pack-llm benötigt die Stufe semantic und N >= 1")
+        sys.exit(1)
+
+    if args.llm_batch_api and (args.async_llm or args.incremental or dedupe or packed):
+        logging.error("--llm-batch-api kann nicht mit --async-llm, --incremental, --dedupe oder --pack-llm kombiniert werden")
+        sys.exit(1)
+
+    if args.llm_batch_api and ("semantic" not in stages or args.llm_risk_only):
+        # Batch answers are not streamed, so they cannot be cut short
+        logging.error("--llm-batch-api benötigt die Stufe semantic und ist nicht mit --llm-risk-only kombinierbar")
+        sys.exit(1)
+
+    async_pipeline = None
+    if args.async_llm:
+        async_pipeline = default_pipeline(config)
+        runner = AsyncScenarioRunner(async_pipeline)
+    else:
+        runner = BatchScenarioRunner(
+            pipeline_factory=partial(default_pipeline, config),
+            workers=args.workers,
+            chunksize=args.chunksize,
+        )
+
+    if args.incremental:
+        manifest_path = args.manifest or f"{args.output}.manifest.json"
+        runner = IncrementalRunner(runner, IncrementalManifest(manifest_path))
+    elif dedupe:
+        runner = DeduplicatingRunner(runner, near_threshold=args.near_duplicates)
+    elif packed:
+        runner = PackedLLMRunner(runner, max_items=args.pack_llm, token_budget=args.pack_token_budget)
+    elif args.llm_batch_api:
+        runner = BatchAPIRunner(runner, poll_interval=args.llm_batch_poll)
+
+    num_ok = 0
+    num_failed = 0
+    cache_counts = Counter()
+    prompt_sizes = Counter()
+    num_skipped = 0
+    columnar = ColumnarFeatureWriter(args.columnar) if args.columnar else None
+    with BatchResultWriter(args.output) as writer:
+        for record in runner.run(jobs):
+            profile = record.pop("profile", None)
+            if profile and instrumentation is not None:
+                for stage in profile:
+                    instrumentation.emit(StageRecord(**{**stage, "scenario": record["xosc"]}))
+            writer.write(record)
+            if record["status"] == "ok":
+                num_ok += 1
+                if columnar is not None:
+                    columnar.append(record["feature_vector"], xosc=record["xosc"], xodr=record["xodr"])
+            else:
+                num_failed += 1
+            if "road_graph_cache" in record:
+                cache_counts[record["road_graph_cache"]] += 1
+            if "prompt_size" in record:
+                prompt_sizes.update(record["prompt_size"])
+                prompt_sizes["prompts"] += 1
+            if record.get("recomputed") == []:
+                num_skipped += 1
+    if columnar is not None:
+        columnar.close()
+    if async_pipeline is not None and instrumentation is not None:
+        for stage in async_pipeline.profile():
+            instrumentation.emit(StageRecord(**stage))
+
+    logging.info(f"Batch abgeschlossen: {num_ok} erfolgreich, {num_failed} fehlgeschlagen. Ausgabe: {args.output}")
+    if args.incremental:
+        logging.info(f"Inkrementell: {num_skipped} unveränderte Szenarien übersprungen")
+    if dedupe:
+        stats = runner.stats
+        logging.info(
+            f"Deduplizierung: {stats['llm_requests']} LLM-Anfragen für {stats['scenarios']} Szenarien "
+            f"({stats['exact']} exakte, {stats['near']} ähnliche Duplikate)"
+        )
+    if packed:
+        stats = runner.stats
+        logging.info(
+            f"Gebündelte LLM-Anfragen: {stats['llm_requests']} Anfragen ({stats['packs']} Pakete) "
+            f"für {stats['scenarios']} Szenarien"
+        )
+    if args.llm_batch_api:
+        logging.info(f"Batch-API: {runner.stats['batch_jobs']} Job(s) für {runner.stats['scenarios']} Szenarien")
+    log_prompt_sizes(prompt_sizes)
+    if cache_counts:
+        logging.info(
+            f"Straßennetz-Cache: {cache_counts['memory_hits']} Memory-Treffer, "
+            f"{cache_counts['disk_hits']} Disk-Treffer, {cache_counts['misses']} Fehlzugriffe"
+        )
+    finish_instrumentation(args, instrumentation, report)
+    if num_failed:
+        sys.exit(1)
+
+def run_sweep(args, stages, overrides):
+    from scenario_analysis.ingestion.parameters import expand_sweep, load_sweep
+    from scenario_analysis.output.batch_writer import BatchResultWriter
+    from scenario_analysis.pipeline.batch import PipelineConfig, ScenarioJob, default_pipeline
+    from scenario_analysis.pipeline.sweep import SweepRunner
+    from scenario_analysis.instrumentation import StageRecord
+
+    if args.llm_cache_only and not args.llm_cache:
+        logging.error("--llm-cache-only benötigt --llm-cache")
+        sys.exit(1)
+
+    try:
+        spec = load_sweep(args.sweep) if args.sweep else {}
+    except (OSError, ValueError) as e:
+        logging.error(f"Sweep-Datei kann nicht gelesen werden: {e}")
+        sys.exit(1)
+    bindings = ({**binding, **overrides} for binding in expand_sweep(spec))
+
+    config = PipelineConfig(
+        cache_dir=args.cache_dir,
+        llm_cache=args.llm_cache,
+        llm_cache_only=args.llm_cache_only,
+        llm_cache_ttl=args.llm_cache_ttl,
+        llm_cache_max_entries=args.llm_cache_max_entries,
+        local_radius=args.local_radius,
+        stages=stages,
+        compact_prompts=args.compact_prompt,
+        prompt_token_budget=args.prompt_token_budget,
+        **llm_response_options(args),
+    )
+    instrumentation, report = make_instrumentation(args)
+    if instrumentation is not None:
+        config = replace(config, profile=True, profile_memory=args.profile_memory)
+
+    runner = SweepRunner(default_pipeline(config))
+    logging.info(f"Starte Parameter-Sweep für {args.xosc}...")
+
+    num_ok = 0
+    num_failed = 0
+    try:
+        with BatchResultWriter(args.output) as writer:
+            for record in runner.run(ScenarioJob(xosc=args.xosc, xodr=args.xodr), bindings):
+                profile = record.pop("profile", None)
+                if profile and instrumentation is not None:
+                    for stage in profile:
+                        instrumentation.emit(StageRecord(**{**stage, "scenario": f"{args.xosc}#{record['variant']}"}))
+                writer.write(record)
+                if record["status"] == "ok":
+                    num_ok += 1
+                else:
+                    num_failed += 1
+
+        logging.info(
+            f"Sweep abgeschlossen: {num_ok} Varianten erfolgreich, {num_failed} fehlgeschlagen, "
+            f"{runner.llm_requests} LLM-Anfragen. Ausgabe: {args.output}"
+        )
+    except Exception as e:
+        # Scenario file, road network or sweep values unusable; single
+        # variants that fail are error records instead
+        logging.error(f"Sweep fehlgeschlagen: {e}")
+        sys.exit(1)
+    finally:
+        finish_instrumentation(args, instrumentation, report)
+    if num_failed:
+        sys.exit(1)
+
+def run_service(args, stages):
+    from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+    from scenario_analysis.pipeline.batch import PipelineConfig, default_pipeline
+    from scenario_analysis.pipeline.service import ScoringService, serve
+
+    if args.llm_cache_only and not args.llm_cache:
+        logging.error("--llm-cache-only benötigt --llm-cache")
+        sys.exit(1)
+
+    config = PipelineConfig(
+        cache_dir=args.cache_dir,
+        streaming=args.streaming,
+        llm_cache=args.llm_cache,
+        llm_cache_only=args.llm_cache_only,
+        llm_cache_ttl=args.llm_cache_ttl,
+        llm_cache_max_entries=args.llm_cache_max_entries,
+        local_radius=args.local_radius,
+        stages=stages,
+        scenario_store=args.scenario_store,
+        compact_prompts=args.compact_prompt,
+        prompt_token_budget=args.prompt_token_budget,
+        **llm_response_options(args),
+    )
+    # All worker threads share the parsed road networks
+    road_graph_cache = RoadGraphCache(cache_dir=args.cache_dir)
+    service = ScoringService(
+        pipeline_factory=partial(default_pipeline, config, road_graph_cache=road_graph_cache),
+        workers=args.workers,
+        queue_size=args.queue_size,
+    )
+    serve(service, host=args.host, port=args.port, request_timeout=args.request_timeout)
+
 def main():
-    args = get_parser().parse_args()
+    cli_parser = get_parser()
+    args = cli_parser.parse_args()
+
+    try:
+        stages = selected_stages(args)
+        overrides = parameter_overrides(args.param)
+    except ValueError as e:
+        cli_parser.error(str(e))
+
+    if "semantic" in stages:
+        # OPENAI_API_KEY may come from a .env file
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    if args.command == "batch":
+        run_batch(args, stages)
+        return
+
+    if args.command == "serve":
+        run_service(args, stages)
+        return
+
+    if args.command == "sweep":
+        if not args.xosc:
+            cli_parser.error("--xosc ist erforderlich")
+        run_sweep(args, stages, overrides)
+        return
+
+    if not args.xosc:
+        cli_parser.error("--xosc ist erforderlich (oder 'batch' verwenden)")
+    if "road" in stages and not args.xodr:
+        cli_parser.error("--xodr ist erforderlich (oder Stufe road abwählen)")
+
+    instrumentation, report = make_instrumentation(args)
+    executor = None
 
     try:
+        from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+        from scenario_analysis.ingestion.openscenario_stream import StreamingOpenScenarioParser
+        from scenario_analysis.features.feature_vector import FeatureVectorBuilder
+        from scenario_analysis.output.json_writer import JSONFeatureWriter
+        from scenario_analysis.instrumentation import NULL_INSTRUMENTATION
+
         logging.info(f"Parsen von Szenario: {args.xosc}")
-        parser = OpenScenarioXMLParser()
-        scenario = parser.parse(args.xosc)
-        
-        logging.info(f"Szenario Info - Name: {scenario.name}, Author: {scenario.author}, Date: {scenario.date}")
+        parser = StreamingOpenScenarioParser() if args.streaming else OpenScenarioXMLParser()
+
+        def load_scenario():
+            with (instrumentation or NULL_INSTRUMENTATION).stage("parse"):
+                return parser.parse(args.xosc, overrides)
+
+        logging.info(f"Erstelle Feature Vector (Stufen: {', '.join(stages)})...")
+        # Only the extractors of the selected stages are constructed
+        structural_extractor = semantic_extractor = None
+        road_graph_extractor = road_graph_feature_extractor = None
+        if "structural" in stages:
+            from scenario_analysis.features.basic_stats import BasicStatsExtractor
+            structural_extractor = BasicStatsExtractor()
+        if "semantic" in stages:
+            from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+            semantic_extractor = AISemanticFeatureExtractor(
+                make_llm_client(args), compact=args.compact_prompt, token_budget=args.prompt_token_budget
+            )
+        if "road" in stages:
+            from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+            from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+            road_graph_extractor = RoadGraphExtractor()
+            road_graph_feature_extractor = RoadGraphFeatureExtractor()
+
+        stage_threads = 2 if args.stage_threads is None else args.stage_threads
+        if stage_threads > 0 and args.profile_memory:
+            logging.info("--profile-memory: Stufen werden nacheinander ausgeführt")
+        elif stage_threads > 0:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(stage_threads)
 
-        logging.info("Erstelle Feature Vector...")
         builder = FeatureVectorBuilder(
-            structural_extractor=BasicStatsExtractor(),
-            semantic_extractor=AISemanticFeatureExtractor(OpenAIClient()),
-            road_graph_extractor=RoadGraphExtractor(),
-            road_graph_feature_extractor=RoadGraphFeatureExtractor(),
-            xodr_path=args.xodr
+            structural_extractor=structural_extractor,
+            semantic_extractor=semantic_extractor,
+            road_graph_extractor=road_graph_extractor,
+            road_graph_feature_extractor=road_graph_feature_extractor,
+            xodr_path=args.xodr,
+            instrumentation=instrumentation,
+            local_radius=args.local_radius,
+            executor=executor,
         )
 
-        feature_vector = builder.build(scenario)
+        # Parsing overlaps the road network stage with --stage-threads
+        scenario, feature_vector = builder.parse_and_build(load_scenario, stages)
+        if builder.prompt_size is not None:
+            log_prompt_sizes(Counter(builder.prompt_size, prompts=1))
+
+        logging.info(f"Szenario Info - Name: {scenario.name}, Author: {scenario.author}, Date: {scenario.date}")
 
         for k, v in feature_vector.items():
             logging.info(f"Feature '{k}': {v}")
@@ -59,6 +609,11 @@ def main():
     except Exception as e:
         logging.error(f"Fehler bei der Ausführung: {e}")
         sys.exit(1)
+    finally:
+        # Trace and metrics sinks are flushed and closed on failure too
+        if executor is not None:
+            executor.shutdown()
+        finish_instrumentation(args, instrumentation, report)
 
 if __name__ == "__main__":
     main()
@@ -1,62 +1,128 @@
-from scenario_analysis.model.scenario import Scenario
+from typing import Callable, Iterable, List
+
+from scenario_analysis.model.scenario import Scenario, Story, Act, Maneuver, Event, Condition
+from scenario_analysis.features.traversal import ScenarioCollector, traverse
 from collections import Counter
 
+
+class StructureCountsCollector(ScenarioCollector):
+    """
+    Storyboard element counts and trigger depth.
+    """
+
+    def start(self, scenario: Scenario) -> None:
+        self.num_entities = len(scenario.entities)
+        self.num_stories = len(scenario.stories)
+        self.num_acts = 0
+        self.num_maneuvers = 0
+        self.num_events = 0
+        self.num_triggers = 0
+        self.num_conditions = 0
+        # In open scenario 1.x, triggers are usually flat lists of conditions, so we
+        # count max conditions per trigger as "depth" proxy.
+        self.max_trigger_depth = 0
+
+    def story(self, story: Story) -> None:
+        self.num_acts += len(story.acts)
+
+    def act(self, act: Act) -> None:
+        self.num_maneuvers += len(act.maneuvers)
+
+    def maneuver(self, maneuver: Maneuver) -> None:
+        self.num_events += len(maneuver.events)
+
+    def event(self, event: Event) -> None:
+        if event.trigger:
+            self.num_triggers += 1
+            self.num_conditions += len(event.trigger.conditions)
+            if len(event.trigger.conditions) > self.max_trigger_depth:
+                self.max_trigger_depth = len(event.trigger.conditions)
+
+    def result(self) -> dict:
+        return {
+            "num_entities": self.num_entities,
+            "num_stories": self.num_stories,
+            "num_acts": self.num_acts,
+            "num_maneuvers": self.num_maneuvers,
+            "num_events": self.num_events,
+            "num_triggers": self.num_triggers,
+            "num_conditions": self.num_conditions,
+            "max_trigger_depth": self.max_trigger_depth,
+        }
+
+
+class SpeedStatsCollector(ScenarioCollector):
+    """
+    Kinematics over Init and Event target speeds.
+    """
+
+    def start(self, scenario: Scenario) -> None:
+        self.max_speed = 0.0
+        self.total = 0.0
+        self.count = 0
+
+    def _add(self, speed: float) -> None:
+        if self.count == 0 or speed > self.max_speed:
+            self.max_speed = speed
+        self.total += speed
+        self.count += 1
+
+    def init_speed(self, speed: float) -> None:
+        self._add(speed)
+
+    def event(self, event: Event) -> None:
+        for speed in event.speeds:
+            self._add(speed)
+
+    def result(self) -> dict:
+        return {
+            "max_speed_ms": self.max_speed if self.count else 0.0,
+            "avg_speed_ms": self.total / self.count if self.count else 0.0,
+        }
+
+
+class TriggerTypesCollector(ScenarioCollector):
+    """
+    Number of conditions per condition type.
+    """
+
+    def start(self, scenario: Scenario) -> None:
+        self.type_counts = Counter()
+
+    def condition(self, condition: Condition) -> None:
+        self.type_counts[condition.type] += 1
+
+    def result(self) -> dict:
+        return {"trigger_types": dict(self.type_counts)}
+
+
 class BasicStatsExtractor:
     """
     Deterministic structural feature extraction.
+
+    Features come from collectors run in one traversal of the scenario.
+    Additional structural features can be added as plugins: factories of
+    ScenarioCollector whose result() dict is merged into the features.
     """
 
-    def extract(self, scenario: Scenario) -> dict:
-        features = {}
+    def __init__(self, plugins: Iterable[Callable[[], ScenarioCollector]] = ()):
+        self.plugins = list(plugins)
 
-        features["num_entities"] = len(scenario.entities)
-        features["num_stories"] = len(scenario.stories)
-
-        num_acts = 0
-        num_maneuvers = 0
-        num_events = 0
-        num_triggers = 0
-        num_conditions = 0
-        
-        trigger_types = []
-        max_trigger_depth = 0 # In open scenario 1.x, triggers are usually flat lists of conditions, but we can count max conditions per trigger as depth proxy, or just sequential events. Let's use max conditions per trigger as "depth" for now, or just sequential events. We'll count max conditions per trigger.
-        
-        all_speeds = []
-        
-        if hasattr(scenario, 'init_speeds'):
-            all_speeds.extend(scenario.init_speeds)
-
-        for story in scenario.stories:
-            num_acts += len(story.acts)
-            for act in story.acts:
-                num_maneuvers += len(act.maneuvers)
-                for man in act.maneuvers:
-                    num_events += len(man.events)
-                    for ev in man.events:
-                        if hasattr(ev, 'speeds'):
-                            all_speeds.extend(ev.speeds)
-                            
-                        if ev.trigger:
-                            num_triggers += 1
-                            num_conditions += len(ev.trigger.conditions)
-                            if len(ev.trigger.conditions) > max_trigger_depth:
-                                max_trigger_depth = len(ev.trigger.conditions)
-                            for cond in ev.trigger.conditions:
-                                trigger_types.append(cond.type)
-
-        features["num_acts"] = num_acts
-        features["num_maneuvers"] = num_maneuvers
-        features["num_events"] = num_events
-        features["num_triggers"] = num_triggers
-        features["num_conditions"] = num_conditions
-        features["max_trigger_depth"] = max_trigger_depth
-        
-        # Kinematics
-        features["max_speed_ms"] = max(all_speeds) if all_speeds else 0.0
-        features["avg_speed_ms"] = sum(all_speeds) / len(all_speeds) if all_speeds else 0.0
-        
-        # Count types
-        type_counts = Counter(trigger_types)
-        features["trigger_types"] = dict(type_counts)
+    def collectors(self) -> List[ScenarioCollector]:
+        collectors = [StructureCountsCollector(), SpeedStatsCollector(), TriggerTypesCollector()]
+        collectors.extend(plugin() for plugin in self.plugins)
+        return collectors
 
+    def extract(self, scenario: Scenario, extra_collectors: Iterable[ScenarioCollector] = ()) -> dict:
+        """
+        Structural features of the scenario. extra_collectors (e.g. the
+        prompt collector of AISemanticFeatureExtractor) ride along in the
+        same traversal; their results are not part of the features.
+        """
+        collectors = self.collectors()
+        traverse(scenario, [*collectors, *extra_collectors])
+
+        features = {}
+        for collector in collectors:
+            features.update(collector.result())
         return features
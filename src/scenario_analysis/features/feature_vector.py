@@ -1,44 +1,268 @@
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING, Callable
+
 from scenario_analysis.model.scenario import Scenario
-from scenario_analysis.features.basic_stats import BasicStatsExtractor
-from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
-from scenario_analysis.analysis.road_graph import RoadGraphExtractor
-from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+from scenario_analysis.features.traversal import traverse
 from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+from scenario_analysis.scheduler import StageTask, run_stages
+
+if TYPE_CHECKING:
+    # Extractors are passed in; importing them here would load numpy and
+    # lxml even for runs that never build the road stage
+    from scenario_analysis.features.basic_stats import BasicStatsExtractor
+    from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+    from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+    from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+    from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+
+
+# Feature stages that can be selected for a run; the risk estimate is
+# always made from whatever was computed
+STAGES = ("structural", "road", "semantic")
 
 
 class FeatureVectorBuilder:
     """
     Combines structural, road-network, semantic and risk-related features
     into a single feature vector.
+
+    With local_radius (meters), road features describe only the roads
+    within that radius of the entity start positions of the scenario; the
+    full network is used if no start position lies on it or no road lies
+    within the radius.
+
+    Extractors of stages that are never built may be None.
+
+    With an executor (e.g. a ThreadPoolExecutor with two threads), build()
+    and parse_and_build() run independent stages concurrently, so the road
+    network stage overlaps the LLM request. The feature vector is the same
+    as without it. Stage measurements then overlap in time. With memory
+    tracing (Instrumentation(trace_memory=True)) the executor is ignored:
+    tracemalloc keeps a single global peak, so the peak of one stage would
+    include the allocations of the stages running next to it.
     """
 
     def __init__(
         self,
-        structural_extractor: BasicStatsExtractor,
-        semantic_extractor: AISemanticFeatureExtractor,
-        road_graph_extractor: RoadGraphExtractor,
-        road_graph_feature_extractor: RoadGraphFeatureExtractor,
-        xodr_path: str,
+        structural_extractor: "BasicStatsExtractor | None",
+        semantic_extractor: "AISemanticFeatureExtractor | None",
+        road_graph_extractor: "RoadGraphExtractor | None",
+        road_graph_feature_extractor: "RoadGraphFeatureExtractor | None",
+        xodr_path: str | None,
+        road_graph_cache: "RoadGraphCache | None" = None,
+        risk_estimator: AccidentRiskEstimator | None = None,
+        instrumentation: Instrumentation | None = None,
+        local_radius: float | None = None,
+        executor: Executor | None = None,
     ):
         self.structural_extractor = structural_extractor
         self.semantic_extractor = semantic_extractor
         self.road_graph_extractor = road_graph_extractor
         self.road_graph_feature_extractor = road_graph_feature_extractor
         self.xodr_path = xodr_path
-        self.risk_estimator = AccidentRiskEstimator()
+        self.road_graph_cache = road_graph_cache
+        self.risk_estimator = risk_estimator or AccidentRiskEstimator()
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.local_radius = local_radius
+        self.executor = None if self.instrumentation.trace_memory else executor
+        # Cache tier that served the last road network ("memory", "disk",
+        # "miss"), None without a road graph cache
+        self.road_network_source: str | None = None
+        # Estimated size of the last prompt (see PromptCollector.stats),
+        # None if no prompt was built
+        self.prompt_size: dict | None = None
+
+    def build(self, scenario: Scenario, stages: tuple[str, ...] = STAGES) -> dict:
+        """
+        Feature vector of the selected stages (see STAGES). Without the
+        semantic stage, accident_probability is None and structural_risk
+        is set instead.
+        """
+        if self.executor is not None:
+            return self.parse_and_build(lambda: scenario, stages)[1]
+
+        feature_vector, prompt = self.prepare(scenario, stages)
+
+        if "semantic" not in stages:
+            return self.finalize(feature_vector, scenario.name, semantic=False)
+
+        # Semantic features (LLM)
+        feature_vector["semantic_analysis"] = self.semantic_features(prompt)[0]
+
+        return self.finalize(feature_vector, scenario.name)
+
+    def parse_and_build(self, load: Callable[[], Scenario],
+                        stages: tuple[str, ...] = STAGES) -> tuple[Scenario, dict]:
+        """
+        The scenario returned by load() (e.g. parsing a file) and its
+        feature vector. With an executor, the road network stage runs
+        while the LLM request is outstanding, or (without the semantic
+        stage) alongside loading, unless local_radius needs the scenario.
+        """
+        if self.executor is None:
+            scenario = load()
+            return scenario, self.build(scenario, stages)
+
+        tasks = [StageTask("scenario", load)]
+        if "structural" in stages or "semantic" in stages:
+            tasks.append(StageTask(
+                "structural", lambda scenario: self.prepare(scenario, tuple(s for s in stages if s != "road")),
+                after=("scenario",),
+            ))
+        if "semantic" in stages:
+            tasks.append(StageTask(
+                "semantic", lambda prepared: self.semantic_features(prepared[1])[0], after=("structural",)
+            ))
+        if "road" in stages:
+            if "semantic" in stages:
+                # Parsing and the road stage are mostly Python code and slow
+                # each other down on the GIL; the road stage is cheapest
+                # hidden behind the outstanding LLM request
+                tasks.append(StageTask("road", lambda scenario, _: self.road_features(scenario),
+                                       after=("scenario", "structural")))
+            elif self.local_radius is not None:
+                tasks.append(StageTask("road", self.road_features, after=("scenario",)))
+            else:
+                tasks.append(StageTask("road", self.road_features))
+
+        results = run_stages(tasks, self.executor)
+
+        # Same key order as the sequential build
+        scenario = results["scenario"]
+        feature_vector = dict(results["structural"][0]) if "structural" in results else {}
+        if "road" in results:
+            feature_vector.update(results["road"])
+        if "semantic" not in stages:
+            return scenario, self.finalize(feature_vector, scenario.name, semantic=False)
+
+        feature_vector["semantic_analysis"] = results["semantic"]
+        return scenario, self.finalize(feature_vector, scenario.name)
+
+    def prepare(self, scenario: Scenario, stages: tuple[str, ...] = STAGES,
+                extra_collectors=()) -> tuple[dict, str | None]:
+        """
+        Features of the deterministic stages, and the LLM prompt if the
+        semantic stage is selected (else None). The prompt and any
+        extra_collectors share the traversal of the structural stage.
+        """
+        feature_vector = {}
+
+        collectors = list(extra_collectors)
+        prompt_collector = None
+        if "semantic" in stages:
+            prompt_collector = self.semantic_extractor.prompt_collector()
+            collectors.append(prompt_collector)
+
+        if "structural" in stages:
+            with self.instrumentation.stage("structural"):
+                feature_vector.update(self.structural_features(scenario, collectors))
+        elif collectors:
+            traverse(scenario, collectors)
+
+        if "road" in stages:
+            feature_vector.update(self.road_features(scenario))
+
+        if prompt_collector is None:
+            return feature_vector, None
+        self.prompt_size = prompt_collector.stats()
+        return feature_vector, prompt_collector.result()
+
+    async def abuild(self, scenario: Scenario, executor: Executor | None = None) -> dict:
+        """
+        Async variant of build(): the LLM request is started right after the
+        scenario traversal and the road network stage runs in a worker
+        thread (of executor, if given) while it is outstanding. Requires a
+        semantic extractor backed by an async client.
+
+        With instrumentation, the CPU time of the "llm" stage includes other
+        work done on the event loop while the request is outstanding.
+        """
+        import asyncio
+
+        structural, prompt = self.structural_features_and_prompt(scenario)
+
+        semantic_task = asyncio.create_task(self._asemantic_features(prompt))
+        try:
+            loop = asyncio.get_running_loop()
+            road = await loop.run_in_executor(executor, self.road_features, scenario)
+        except BaseException:
+            semantic_task.cancel()
+            raise
 
-    def build(self, scenario: Scenario) -> dict:
         feature_vector = {}
+        feature_vector.update(structural)
+        feature_vector.update(road)
+        feature_vector["semantic_analysis"] = await semantic_task
 
+        return self.finalize(feature_vector, scenario.name)
+
+    def structural_features(self, scenario: Scenario, extra_collectors=()) -> dict:
         # Structural features (OpenSCENARIO)
-        feature_vector.update(
-            self.structural_extractor.extract(scenario)
-        )
+        return self.structural_extractor.extract(scenario, extra_collectors)
+
+    def structural_features_and_prompt(self, scenario: Scenario) -> tuple[dict, str]:
+        """
+        Structural features and the LLM prompt from a single traversal.
+        """
+        with self.instrumentation.stage("structural"):
+            prompt_collector = self.semantic_extractor.prompt_collector()
+            structural = self.structural_features(scenario, [prompt_collector])
+            self.prompt_size = prompt_collector.stats()
+            return structural, prompt_collector.result()
 
+    def semantic_features(self, prompt: str) -> tuple[dict, bool]:
+        # Semantic features (LLM); see AISemanticFeatureExtractor.analyze_prompt
+        with self.instrumentation.stage("llm") as stage:
+            hits_before = self._llm_cache_hits()
+            result = self.semantic_extractor.analyze_prompt(prompt)
+            if hits_before is not None:
+                stage.note_cache("hit" if self._llm_cache_hits() > hits_before else "miss")
+            return result
+
+    async def _asemantic_features(self, prompt: str) -> dict:
+        # No cache attribution here: concurrent requests share the counters
+        with self.instrumentation.stage("llm"):
+            return await self.semantic_extractor.aanalyze_prompt(prompt)
+
+    def _llm_cache_hits(self) -> int | None:
+        if not self.instrumentation.enabled:
+            return None
+        cache = getattr(self.semantic_extractor.llm, "cache", None)
+        return cache.stats()["hits"] if cache is not None else None
+
+    def road_features(self, scenario: Scenario | None = None) -> dict:
         # Road network features (OpenDRIVE)
-        graph = self.road_graph_extractor.extract(self.xodr_path)
-        road_features = self.road_graph_feature_extractor.extract(graph)
-        feature_vector.update(road_features)
+        if self.road_graph_cache is not None:
+            with self.instrumentation.stage("road_network") as stage:
+                entry = self.road_graph_cache.get(
+                    self.xodr_path,
+                    self.road_graph_extractor,
+                    self.road_graph_feature_extractor,
+                )
+                stage.note_cache(entry.source)
+            self.road_network_source = entry.source
+            network, road_features = entry.graph, entry.features
+        else:
+            with self.instrumentation.stage("road_graph"):
+                network = self.road_graph_extractor.extract_network(self.xodr_path)
+            road_features = None
+
+        roads = None
+        if self.local_radius is not None and scenario is not None and scenario.init_positions:
+            roads = self.road_graph_feature_extractor.local_roads(
+                network, scenario.init_positions, self.local_radius
+            )
+
+        if roads is not None:
+            with self.instrumentation.stage("hotspots"):
+                road_features = self.road_graph_feature_extractor.extract(network, roads)
+            road_features["local_radius"] = self.local_radius
+        elif road_features is None:
+            with self.instrumentation.stage("hotspots"):
+                road_features = self.road_graph_feature_extractor.extract(network)
+
+        feature_vector = dict(road_features)
 
         # Network risk summary
         hotspots = road_features.get("risk_hotspots", [])
@@ -48,17 +272,35 @@ class FeatureVectorBuilder:
             "types_present": list(set(h.get("type") for h in hotspots))
         }
 
-        # Semantic features (LLM)
-        feature_vector["semantic_analysis"] = (
-            self.semantic_extractor.extract(scenario)
-        )
+        return feature_vector
+
+    def assemble(self, structural: dict, road: dict, semantic: dict, scenario_name: str) -> dict:
+        """
+        Combine separately computed stage outputs into a feature vector.
+        """
+        feature_vector = {}
+        feature_vector.update(structural)
+        feature_vector.update(road)
+        feature_vector["semantic_analysis"] = semantic
+        return self.finalize(feature_vector, scenario_name)
 
+    def finalize(self, feature_vector: dict, scenario_name: str, semantic: bool = True) -> dict:
+        """
+        Add metadata and the hybrid accident probability once the
+        semantic analysis is in place. Without it (semantic=False), only
+        the structural risk can be given.
+        """
         # Metadata
-        feature_vector["scenario_name"] = scenario.name
+        feature_vector["scenario_name"] = scenario_name
 
         # Accident probability (hybrid)
-        feature_vector["accident_probability"] = (
-            self.risk_estimator.estimate(feature_vector)
-        )
+        with self.instrumentation.stage("risk"):
+            if semantic:
+                feature_vector["accident_probability"] = (
+                    self.risk_estimator.estimate(feature_vector)
+                )
+            else:
+                feature_vector["structural_risk"] = round(self.risk_estimator.structural_risk(feature_vector), 3)
+                feature_vector["accident_probability"] = None
 
         return feature_vector
@@ -0,0 +1,143 @@
+import hashlib
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from scenario_analysis.model.scenario import Scenario, Entity, Story, Act, Maneuver, Event, Condition
+from scenario_analysis.features.traversal import ScenarioCollector
+
+
+# Modulus of the MinHash permutations (a Mersenne prime). Shingle hashes
+# are 32 bit and a < 2**31, so a * x + b cannot overflow uint64.
+_PRIME = np.uint64((1 << 61) - 1)
+
+
+@dataclass(frozen=True)
+class ScenarioFingerprint:
+    """
+    Canonical structure of a scenario, as far as the LLM prompt sees it:
+    entities, storyboard element names and condition types. Parameter
+    values, positions and speeds are not part of it.
+
+    - digest: equal for scenarios whose prompts differ at most in the
+      scenario name
+    - shingles: every storyboard element as its path from the story down,
+      numbered if it repeats; input for near-duplicate detection
+    """
+    digest: str
+    shingles: frozenset[str]
+
+
+class FingerprintCollector(ScenarioCollector):
+    """
+    Builds the ScenarioFingerprint during a shared traversal.
+    """
+
+    def start(self, scenario: Scenario) -> None:
+        self._digest = hashlib.sha256()
+        self._path: list[str] = []
+        self._seen: Counter = Counter()
+
+    def _add(self, depth: int, token: str) -> None:
+        del self._path[depth:]
+        self._path.append(token)
+        self._digest.update(f"{depth}:{token}\n".encode("utf-8"))
+        self._seen["/".join(self._path)] += 1
+
+    def entity(self, entity: Entity) -> None:
+        self._add(0, f"entity:{entity.type}:{entity.name}")
+
+    def story(self, story: Story) -> None:
+        self._add(0, f"story:{story.name}")
+
+    def act(self, act: Act) -> None:
+        self._add(1, f"act:{act.name}")
+
+    def maneuver(self, maneuver: Maneuver) -> None:
+        self._add(2, f"maneuver:{maneuver.name}")
+
+    def event(self, event: Event) -> None:
+        self._add(3, f"event:{event.name}")
+
+    def condition(self, condition: Condition) -> None:
+        self._add(4, f"condition:{condition.type}")
+
+    def result(self) -> ScenarioFingerprint:
+        shingles = frozenset(f"{path}#{i}" for path, n in self._seen.items() for i in range(1, n + 1))
+        return ScenarioFingerprint(self._digest.hexdigest(), shingles)
+
+
+# ----------------------------------------------------------------------
+# Near duplicates
+# ----------------------------------------------------------------------
+
+class MinHasher:
+    """
+    MinHash signatures of shingle sets: the fraction of equal positions
+    of two signatures estimates the Jaccard similarity of the sets.
+
+    Shingles are hashed with blake2b, so signatures are stable across
+    processes and runs for the same num_perm and seed.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+    def signature(self, shingles: frozenset[str] | set[str]) -> np.ndarray:
+        if not shingles:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        x = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        return ((self.a[:, None] * x + self.b[:, None]) % _PRIME).min(axis=1)
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing over MinHash signatures.
+
+    Signatures are split into bands; two signatures become candidates if
+    any band matches exactly, and a candidate matches if the estimated
+    similarity reaches threshold. With 16 bands of 4 rows, pairs with a
+    similarity of 0.8 are found with probability > 0.999, so only the
+    candidates need a full comparison instead of every added signature.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(bands)]
+        self._signatures: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(len(self._buckets))]
+
+    def match(self, signature: np.ndarray) -> int | None:
+        """
+        Index of the first added signature similar to this one, or None.
+        """
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        for i in sorted(candidates):
+            if np.mean(self._signatures[i] == signature) >= self.threshold:
+                return i
+        return None
+
+    def add(self, signature: np.ndarray) -> int:
+        i = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(i)
+        return i
@@ -0,0 +1,280 @@
+from collections import Counter
+from dataclasses import dataclass, field
+
+from scenario_analysis.model.scenario import Scenario, Entity, Story, Act, Maneuver, Event
+from scenario_analysis.features.semantic_ai import PROMPT_INSTRUCTIONS, PromptCollector, estimate_tokens
+
+
+# Relevance of an event for the risk analysis, by the condition types of
+# its start trigger (the most relevant one counts). Over a token budget,
+# events are left out in ascending relevance. The parsers record the
+# ByEntityCondition / ByValueCondition wrapper as condition type: entity
+# conditions (distances, time to collision, speeds) are mostly what makes
+# a scenario critical, value conditions mostly timing and sequencing.
+CONDITION_RELEVANCE = {
+    "ByEntityCondition": 0.8,
+    "ByValueCondition": 0.2,
+    "CollisionCondition": 1.0,
+    "TimeToCollisionCondition": 1.0,
+    "TimeHeadwayCondition": 0.9,
+    "RelativeDistanceCondition": 0.8,
+    "DistanceCondition": 0.8,
+    "OffroadCondition": 0.7,
+    "RelativeSpeedCondition": 0.7,
+    "AccelerationCondition": 0.6,
+    "SpeedCondition": 0.6,
+    "EndOfRoadCondition": 0.6,
+    "ReachPositionCondition": 0.5,
+    "StandStillCondition": 0.5,
+    "TraveledDistanceCondition": 0.3,
+    "UserDefinedValueCondition": 0.2,
+    "SimulationTimeCondition": 0.1,
+    "StoryboardElementStateCondition": 0.1,
+    "ParameterCondition": 0.1,
+    "TimeOfDayCondition": 0.1,
+}
+# Unknown condition types and events without start trigger
+DEFAULT_RELEVANCE = 0.3
+
+# Over budget, name lists longer than this keep the first two and the last
+_SHORT_NAMES = 3
+
+
+def _names(names: list[str], short: bool) -> str:
+    if short and len(names) > _SHORT_NAMES:
+        return f"{names[0]}, {names[1]}, ..., {names[-1]}"
+    return ", ".join(names)
+
+
+def _trigger(types: tuple[str, ...]) -> str:
+    return ", ".join(t if n == 1 else f"{n}x {t}" for t, n in Counter(types).items())
+
+
+@dataclass(slots=True)
+class _EventGroup:
+    # Events of one maneuver with the same condition types
+    types: tuple[str, ...]
+    position: int
+    names: list[str] = field(default_factory=list)
+    omitted: bool = False
+
+    @property
+    def relevance(self) -> float:
+        return max((CONDITION_RELEVANCE.get(t, DEFAULT_RELEVANCE) for t in self.types), default=DEFAULT_RELEVANCE)
+
+    def line(self, short: bool, named: bool = True) -> str:
+        trigger = f"triggered by {_trigger(self.types)}" if self.types else "without start trigger"
+        if not named:
+            if len(self.names) == 1:
+                return f"      1 event, {trigger}"
+            return f"      {len(self.names)} events, each {trigger}"
+        if len(self.names) == 1:
+            return f"      Event: {self.names[0]} ({trigger})" if self.types else f"      Event: {self.names[0]}"
+        return f"      {len(self.names)} events ({_names(self.names, short)}), each {trigger}"
+
+
+@dataclass(slots=True)
+class _ManeuverBlock:
+    name: str
+    groups: dict[tuple[str, ...], _EventGroup] = field(default_factory=dict)
+
+    def shape(self) -> tuple:
+        # Maneuvers of the same shape differ only in names
+        return tuple((types, len(group.names)) for types, group in self.groups.items())
+
+
+@dataclass(slots=True)
+class _ActBlock:
+    header: str
+    maneuvers: list[_ManeuverBlock] = field(default_factory=list)
+
+    def units(self, collapse: bool) -> list[list[_ManeuverBlock]]:
+        """
+        Maneuvers rendered together: one each, or with collapse all
+        maneuvers of the same shape (in order of first appearance).
+        Omission flags are the same in all maneuvers of a unit.
+        """
+        if not collapse:
+            return [[maneuver] for maneuver in self.maneuvers]
+        units: dict[tuple, list[_ManeuverBlock]] = {}
+        for maneuver in self.maneuvers:
+            units.setdefault(maneuver.shape(), []).append(maneuver)
+        return list(units.values())
+
+    def lines(self, short: bool, collapse: bool) -> list[str]:
+        lines = [self.header]
+        omitted_events = omitted_maneuvers = 0
+
+        for unit in self.units(collapse):
+            omitted = sum(len(group.names) for group in unit[0].groups.values() if group.omitted)
+            if omitted:
+                omitted_events += omitted * len(unit)
+                omitted_maneuvers += len(unit)
+            lines.extend(_unit_lines(unit, short))
+
+        if omitted_events:
+            lines.append(_omitted_note(omitted_events, omitted_maneuvers))
+        return lines
+
+
+def _unit_lines(unit: list[_ManeuverBlock], short: bool) -> list[str]:
+    groups = [group for group in unit[0].groups.values() if not group.omitted]
+    if not groups and unit[0].groups:
+        # Nothing left to show of these maneuvers
+        return []
+
+    named = len(unit) == 1
+    if named:
+        lines = [f"    Maneuver: {unit[0].name}"]
+    else:
+        lines = [f"    {len(unit)} maneuvers ({_names([m.name for m in unit], short)}), each with:"]
+    lines.extend(group.line(short, named) for group in groups)
+    return lines
+
+
+def _omitted_note(events: int, maneuvers: int) -> str:
+    # One note per act, so leaving events out saves tokens
+    return f"    ({events} less risk-relevant events of {maneuvers} maneuvers omitted)"
+
+
+class CompactPromptCollector(PromptCollector):
+    """
+    Builds a compact scenario description for the LLM.
+
+    The full prompt has one line per entity, storyboard element and
+    condition, so it grows linearly with the scenario. Here entities are
+    listed per type, and the events of a maneuver are grouped by the
+    condition types of their start trigger, e.g. "12 events (...), each
+    triggered by ByValueCondition"; conditions are given on the event
+    line. The instruction block is the same as in the full prompt.
+
+    With a token_budget (estimated tokens of the whole prompt, see
+    estimate_tokens), a prompt over budget is shortened step by step
+    until it fits: long name lists are abbreviated, maneuvers of an act
+    that differ only in names are merged into one entry, and finally
+    event groups are left out, least risk-relevant first (see
+    CONDITION_RELEVANCE), with a note per act of how many. Maneuvers
+    without remaining events are not listed; story and act lines are
+    always kept, so a prompt can still exceed a very small budget.
+    """
+
+    def __init__(self, token_budget: int | None = None, instructions: str = PROMPT_INSTRUCTIONS):
+        super().__init__(instructions)
+        self.token_budget = token_budget
+
+    def start(self, scenario: Scenario) -> None:
+        super().start(scenario)
+        self._entities: dict[str, list[str]] = {}
+        # Story lines and acts, in document order
+        self._blocks: list[str | _ActBlock] = []
+        self._maneuver: _ManeuverBlock | None = None
+        self._num_groups = 0
+
+    def entity(self, entity: Entity) -> None:
+        super().entity(entity)
+        self._entities.setdefault(entity.type, []).append(entity.name)
+
+    def story(self, story: Story) -> None:
+        super().story(story)
+        self._blocks.append(f"Story: {story.name}")
+
+    def act(self, act: Act) -> None:
+        super().act(act)
+        self._blocks.append(_ActBlock(f"  Act: {act.name}"))
+
+    def maneuver(self, maneuver: Maneuver) -> None:
+        super().maneuver(maneuver)
+        self._maneuver = _ManeuverBlock(maneuver.name)
+        self._blocks[-1].maneuvers.append(self._maneuver)
+
+    def event(self, event: Event) -> None:
+        super().event(event)
+        types = tuple(c.type for c in event.trigger.conditions) if event.trigger else ()
+        group = self._maneuver.groups.get(types)
+        if group is None:
+            group = self._maneuver.groups[types] = _EventGroup(types, self._num_groups)
+            self._num_groups += 1
+        group.names.append(event.name)
+
+    def finish(self) -> None:
+        super().finish()
+        self.full_tokens = estimate_tokens(super().result())
+        self.omitted_events = 0
+
+        lines = self._render(short=False, collapse=False)
+        budget = self.token_budget
+        if budget is not None and self._size(lines) > budget:
+            lines = self._render(short=True, collapse=False)
+        if budget is not None and self._size(lines) > budget:
+            lines = self._render(short=True, collapse=True)
+        if budget is not None and self._size(lines) > budget:
+            self._omit_events(self._size(lines) - budget)
+            lines = self._render(short=True, collapse=True)
+
+        self.prompt = "\n".join(lines)
+        self.tokens = estimate_tokens(self.prompt)
+
+    def result(self) -> str:
+        return self.prompt
+
+    def stats(self) -> dict:
+        return {"tokens": self.tokens, "full_tokens": self.full_tokens, "omitted_events": self.omitted_events}
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _size(lines: list[str]) -> int:
+        # Token estimates of lines add up (see estimate_tokens)
+        return sum(map(estimate_tokens, lines))
+
+    def _render(self, short: bool, collapse: bool) -> list[str]:
+        # The first two lines of the full prompt: scenario name, entity count
+        lines = self.lines[:2]
+        for entity_type, names in self._entities.items():
+            lines.append(f"- Entities ({entity_type}): {_names(names, short)}")
+
+        for block in self._blocks:
+            if isinstance(block, str):
+                lines.append(block)
+                continue
+            lines.extend(block.lines(short, collapse))
+
+        lines.append(self.instructions)
+        return lines
+
+    def _omit_events(self, excess: int) -> None:
+        """
+        Leave out event groups of the collapsed rendering, least relevant
+        and latest first, until about excess tokens are saved.
+        """
+        candidates = [
+            (group.relevance, -group.position, block, unit, types)
+            for block in self._blocks if isinstance(block, _ActBlock)
+            for unit in block.units(collapse=True)
+            for types, group in unit[0].groups.items()
+        ]
+        candidates.sort(key=lambda c: c[:2])
+
+        # Omitted (events, maneuvers) per act, for the cost of its note
+        omitted: dict[int, tuple[int, int]] = {}
+        for _, _, block, unit, types in candidates:
+            if excess <= 0:
+                break
+            events, maneuvers = omitted.get(id(block), (0, 0))
+            before = self._size(_unit_lines(unit, short=True))
+            if events:
+                before += estimate_tokens(_omitted_note(events, maneuvers))
+
+            if not any(group.omitted for group in unit[0].groups.values()):
+                maneuvers += len(unit)
+            for maneuver in unit:
+                group = maneuver.groups[types]
+                group.omitted = True
+                events += len(group.names)
+                self.omitted_events += len(group.names)
+            omitted[id(block)] = events, maneuvers
+
+            after = self._size(_unit_lines(unit, short=True)) + estimate_tokens(_omitted_note(events, maneuvers))
+            excess -= before - after
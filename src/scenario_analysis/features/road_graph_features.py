@@ -1,65 +1,136 @@
-import networkx as nx
-from typing import Dict, Any
+import numpy as np
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List
+
+from scenario_analysis.analysis.road_network import RoadNetwork
+from scenario_analysis.model.scenario import InitPosition
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+# Hotspot type per HotspotTable.kind code
+HOTSPOT_TYPES = ("Complex Intersection", "Merge / Bottleneck", "Multi-lane Junction")
+COMPLEX_INTERSECTION, MERGE, MULTI_LANE = range(3)
+
+
+class HotspotTable:
+    """
+    Risk hotspots as columns, one row per hotspot road.
+
+    Descriptions are not stored; to_dicts() builds them when the hotspots
+    are serialized into a feature vector.
+    """
+
+    def __init__(
+        self,
+        road_ids: np.ndarray,
+        kind: np.ndarray,
+        severity: np.ndarray,
+        in_degree: np.ndarray,
+        out_degree: np.ndarray,
+        num_lanes: np.ndarray,
+    ):
+        self.road_ids = road_ids
+        self.kind = kind
+        self.severity = severity
+        self.in_degree = in_degree
+        self.out_degree = out_degree
+        self.num_lanes = num_lanes
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def types(self) -> List[str]:
+        return [HOTSPOT_TYPES[k] for k in self.kind.tolist()]
+
+    def total_severity(self) -> float:
+        # Summed left to right like the dict form, so results are identical
+        return sum(self.severity.tolist())
+
+    def count_at_least(self, severity: float) -> int:
+        return int(np.count_nonzero(self.severity >= severity))
+
+    def to_dicts(self) -> List[dict]:
+        rows = []
+        for road_id, kind, severity, in_deg, out_deg, lanes in zip(
+            self.road_ids.tolist(), self.kind.tolist(), self.severity.tolist(),
+            self.in_degree.tolist(), self.out_degree.tolist(), self.num_lanes.tolist(),
+        ):
+            if kind == COMPLEX_INTERSECTION:
+                description = f"Highly connected junction with {in_deg + out_deg} connections."
+            elif kind == MERGE:
+                description = f"Bottleneck detected. {in_deg} incoming links merge into {out_deg} outgoing."
+            else:
+                description = f"Large multi-lane structure ({lanes} lanes) intersecting."
+            rows.append({
+                "road_id": road_id,
+                "type": HOTSPOT_TYPES[kind],
+                "severity": severity,
+                "description": description,
+            })
+        return rows
+
+
+def total_hotspot_severity(hotspots: HotspotTable | Iterable[dict]) -> float:
+    if isinstance(hotspots, HotspotTable):
+        return hotspots.total_severity()
+    return sum(spot.get("severity", 0.0) for spot in hotspots)
 
 
 class RoadGraphFeatureExtractor:
     """
     Computes numerical features and detects risk hotspots from a road graph.
+
+    Works on the array-backed RoadNetwork; an nx.DiGraph is converted
+    first. Degrees are computed once in O(edges) and the hotspot rules are
+    evaluated as boolean masks.
+
+    Given a set of roads (see local_roads), the features describe only
+    those roads: counts, lanes and hotspots are restricted to them, while
+    degrees still count all links of the full network, so a local hotspot
+    is exactly a hotspot of the full network that lies in the set.
     """
 
-    def extract(self, graph: nx.DiGraph) -> Dict[str, Any]:
-        num_roads = graph.number_of_nodes()
-        num_connections = graph.number_of_edges()
+    def extract(self, graph: "RoadNetwork | nx.DiGraph", roads: np.ndarray | None = None) -> Dict[str, Any]:
+        features = self.extract_bulk(graph, roads)
+        features["risk_hotspots"] = features["risk_hotspots"].to_dicts()
+        return features
 
-        # Intersection heuristic:
-        # nodes with more than one incoming or outgoing edge
-        num_intersections = sum(
-            1 for n in graph.nodes
-            if graph.in_degree(n) + graph.out_degree(n) > 2
-        )
-        
-        max_node_degree = 0
-        if num_roads > 0:
-            max_node_degree = max(graph.in_degree(n) + graph.out_degree(n) for n in graph.nodes)
-            
-        num_lanes = 0
-        for n in graph.nodes:
-            num_lanes += graph.nodes[n].get("num_lanes", 0)
-
-        # Hotspot Detection 
-        risk_hotspots = []
-        for n in graph.nodes:
-            in_deg = graph.in_degree(n)
-            out_deg = graph.out_degree(n)
-            total_deg = in_deg + out_deg
-            
-            node_lanes = graph.nodes[n].get("num_lanes", 0)
-            
-            # Rule 1: Complex Intersection (Very high degree)
-            if total_deg >= 4:
-                risk_hotspots.append({
-                    "road_id": n,
-                    "type": "Complex Intersection",
-                    "severity": min(1.0, total_deg / 8.0),
-                    "description": f"Highly connected junction with {total_deg} connections."
-                })
-            # Rule 2: Merge / Bottleneck (Multiple roads flowing into one, or lane reduction)
-            # In a directed graph, if in_deg > out_deg and out_deg > 0
-            elif in_deg > out_deg and out_deg > 0:
-                risk_hotspots.append({
-                    "road_id": n,
-                    "type": "Merge / Bottleneck",
-                    "severity": 0.7,
-                    "description": f"Bottleneck detected. {in_deg} incoming links merge into {out_deg} outgoing."
-                })
-            # Rule 3: High-capacity junction
-            elif node_lanes >= 4 and total_deg >= 3:
-                 risk_hotspots.append({
-                    "road_id": n,
-                    "type": "Multi-lane Junction",
-                    "severity": 0.8,
-                    "description": f"Large multi-lane structure ({node_lanes} lanes) intersecting."
-                })
+    def extract_bulk(self, graph: "RoadNetwork | nx.DiGraph", roads: np.ndarray | None = None) -> Dict[str, Any]:
+        """
+        Same features as extract(), with risk_hotspots as a HotspotTable.
+        """
+        network = graph if isinstance(graph, RoadNetwork) else RoadNetwork.from_networkx(graph)
+
+        if roads is None:
+            num_roads = network.num_roads
+            num_connections = network.num_edges
+            in_deg = network.in_degree()
+            out_deg = network.out_degree()
+            road_ids, node_lanes, junction = network.road_ids, network.num_lanes, network.junction
+        else:
+            # Edges between the selected roads only; the work is
+            # proportional to the selection, not to the network
+            num_roads = len(roads)
+            _, targets = network.successors_of(roads)
+            pos = np.minimum(np.searchsorted(roads, targets), max(num_roads - 1, 0))
+            num_connections = int(np.count_nonzero(roads[pos] == targets)) if num_roads else 0
+            in_deg = network.in_degree()[roads]
+            out_deg = network.indptr[roads + 1] - network.indptr[roads]
+            road_ids, node_lanes, junction = network.road_ids[roads], network.num_lanes[roads], network.junction[roads]
+
+        total_deg = in_deg + out_deg
+
+        # Intersections: the junctions of the network. Without junction
+        # information, fall back to the heuristic of nodes with more than
+        # one incoming or outgoing edge.
+        if network.num_junctions:
+            num_intersections = network.num_junctions if roads is None else len(np.unique(junction[junction >= 0]))
+        else:
+            num_intersections = int(np.count_nonzero(total_deg > 2))
+
+        max_node_degree = int(total_deg.max()) if num_roads > 0 else 0
+        num_lanes = int(node_lanes.sum())
 
         return {
             "num_roads": num_roads,
@@ -67,5 +138,73 @@ class RoadGraphFeatureExtractor:
             "num_intersections": num_intersections,
             "max_node_degree": max_node_degree,
             "num_lanes": num_lanes,
-            "risk_hotspots": risk_hotspots
+            "risk_hotspots": self._hotspots(road_ids, node_lanes, in_deg, out_deg),
         }
+
+    def hotspots(self, graph: "RoadNetwork | nx.DiGraph") -> HotspotTable:
+        network = graph if isinstance(graph, RoadNetwork) else RoadNetwork.from_networkx(graph)
+        return self._hotspots(network.road_ids, network.num_lanes, network.in_degree(), network.out_degree())
+
+    @staticmethod
+    def local_roads(network: RoadNetwork, positions: Iterable[InitPosition], radius: float) -> np.ndarray | None:
+        """
+        Sorted indices of the roads within radius (meters) of the entity
+        start positions. Roads named by lane / road positions are always
+        included. None if no position could be located on the network or
+        no road lies within radius.
+        """
+        points = []
+        roads = []
+        offsets = []
+        for position in positions:
+            if position.kind == "world":
+                points.append((position.x, position.y))
+                continue
+            road = network.road_index(position.road_id)
+            if road is not None:
+                roads.append(road)
+                offsets.append(position.s)
+
+        if not points and not roads:
+            return None
+
+        seeds = np.asarray(roads, dtype=np.int64)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(seeds) and network.geometry is not None:
+            x, y, valid = network.geometry.points_at(seeds, np.asarray(offsets, dtype=np.float64))
+            points = np.concatenate([points, np.column_stack([x[valid], y[valid]])])
+
+        near = network.roads_near(points, radius)
+        roads = np.union1d(near, seeds.astype(near.dtype))
+        return roads if len(roads) else None
+
+    @staticmethod
+    def _hotspots(road_ids: np.ndarray, node_lanes: np.ndarray, in_deg: np.ndarray, out_deg: np.ndarray) -> HotspotTable:
+        total_deg = in_deg + out_deg
+
+        # Rule 1: Complex Intersection (Very high degree)
+        complex_intersection = total_deg >= 4
+        # Rule 2: Merge / Bottleneck (Multiple roads flowing into one, or lane reduction)
+        # In a directed graph, if in_deg > out_deg and out_deg > 0
+        merge = ~complex_intersection & (in_deg > out_deg) & (out_deg > 0)
+        # Rule 3: High-capacity junction
+        multi_lane = ~complex_intersection & ~merge & (node_lanes >= 4) & (total_deg >= 3)
+
+        rows = np.flatnonzero(complex_intersection | merge | multi_lane)
+        kind = np.select(
+            [complex_intersection[rows], merge[rows]], [COMPLEX_INTERSECTION, MERGE], MULTI_LANE
+        ).astype(np.int8)
+        severity = np.select(
+            [kind == COMPLEX_INTERSECTION, kind == MERGE],
+            [np.minimum(1.0, total_deg[rows] / 8.0), 0.7],
+            0.8,
+        )
+
+        return HotspotTable(
+            road_ids=road_ids[rows],
+            kind=kind,
+            severity=severity,
+            in_degree=in_deg[rows],
+            out_degree=out_deg[rows],
+            num_lanes=node_lanes[rows],
+        )
@@ -1,34 +1,16 @@
-from scenario_analysis.model.scenario import Scenario
-from scenario_analysis.llm.openai_client import OpenAIClient
+import hashlib
+import re
 
+from scenario_analysis.model.scenario import Scenario, Entity, Story, Act, Maneuver, Event, Condition
+from scenario_analysis.features.traversal import ScenarioCollector, traverse
+from scenario_analysis.llm.openai_client import (
+    OpenAIClient, RESULT_KEYS, RESULT_SCHEMA, json_schema_format, parse_json_items_safely
+)
+from scenario_analysis.llm.response_cache import ResponseCacheMiss
 
-class AISemanticFeatureExtractor:
-    def __init__(self, llm: OpenAIClient):
-        self.llm = llm
 
-    def _build_prompt(self, scenario: Scenario) -> str:
-        lines = []
-
-        lines.append(f"Scenario name: {scenario.name}")
-        lines.append(f"Number of entities: {len(scenario.entities)}")
-
-        for e in scenario.entities:
-            lines.append(f"- Entity: {e.name} ({e.type})")
-
-        for story in scenario.stories:
-            lines.append(f"Story: {story.name}")
-            for act in story.acts:
-                lines.append(f"  Act: {act.name}")
-                for man in act.maneuvers:
-                    lines.append(f"    Maneuver: {man.name}")
-                    for ev in man.events:
-                        lines.append(f"      Event: {ev.name}")
-                        if ev.trigger:
-                            for c in ev.trigger.conditions:
-                                lines.append(f"        Condition: {c.type}")
-
-        lines.append(
-                        """
+# Instruction block appended to every scenario description
+PROMPT_INSTRUCTIONS = """
             Based on the scenario structure above:
 
             Please analyze the scenario step-by-step. 
@@ -45,26 +27,470 @@ class AISemanticFeatureExtractor:
             - riskEstimate
             - riskLevel
             """
-        )
 
-        return "\n".join(lines)
+# Instruction block of a packed request, after all scenario descriptions
+PACKED_INSTRUCTIONS = """
+            Based on the {count} scenario structures above:
+
+            Analyze each scenario independently and step-by-step. 
+            First, identify the actors. Second, analyze their geometric and kinematic conflicts. 
+            Third, deduce the potential severity. Finally, provide the riskEstimate based solely on your reasoning.
+            
+            Return ONLY a valid JSON array with one object per scenario, in the order given.
+            Do not include explanations or markdown outside the JSON.
+            Every object must have the key scenario (the scenario name exactly as given)
+            and exactly the following keys:
+            - reasoning_path (a string containing your step-by-step analysis)
+            - scenarioType
+            - interactionDescription
+            - scenarioComplexity
+            - potentialRiskFactors
+            - riskEstimate
+            - riskLevel
+            """
+
+# Instruction blocks of the "fast" response mode (see OpenAIClient): no
+# written-out reasoning, and the keys in the order of RESULT_KEYS, risk
+# first, so a stream can be cut off once the risk is in
+FAST_PROMPT_INSTRUCTIONS = """
+            Based on the scenario structure above:
+
+            Assess the actors, their geometric and kinematic conflicts and the potential severity.
+
+            Return ONLY valid JSON with exactly the following keys, in this order:
+            - riskEstimate (a number between 0 and 1)
+            - riskLevel (low, medium or high)
+            - scenarioComplexity
+            - scenarioType
+            - potentialRiskFactors
+            - interactionDescription
+            """
+
+FAST_PACKED_INSTRUCTIONS = """
+            Based on the {count} scenario structures above:
+
+            Assess each scenario independently: the actors, their geometric and kinematic conflicts
+            and the potential severity.
+
+            Return ONLY a JSON object with the key results, an array with one object per scenario,
+            in the order given. Every object must have exactly the following keys, in this order:
+            - scenario (the scenario name exactly as given)
+            - riskEstimate (a number between 0 and 1)
+            - riskLevel (low, medium or high)
+            - scenarioComplexity
+            - scenarioType
+            - potentialRiskFactors
+            - interactionDescription
+            """
+
+
+def packed_format(keys) -> dict:
+    """
+    Structured output format of a fast packed request whose items have
+    the given result keys (see RESULT_SCHEMA).
+    """
+    item = {
+        "type": "object",
+        "properties": {
+            "scenario": {"type": "string"},
+            **{key: RESULT_SCHEMA["properties"][key] for key in keys},
+        },
+        "required": ["scenario", *keys],
+        "additionalProperties": False,
+    }
+    schema = {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": item}},
+        "required": ["results"],
+        "additionalProperties": False,
+    }
+    return json_schema_format("scenario_analysis_pack", schema)
+
+
+# Local token estimate: word pieces (split at case changes, so identifiers
+# like TimeToCollisionCondition count per part), groups of up to three
+# digits, indentation runs and single symbols each count as one token,
+# roughly as a BPE tokenizer splits English text and identifiers. Counts
+# of lines add up to the count of the joined text.
+_TOKEN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d{1,3}|\n?[ \t]{2,}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN.findall(text))
+
+
+def scenario_description(prompt: str) -> str:
+    """
+    The scenario description of a single-scenario prompt, without the
+    instruction block.
+    """
+    for instructions in (PROMPT_INSTRUCTIONS, FAST_PROMPT_INSTRUCTIONS):
+        if prompt.endswith("\n" + instructions):
+            return prompt.removesuffix("\n" + instructions)
+    return prompt
+
+
+def plan_packs(items: list[tuple[str, str]], token_budget: int, max_items: int) -> list[list[int]]:
+    """
+    Split (scenario name, prompt) items into packs, in order: indices of
+    the items per packed request. A pack holds at most max_items
+    scenarios with distinct names whose descriptions and instructions
+    fit into token_budget (estimated); a scenario too large for the
+    budget gets a pack of its own.
+    """
+    overhead = estimate_tokens(PACKED_INSTRUCTIONS)
+    packs: list[list[int]] = []
+    pack: list[int] = []
+    names: set[str] = set()
+    tokens = overhead
+
+    for i, (name, prompt) in enumerate(items):
+        size = estimate_tokens(scenario_description(prompt))
+        if pack and (len(pack) >= max_items or name in names or tokens + size > token_budget):
+            packs.append(pack)
+            pack, names, tokens = [], set(), overhead
+        pack.append(i)
+        names.add(name)
+        tokens += size
+
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def packed_prompt(items: list[tuple[str, str]], instructions: str = PACKED_INSTRUCTIONS) -> str:
+    """
+    One request for several (scenario name, prompt) items: the scenario
+    descriptions followed by a single instruction block.
+    """
+    parts = [
+        f"### Scenario {i} of {len(items)}\n{scenario_description(prompt)}"
+        for i, (_, prompt) in enumerate(items, start=1)
+    ]
+    parts.append(instructions.format(count=len(items)))
+    return "\n\n".join(parts)
+
+
+def _valid_answer(answer: dict) -> bool:
+    # Items without a usable risk estimate are asked again
+    estimate = answer.get("riskEstimate")
+    if isinstance(estimate, bool):
+        return False
+    try:
+        float(estimate)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class PromptCollector(ScenarioCollector):
+    """
+    Builds the scenario description sent to the LLM, followed by the
+    instruction block.
+    """
+
+    def __init__(self, instructions: str = PROMPT_INSTRUCTIONS):
+        self.instructions = instructions
+
+    def start(self, scenario: Scenario) -> None:
+        self.lines = [
+            f"Scenario name: {scenario.name}",
+            f"Number of entities: {len(scenario.entities)}",
+        ]
+
+    def entity(self, entity: Entity) -> None:
+        self.lines.append(f"- Entity: {entity.name} ({entity.type})")
+
+    def story(self, story: Story) -> None:
+        self.lines.append(f"Story: {story.name}")
+
+    def act(self, act: Act) -> None:
+        self.lines.append(f"  Act: {act.name}")
+
+    def maneuver(self, maneuver: Maneuver) -> None:
+        self.lines.append(f"    Maneuver: {maneuver.name}")
+
+    def event(self, event: Event) -> None:
+        self.lines.append(f"      Event: {event.name}")
+
+    def condition(self, condition: Condition) -> None:
+        self.lines.append(f"        Condition: {condition.type}")
+
+    def finish(self) -> None:
+        self.lines.append(self.instructions)
+
+    def result(self) -> str:
+        return "\n".join(self.lines)
+
+    def stats(self) -> dict:
+        """
+        Estimated size of the prompt: tokens sent, tokens of the full
+        (uncompacted) prompt and events left out for a token budget.
+        """
+        tokens = estimate_tokens(self.result())
+        return {"tokens": tokens, "full_tokens": tokens, "omitted_events": 0}
+
+
+class AISemanticFeatureExtractor:
+    """
+    Semantic features from an LLM analysis of the scenario structure.
+
+    With compact=True, repeated structure is summarized in the prompt
+    (see CompactPromptCollector); token_budget (estimated prompt tokens,
+    implies compact) additionally leaves out the least risk-relevant
+    events of large scenarios.
+
+    The instructions follow the response mode of the llm: in "fast" mode
+    (see OpenAIClient) the LLM is asked for the result keys only, in
+    "audit" mode, and for clients without a response mode, for its
+    step-by-step reasoning first. The reasoning_path is kept in the
+    result only in audit mode.
+    """
+
+    def __init__(self, llm: OpenAIClient, compact: bool = False, token_budget: int | None = None):
+        self.llm = llm
+        self.compact = compact or token_budget is not None
+        self.token_budget = token_budget
+        # Requests sent by analyze_packed()
+        self.packed_requests = 0
+
+    @property
+    def fast(self) -> bool:
+        return getattr(self.llm, "response_mode", None) == "fast"
+
+    @property
+    def instructions(self) -> str:
+        return FAST_PROMPT_INSTRUCTIONS if self.fast else PROMPT_INSTRUCTIONS
+
+    def prompt_collector(self) -> "PromptCollector":
+        """
+        Collector that builds the prompt during a shared traversal (see
+        BasicStatsExtractor.extract); its result() is the prompt.
+        """
+        if self.compact:
+            from scenario_analysis.features.prompt_compaction import CompactPromptCollector
+            return CompactPromptCollector(self.token_budget, self.instructions)
+        return PromptCollector(self.instructions)
+
+    def build_prompt(self, scenario: Scenario) -> str:
+        """
+        The prompt for scenario on its own traversal (see prompt_collector).
+        """
+        collector = self.prompt_collector()
+        traverse(scenario, [collector])
+        return collector.result()
 
     def extract(self, scenario: Scenario) -> dict:
-        prompt = self._build_prompt(scenario)
+        return self.analyze_prompt(self.build_prompt(scenario))[0]
+
+    def analyze_prompt(self, prompt: str) -> tuple[dict, bool]:
+        """
+        Send a prompt built by build_prompt. Returns the cleaned result and
+        whether it came from the LLM (False for fallback data).
+
+        A ResponseCacheMiss (cache-only mode) is raised, not replaced by
+        fallback data: offline re-scoring must not produce made-up risks.
+        """
         try:
             result = self.llm.analyze_scenario(prompt)
-            # Remove reasoning path from final output to keep JSON clean for the thesis
-            result.pop("reasoning_path", None)
-            return result
+            return self._clean_result(result), True
+        except ResponseCacheMiss:
+            raise
+        except Exception as e:
+            return self._fallback_result(e), False
+
+    def analyze_packed(self, items: list[tuple[str, str]]) -> list[tuple[dict, bool]]:
+        """
+        Analyze several (scenario name, prompt) items, e.g. a pack from
+        plan_packs(), with one request: the answer is a JSON array, which
+        is split back into one result per item by scenario name. Items
+        without a valid answer are asked again in a smaller request
+        (halving the pack if nothing in the answer was usable), down to
+        single-scenario requests. Requires an OpenAIClient-like llm with
+        complete(); names must be distinct.
+
+        Results are in item order, as returned by analyze_prompt(); None
+        for items without a cached response in cache-only mode. Items are
+        cached under their single-scenario prompt, so packed and unpacked
+        runs share the response cache.
+        """
+        if len({name for name, _ in items}) != len(items):
+            raise ValueError("Scenario names in a packed request must be distinct")
+
+        results: list[tuple[dict, bool] | None] = [None] * len(items)
+        pending = []
+        for i, (_, prompt) in enumerate(items):
+            try:
+                cached = self.llm.cached_result(prompt)
+            except ResponseCacheMiss:
+                continue
+            except Exception as e:
+                results[i] = self._fallback_result(e), False
+                continue
+            if cached is not None:
+                results[i] = self._clean_result(cached), True
+            else:
+                pending.append(i)
+
+        self._analyze_pack(items, pending, results)
+        return results
+
+    def _analyze_pack(self, items: list[tuple[str, str]], indices: list[int], results: list) -> None:
+        if not indices:
+            return
+        self.packed_requests += 1
+        if len(indices) == 1:
+            results[indices[0]] = self.analyze_prompt(items[indices[0]][1])
+            return
+
+        pack = [items[i] for i in indices]
+        try:
+            if self.fast:
+                keys = getattr(self.llm, "stop_after", None) or RESULT_KEYS
+                text = self.llm.complete(
+                    packed_prompt(pack, FAST_PACKED_INSTRUCTIONS), response_format=packed_format(keys)
+                )
+            else:
+                text = self.llm.complete(packed_prompt(pack))
         except Exception as e:
-            import logging
-            logging.warning(f"OpenAI API call failed: {e}. Using fallback mock data.")
-            # Fallback mock data with reasoning path (which gets popped anyway, or we just don't include it here since it's a fallback)
-            return {
-                "scenarioType": "Mocked Scenario (API Quota Exceeded)",
-                "interactionDescription": "API unavailable to analyze interactions.",
-                "scenarioComplexity": 3,
-                "potentialRiskFactors": ["Unable to determine due to API error"],
-                "riskEstimate": 0.5,
-                "riskLevel": "medium"
-            }
+            # Smaller requests would fail the same way (quota, network)
+            for i in indices:
+                results[i] = self._fallback_result(e), False
+            return
+
+        answers = {}
+        for answer in parse_json_items_safely(text):
+            name = answer.pop("scenario", None)
+            if isinstance(name, str) and name not in answers and _valid_answer(answer):
+                answers[name] = answer
+
+        missing = []
+        for i in indices:
+            name, prompt = items[i]
+            answer = answers.get(name)
+            if answer is None:
+                missing.append(i)
+                continue
+            self.llm.remember(prompt, answer)
+            results[i] = self._clean_result(answer), True
+
+        if len(missing) == len(indices):
+            half = len(indices) // 2
+            self._analyze_pack(items, indices[:half], results)
+            self._analyze_pack(items, indices[half:], results)
+        else:
+            self._analyze_pack(items, missing, results)
+
+    def template_fingerprint(self) -> str:
+        """
+        Hash of everything besides the scenario that shapes the LLM answer:
+        instructions, model, temperature and system message.
+        """
+        parts = [
+            self.instructions,
+            str(getattr(self.llm, "model", "")),
+            str(getattr(self.llm, "temperature", "")),
+            str(getattr(self.llm, "system_message", "")),
+        ]
+        if self.compact:
+            # Only then, so existing manifests stay valid
+            parts.append(f"compact|{self.token_budget}")
+        stop_after = getattr(self.llm, "stop_after", None)
+        if stop_after:
+            parts.append(f"stop_after|{','.join(stop_after)}")
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    async def aextract(self, scenario: Scenario) -> dict:
+        """
+        Async variant of extract(); requires an async client such as
+        AsyncOpenAIClient.
+        """
+        return await self.aanalyze_prompt(self.build_prompt(scenario))
+
+    async def aanalyze_prompt(self, prompt: str) -> dict:
+        try:
+            result = await self.llm.analyze_scenario(prompt)
+            return self._clean_result(result)
+        except ResponseCacheMiss:
+            raise
+        except Exception as e:
+            return self._fallback_result(e)
+
+    def analyze_batch(self, prompts: list[str], batch_client=None,
+                      poll_interval: float = 30.0) -> tuple[list[tuple[dict, bool] | None], str | None]:
+        """
+        Analyze prompts built by build_prompt through one Batch API job
+        (see OpenAIBatchClient; by default one sending the requests of this
+        extractor's OpenAIClient). Prompts answered by the response cache
+        are not submitted, identical prompts only once, and the answers
+        are stored in the cache.
+
+        Results are in prompt order, as returned by analyze_prompt(); None
+        for prompts without a cached response in cache-only mode. Also
+        returns the batch id, None if nothing was submitted.
+        """
+        results: list[tuple[dict, bool] | None] = [None] * len(prompts)
+        pending: dict[str, list[int]] = {}
+        for i, prompt in enumerate(prompts):
+            try:
+                cached = self.llm.cached_result(prompt)
+            except ResponseCacheMiss:
+                continue
+            except Exception as e:
+                results[i] = self._fallback_result(e), False
+                continue
+            if cached is not None:
+                results[i] = self._clean_result(cached), True
+            else:
+                pending.setdefault(prompt, []).append(i)
+
+        if not pending:
+            return results, None
+
+        custom_ids = {str(n): prompt for n, prompt in enumerate(pending)}
+        batch_id = None
+        try:
+            if batch_client is None:
+                from scenario_analysis.llm.batch_api import OpenAIBatchClient
+                batch_client = OpenAIBatchClient.for_client(self.llm)
+            batch_id = batch_client.submit(custom_ids)
+            batch_client.wait(batch_id, poll_interval=poll_interval)
+            answers = batch_client.collect(batch_id)
+        except Exception as e:
+            for indices in pending.values():
+                for i in indices:
+                    results[i] = self._fallback_result(e), False
+            return results, batch_id
+
+        missing = RuntimeError("no usable result in batch output")
+        for custom_id, prompt in custom_ids.items():
+            answer = answers.get(custom_id)
+            valid = answer is not None and _valid_answer(answer)
+            if valid:
+                self.llm.remember(prompt, answer)
+            for i in pending[prompt]:
+                if valid:
+                    results[i] = self._clean_result(dict(answer)), True
+                else:
+                    results[i] = self._fallback_result(missing), False
+        return results, batch_id
+
+    def _clean_result(self, result: dict) -> dict:
+        # Remove reasoning path from final output to keep JSON clean for the
+        # thesis, unless it was asked for (audit runs)
+        if getattr(self.llm, "response_mode", None) != "audit":
+            result.pop("reasoning_path", None)
+        return result
+
+    def _fallback_result(self, error: Exception) -> dict:
+        import logging
+        logging.warning(f"OpenAI API call failed: {error}. Using fallback mock data.")
+        # Fallback mock data with reasoning path (which gets popped anyway, or we just don't include it here since it's a fallback)
+        return {
+            "scenarioType": "Mocked Scenario (API Quota Exceeded)",
+            "interactionDescription": "API unavailable to analyze interactions.",
+            "scenarioComplexity": 3,
+            "potentialRiskFactors": ["Unable to determine due to API error"],
+            "riskEstimate": 0.5,
+            "riskLevel": "medium"
+        }
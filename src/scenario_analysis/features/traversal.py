@@ -0,0 +1,102 @@
+from typing import Iterable, List
+
+from scenario_analysis.model.scenario import (
+    Scenario, Entity, Story, Act, Maneuver, Event, Condition
+)
+
+
+# Node hooks in traversal order; see ScenarioCollector
+HOOKS = ("entity", "init_speed", "story", "act", "maneuver", "event", "condition")
+
+
+class ScenarioCollector:
+    """
+    Plugin for a single-pass traversal of the Scenario model.
+
+    traverse() calls start() once, then the node hooks in document order
+    (entities, init speeds, then the storyboard depth-first), then finish().
+    Subclasses override only the hooks they need; hooks that are not
+    overridden are never called. result() returns what was collected.
+    """
+
+    def start(self, scenario: Scenario) -> None:
+        pass
+
+    def entity(self, entity: Entity) -> None:
+        pass
+
+    def init_speed(self, speed: float) -> None:
+        pass
+
+    def story(self, story: Story) -> None:
+        pass
+
+    def act(self, act: Act) -> None:
+        pass
+
+    def maneuver(self, maneuver: Maneuver) -> None:
+        pass
+
+    def event(self, event: Event) -> None:
+        pass
+
+    def condition(self, condition: Condition) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+    def result(self):
+        return {}
+
+
+def _overriding(collectors: List[ScenarioCollector], hook: str) -> list:
+    # Bound methods of the collectors that actually implement the hook
+    base = getattr(ScenarioCollector, hook)
+    return [getattr(c, hook) for c in collectors if getattr(type(c), hook) is not base]
+
+
+def traverse(scenario: Scenario, collectors: Iterable[ScenarioCollector]) -> None:
+    """
+    Walk the scenario once, feeding every node to all collectors.
+    """
+    collectors = list(collectors)
+    on = {hook: _overriding(collectors, hook) for hook in HOOKS}
+
+    for c in collectors:
+        c.start(scenario)
+
+    on_entity = on["entity"]
+    if on_entity:
+        for entity in scenario.entities:
+            for fn in on_entity:
+                fn(entity)
+
+    on_init_speed = on["init_speed"]
+    if on_init_speed:
+        for speed in scenario.init_speeds:
+            for fn in on_init_speed:
+                fn(speed)
+
+    on_story, on_act, on_maneuver = on["story"], on["act"], on["maneuver"]
+    on_event, on_condition = on["event"], on["condition"]
+
+    for story in scenario.stories:
+        for fn in on_story:
+            fn(story)
+        for act in story.acts:
+            for fn in on_act:
+                fn(act)
+            for man in act.maneuvers:
+                for fn in on_maneuver:
+                    fn(man)
+                for ev in man.events:
+                    for fn in on_event:
+                        fn(ev)
+                    if ev.trigger and on_condition:
+                        for cond in ev.trigger.conditions:
+                            for fn in on_condition:
+                                fn(cond)
+
+    for c in collectors:
+        c.finish()
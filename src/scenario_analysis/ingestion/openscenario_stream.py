@@ -0,0 +1,205 @@
+from pathlib import Path
+from lxml import etree
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.parameters import ParameterDeclarations, resolve_attributes, resolve_number
+from scenario_analysis.model.scenario import (
+    Scenario, Entity, Story, Act, Maneuver, Event, Trigger, Condition, InitPosition
+)
+
+
+# (parent role, child tag) -> (child role, first match only)
+#
+# Mirrors the find()/findall() calls of OpenScenarioXMLParser: "first match
+# only" corresponds to find(), everything else to findall(). Elements whose
+# path is not in this table are skipped (and cleared) without inspection.
+_TRANSITIONS = {
+    ("root", "FileHeader"): ("header", True),
+    ("root", "ParameterDeclarations"): ("parameters", True),
+    ("parameters", "ParameterDeclaration"): ("parameter", False),
+    ("root", "Entities"): ("entities", True),
+    ("entities", "ScenarioObject"): ("object", False),
+    ("object", "Vehicle"): ("vehicle", True),
+    ("object", "Pedestrian"): ("pedestrian", True),
+    ("root", "Storyboard"): ("storyboard", True),
+    # Init speeds
+    ("storyboard", "Init"): ("init", True),
+    ("init", "Actions"): ("init_actions", True),
+    ("init_actions", "Private"): ("init_private", False),
+    ("init_private", "PrivateAction"): ("private_action", False),
+    # Init positions
+    ("private_action", "TeleportAction"): ("teleport", True),
+    ("teleport", "Position"): ("position", True),
+    # Story tree
+    ("storyboard", "Story"): ("story", False),
+    ("story", "Act"): ("act", False),
+    ("act", "ManeuverGroup"): ("group", False),
+    ("group", "Maneuver"): ("maneuver", False),
+    ("maneuver", "Event"): ("event", False),
+    ("event", "StartTrigger"): ("start_trigger", True),
+    ("start_trigger", "ConditionGroup"): ("condition_group", False),
+    ("condition_group", "Condition"): ("condition", False),
+    ("event", "Action"): ("event_action", True),
+    ("event_action", "PrivateAction"): ("private_action", False),
+    # SpeedAction chain, shared by Init and Event actions
+    ("private_action", "LongitudinalAction"): ("long_action", True),
+    ("long_action", "SpeedAction"): ("speed_action", True),
+    ("speed_action", "SpeedActionTarget"): ("speed_target", True),
+    ("speed_target", "AbsoluteTargetSpeed"): ("abs_speed", True),
+}
+
+
+class _Frame:
+    __slots__ = ("role", "seen")
+
+    def __init__(self, role):
+        self.role = role
+        self.seen = set()
+
+
+class StreamingOpenScenarioParser(OpenScenarioXMLParser):
+    """
+    Streaming variant of OpenScenarioXMLParser built on lxml iterparse.
+
+    Produces the same Scenario model, but every element is cleared as soon
+    as it has been handled, so peak memory stays bounded by the nesting
+    depth of the document instead of its size.
+
+    Parameters are resolved while streaming: the ParameterDeclarations
+    precede the storyboard in an OpenSCENARIO file. parse_template() is
+    inherited and reads the whole tree.
+    """
+
+    def parse(self, filepath: str | Path, parameters: dict | None = None) -> Scenario:
+        filepath = Path(filepath)
+
+        scenario = Scenario(name=filepath.stem, author="unknown", date="unknown")
+
+        declarations = ParameterDeclarations()
+        values = None
+
+        def parameter_values() -> dict:
+            # Resolved on first use, once all declarations have been read
+            nonlocal values
+            if values is None:
+                values = declarations.resolve(parameters)
+            return values
+
+        namespace = None
+        stack: list[_Frame] = []
+
+        # Objects currently being filled
+        entity_name = None
+        entity_type = None
+        story = act = maneuver = event = None
+        speed_sink = None
+        # entityRef of the Init Private being read, None outside the Init
+        position_entity = None
+
+        for action, el in etree.iterparse(str(filepath), events=("start", "end")):
+            if action == "start":
+                qname = etree.QName(el)
+
+                if not stack:
+                    namespace = qname.namespace
+                    stack.append(_Frame("root"))
+                    continue
+
+                parent = stack[-1]
+                role = None
+
+                if parent.role == "condition":
+                    # Any child of a Condition is a condition type
+                    role = "condition_body"
+                elif parent.role == "position":
+                    # Any child of a Position is a position type
+                    role = "position_body"
+                elif parent.role is not None and qname.namespace == namespace:
+                    transition = _TRANSITIONS.get((parent.role, qname.localname))
+                    if transition is not None:
+                        role, first_only = transition
+                        if first_only and qname.localname in parent.seen:
+                            role = None
+
+                if parent.role is not None:
+                    parent.seen.add(qname.localname)
+
+                stack.append(_Frame(role))
+
+                if role is None:
+                    continue
+
+                attrib = el.attrib
+
+                if role == "header":
+                    scenario.author = attrib.get("author", "unknown")
+                    scenario.date = attrib.get("date", "unknown")
+                elif role == "parameter":
+                    declarations.declarations.append((
+                        attrib.get("name", ""),
+                        attrib.get("parameterType", "string"),
+                        attrib.get("value", ""),
+                    ))
+                elif role == "object":
+                    entity_name = attrib.get("name", "unknown")
+                    entity_type = "misc"
+                elif role == "vehicle":
+                    entity_type = "vehicle"
+                elif role == "pedestrian":
+                    if entity_type != "vehicle":
+                        entity_type = "pedestrian"
+                elif role == "init":
+                    speed_sink = scenario.init_speeds
+                elif role == "init_private":
+                    position_entity = attrib.get("entityRef", "unknown")
+                elif role == "story":
+                    story = Story(name=attrib.get("name", "unnamed_story"))
+                    scenario.stories.append(story)
+                elif role == "act":
+                    act = Act(name=attrib.get("name", "unnamed_act"))
+                    story.acts.append(act)
+                elif role == "maneuver":
+                    maneuver = Maneuver(name=attrib.get("name", "unnamed_maneuver"))
+                    act.maneuvers.append(maneuver)
+                elif role == "event":
+                    event = Event(name=attrib.get("name", "unnamed_event"), trigger=None)
+                    maneuver.events.append(event)
+                    speed_sink = event.speeds
+                elif role == "start_trigger":
+                    event.trigger = Trigger()
+                elif role == "condition_body":
+                    event.trigger.conditions.append(
+                        Condition(type=qname.localname, attributes=resolve_attributes(attrib, parameter_values()))
+                    )
+                elif role == "position_body":
+                    if position_entity is not None:
+                        position = InitPosition.from_attributes(
+                            position_entity, qname.localname, resolve_attributes(attrib, parameter_values())
+                        )
+                        if position is not None:
+                            scenario.init_positions.append(position)
+                elif role == "abs_speed":
+                    speed = resolve_number(attrib.get("value"), parameter_values())
+                    if speed is not None:
+                        speed_sink.append(speed)
+
+            else:
+                frame = stack.pop()
+
+                if frame.role == "object":
+                    scenario.entities.append(Entity(name=entity_name, type=entity_type))
+                elif frame.role in ("init", "event"):
+                    speed_sink = None
+                elif frame.role == "init_private":
+                    position_entity = None
+
+                # Drop the handled subtree and already processed siblings
+                el.clear()
+                parent_el = el.getparent()
+                if parent_el is not None:
+                    while el.getprevious() is not None:
+                        del parent_el[0]
+
+        # Also rejects overrides of undeclared parameters
+        parameter_values()
+        return scenario
@@ -1,10 +1,86 @@
+import threading
 from pathlib import Path
 from lxml import etree
 
+from scenario_analysis.ingestion.parameters import ParameterDeclarations, is_parameterized
+from scenario_analysis.ingestion.scenario_template import EventSlots, ScenarioTemplate
 from scenario_analysis.model.scenario import (
-    Scenario, Entity, Story, Act, Maneuver, Event, Trigger, Condition
+    Scenario, Entity, Story, Act, Maneuver, Event, Trigger, Condition, InitPosition
 )
 
+# ----------------------------------------------------------------------
+# Lookup layer
+# ----------------------------------------------------------------------
+
+# Elements located with find()/findall() on their parent
+_TAGS = (
+    "FileHeader", "ParameterDeclarations", "ParameterDeclaration", "Entities", "ScenarioObject",
+    "Vehicle", "Pedestrian", "Storyboard", "Private", "Story", "Act", "ManeuverGroup", "Maneuver",
+    "Event", "StartTrigger",
+)
+
+# Absolute target speed of a PrivateAction (OpenSCENARIO allows one
+# action per PrivateAction and LongitudinalAction, so [1] is exact)
+_SPEED_PATH = (
+    "o:PrivateAction/o:LongitudinalAction[1]/o:SpeedAction[1]/o:SpeedActionTarget[1]"
+    "/o:AbsoluteTargetSpeed[1]/@value"
+)
+
+# Compiled queries, relative to the element they are evaluated on
+_QUERIES = {
+    "entities": "o:Entities[1]/o:ScenarioObject",
+    "init_speeds": f"o:Storyboard[1]/o:Init[1]/o:Actions[1]/o:Private/{_SPEED_PATH}",
+    "init_positions": (
+        "o:Storyboard[1]/o:Init[1]/o:Actions[1]/o:Private"
+        "/o:PrivateAction/o:TeleportAction[1]/o:Position[1]/*"
+    ),
+    "event_speeds": f"o:Action[1]/{_SPEED_PATH}",
+    "conditions": "o:ConditionGroup/o:Condition/*",
+}
+
+
+class _Lookups:
+    """
+    Prebuilt tag names and compiled XPath queries for one namespace
+    (None: no default namespace).
+    """
+
+    def __init__(self, namespace: str | None):
+        self.namespace = namespace
+        prefix = f"{{{namespace}}}" if namespace else ""
+        self.tags = {name: prefix + name for name in _TAGS}
+
+        if namespace:
+            namespaces = {"o": namespace}
+            queries = _QUERIES
+        else:
+            namespaces = None
+            queries = {name: query.replace("o:", "") for name, query in _QUERIES.items()}
+        # Plain str results: lxml's smart strings would keep the tree alive
+        self.queries = {
+            name: etree.XPath(query, namespaces=namespaces, smart_strings=False)
+            for name, query in queries.items()
+        }
+
+
+# XPath objects are not shared between threads, so every thread compiles
+# its own set, once per namespace
+_LOCAL = threading.local()
+
+
+def _lookups(root) -> _Lookups:
+    """
+    Lookups for the default namespace of root.
+    """
+    namespace = root.tag[1:].split("}")[0] if root.tag.startswith("{") else None
+    cache = getattr(_LOCAL, "lookups", None)
+    if cache is None:
+        cache = _LOCAL.lookups = {}
+    lookups = cache.get(namespace)
+    if lookups is None:
+        lookups = cache[namespace] = _Lookups(namespace)
+    return lookups
+
 
 class OpenScenarioXMLParser:
     """
@@ -14,54 +90,39 @@ class OpenScenarioXMLParser:
     - No simulator dependencies
     - No duplicate traversal
     - Designed for structural & semantic analysis
-    """
+    - Resolves the global ParameterDeclarations ("$name", "${expr}")
 
-    def __init__(self):
-        self._namespace = None
+    The parser keeps no per-file state, so one instance can be reused and
+    shared between threads.
+    """
 
     # ------------------------------------------------------------------
-    # Namespace handling
+    # Public API
     # ------------------------------------------------------------------
 
-    def _detect_namespace(self, root):
+    def parse(self, filepath: str | Path, parameters: dict | None = None) -> Scenario:
         """
-        Detect default XML namespace if present.
+        Parse a scenario; parameters override declared parameter values.
         """
-        if root.tag.startswith("{"):
-            self._namespace = root.tag.split("}")[0][1:]
-        else:
-            self._namespace = None
+        return self.parse_template(filepath).bind(parameters)
 
-    def _tag(self, name: str) -> str:
+    def parse_template(self, filepath: str | Path) -> ScenarioTemplate:
         """
-        Build a fully-qualified tag name if a namespace exists.
+        Parse a scenario with its parameter references unresolved; bind()
+        the template to get Scenarios for any number of parameter values.
         """
-        if self._namespace:
-            return f"{{{self._namespace}}}{name}"
-        return name
-
-    def _find(self, element, tag):
-        return element.find(self._tag(tag))
-
-    def _findall(self, element, tag):
-        return element.findall(self._tag(tag))
-
-    # ------------------------------------------------------------------
-    # Public API
-    # ------------------------------------------------------------------
-
-    def parse(self, filepath: str | Path) -> Scenario:
         filepath = Path(filepath)
 
         tree = etree.parse(str(filepath))
         root = tree.getroot()
-        self._detect_namespace(root)
+        lookups = _lookups(root)
+        tags, queries = lookups.tags, lookups.queries
 
         # --------------------------------------------------------------
-        # FileHeader
+        # FileHeader and ParameterDeclarations
         # --------------------------------------------------------------
 
-        header = self._find(root, "FileHeader")
+        header = root.find(tags["FileHeader"])
         author = header.attrib.get("author", "unknown") if header is not None else "unknown"
         date = header.attrib.get("date", "unknown") if header is not None else "unknown"
 
@@ -70,98 +131,81 @@ class OpenScenarioXMLParser:
             author=author,
             date=date,
         )
+
+        declarations = ParameterDeclarations()
+        declarations_el = root.find(tags["ParameterDeclarations"])
+        if declarations_el is not None:
+            for decl in declarations_el.findall(tags["ParameterDeclaration"]):
+                declarations.declarations.append((
+                    decl.attrib.get("name", ""),
+                    decl.attrib.get("parameterType", "string"),
+                    decl.attrib.get("value", ""),
+                ))
         
         # --------------------------------------------------------------
         # Entities
         # --------------------------------------------------------------
 
-        entities_el = self._find(root, "Entities")
-        if entities_el is not None:
-            for obj in self._findall(entities_el, "ScenarioObject"):
-                name = obj.attrib.get("name", "unknown")
+        for obj in queries["entities"](root):
+            name = obj.attrib.get("name", "unknown")
 
-                if self._find(obj, "Vehicle") is not None:
-                    etype = "vehicle"
-                elif self._find(obj, "Pedestrian") is not None:
-                    etype = "pedestrian"
-                else:
-                    etype = "misc"
+            if obj.find(tags["Vehicle"]) is not None:
+                etype = "vehicle"
+            elif obj.find(tags["Pedestrian"]) is not None:
+                etype = "pedestrian"
+            else:
+                etype = "misc"
 
-                scenario.entities.append(Entity(name=name, type=etype))
+            scenario.entities.append(Entity(name=name, type=etype))
         
         # --------------------------------------------------------------
-        # Storyboard
+        # Init Speeds and Positions
         # --------------------------------------------------------------
+        # Values as written; parameterized ones are resolved by bind()
+        init_speeds = queries["init_speeds"](root)
+        init_positions = self._teleport_positions(queries["init_positions"](root), tags["Private"])
+        scenario.init_speeds = _literal_numbers(init_speeds)
+        scenario.init_positions = _literal_positions(init_positions)
 
-        storyboard = self._find(root, "Storyboard")
-        
         # --------------------------------------------------------------
-        # Init Speeds
+        # Storyboard
         # --------------------------------------------------------------
-        init_speeds = []
-        if storyboard is not None:
-            init_el = self._find(storyboard, "Init")
-            if init_el is not None:
-                actions_el = self._find(init_el, "Actions")
-                if actions_el is not None:
-                    for priv in self._findall(actions_el, "Private"):
-                        for priv_action in self._findall(priv, "PrivateAction"):
-                            long_act = self._find(priv_action, "LongitudinalAction")
-                            if long_act is not None:
-                                speed_act = self._find(long_act, "SpeedAction")
-                                if speed_act is not None:
-                                    target_speed = self._find(speed_act, "SpeedActionTarget")
-                                    if target_speed is not None:
-                                        abs_target = self._find(target_speed, "AbsoluteTargetSpeed")
-                                        if abs_target is not None:
-                                            val = abs_target.attrib.get("value")
-                                            if val is not None:
-                                                try:
-                                                    init_speeds.append(float(val))
-                                                except ValueError:
-                                                    pass
-        scenario.init_speeds = init_speeds
+
+        storyboard = root.find(tags["Storyboard"])
+
+        # Parameterized values of the events, by storyboard position
+        event_slots = {}
 
         if storyboard is not None:
-            for story_el in self._findall(storyboard, "Story"):
+            for story_el in storyboard.findall(tags["Story"]):
                 story = Story(name=story_el.attrib.get("name", "unnamed_story"))
 
-                for act_el in self._findall(story_el, "Act"):
+                for act_el in story_el.findall(tags["Act"]):
                     act = Act(name=act_el.attrib.get("name", "unnamed_act"))
 
-                    for mg in self._findall(act_el, "ManeuverGroup"):
-                        for man_el in self._findall(mg, "Maneuver"):
+                    for mg in act_el.findall(tags["ManeuverGroup"]):
+                        for man_el in mg.findall(tags["Maneuver"]):
                             maneuver = Maneuver(
                                 name=man_el.attrib.get("name", "unnamed_maneuver")
                             )
 
-                            for event_el in self._findall(man_el, "Event"):
+                            for event_el in man_el.findall(tags["Event"]):
                                 event_name = event_el.attrib.get("name", "unnamed_event")
-                                trigger = self._parse_start_trigger(event_el)
+                                slots = EventSlots()
+                                trigger = self._parse_start_trigger(event_el, lookups, slots)
                                 
-                                # Extract speeds from actions
-                                speeds = []
-                                action_el = self._find(event_el, "Action")
-                                if action_el is not None:
-                                    # Private actions (like routing/speed)
-                                    for priv_action in self._findall(action_el, "PrivateAction"):
-                                        long_act = self._find(priv_action, "LongitudinalAction")
-                                        if long_act is not None:
-                                            speed_act = self._find(long_act, "SpeedAction")
-                                            if speed_act is not None:
-                                                target_speed = self._find(speed_act, "SpeedActionTarget")
-                                                if target_speed is not None:
-                                                    abs_target = self._find(target_speed, "AbsoluteTargetSpeed")
-                                                    if abs_target is not None:
-                                                        val = abs_target.attrib.get("value")
-                                                        if val is not None:
-                                                            try:
-                                                                speeds.append(float(val))
-                                                            except ValueError:
-                                                                pass
+                                # Target speeds of the event's (first) Action
+                                speeds = queries["event_speeds"](event_el)
+                                if any(is_parameterized(v) for v in speeds):
+                                    slots.speeds = speeds
+
+                                if slots.speeds is not None or slots.conditions:
+                                    key = (len(scenario.stories), len(story.acts), len(act.maneuvers),
+                                           len(maneuver.events))
+                                    event_slots[key] = slots
 
                                 maneuver.events.append(
-                                    Event(name=event_name, trigger=trigger, speeds=speeds)
+                                    Event(name=event_name, trigger=trigger, speeds=_literal_numbers(speeds))
                                 )
 
                             act.maneuvers.append(maneuver)
@@ -170,28 +214,98 @@ class OpenScenarioXMLParser:
 
                 scenario.stories.append(story)
 
-        return scenario
+        return ScenarioTemplate(
+            scenario,
+            declarations,
+            init_speeds=init_speeds if any(is_parameterized(v) for v in init_speeds) else None,
+            init_positions=init_positions if any(
+                is_parameterized(v) for _, _, attrib in init_positions for v in attrib.values()
+            ) else None,
+            events=event_slots,
+        )
+
+    def find_logic_file(self, filepath: str | Path) -> Path | None:
+        """
+        Return the OpenDRIVE file referenced by RoadNetwork/LogicFile.
+
+        Stops reading at the first LogicFile element, so the storyboard is
+        never parsed. Relative paths are resolved against the scenario file.
+        """
+        filepath = Path(filepath)
+
+        for _, element in etree.iterparse(str(filepath), tag="{*}LogicFile"):
+            ref = element.attrib.get("filepath")
+            if not ref:
+                return None
+            return (filepath.parent / ref).resolve()
+
+        return None
+
+    # ------------------------------------------------------------------
+    # Action parsing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _teleport_positions(position_children, private_tag: str) -> list[tuple[str, str, dict]]:
+        """
+        (entityRef, position element, attributes as written) of the
+        positions set by Init TeleportActions, from the children of their
+        Position elements.
+        """
+        positions = []
+        for child in position_children:
+            private_el = next(child.iterancestors(private_tag))
+            entity = private_el.attrib.get("entityRef", "unknown")
+            positions.append((entity, etree.QName(child).localname, dict(child.attrib)))
+        return positions
 
     # ------------------------------------------------------------------
     # Trigger parsing
     # ------------------------------------------------------------------
 
-    def _parse_start_trigger(self, event_el) -> Trigger | None:
-        start_trigger = self._find(event_el, "StartTrigger")
+    @staticmethod
+    def _parse_start_trigger(event_el, lookups: _Lookups, slots: EventSlots) -> Trigger | None:
+        """
+        Conditions of the event's StartTrigger; the attributes of
+        parameterized conditions are recorded in slots.
+        """
+        start_trigger = event_el.find(lookups.tags["StartTrigger"])
         if start_trigger is None:
             return None
 
         trigger = Trigger()
 
-        for cond_group in self._findall(start_trigger, "ConditionGroup"):
-            for cond_el in self._findall(cond_group, "Condition"):
-                for child in cond_el:
-                    cond_type = etree.QName(child).localname
-                    trigger.conditions.append(
-                        Condition(
-                            type=cond_type,
-                            attributes=dict(child.attrib)
-                        )
-                    )
+        for child in lookups.queries["conditions"](start_trigger):
+            cond_type = etree.QName(child).localname
+            if any(is_parameterized(v) for v in child.attrib.values()):
+                slots.conditions[len(trigger.conditions)] = dict(child.attrib)
+            trigger.conditions.append(
+                Condition(
+                    type=cond_type,
+                    attributes=child.attrib
+                )
+            )
 
         return trigger
+
+
+def _literal_numbers(values: list[str]) -> list[float]:
+    # The unparameterized values that are numbers
+    numbers = []
+    for val in values:
+        if is_parameterized(val):
+            continue
+        try:
+            numbers.append(float(val))
+        except ValueError:
+            pass
+    return numbers
+
+
+def _literal_positions(positions: list[tuple[str, str, dict]]) -> list[InitPosition]:
+    result = []
+    for entity, kind, attrib in positions:
+        position = InitPosition.from_attributes(entity, kind, attrib)
+        if position is not None:
+            result.append(position)
+    return result
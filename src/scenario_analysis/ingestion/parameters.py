@@ -0,0 +1,302 @@
+import ast
+import itertools
+import json
+import math
+import random
+import re
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+# OpenSCENARIO parameters: "$name" references a declared parameter,
+# "${...}" is an expression over parameters (OpenSCENARIO 1.1+), e.g.
+# "${$EgoSpeed / 3.6 + 2}". Only the global ParameterDeclarations of a
+# scenario are supported, not those of catalogs or storyboard elements.
+
+_REFERENCE = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+# Parameter names inside expressions become Python identifiers with this prefix
+_PREFIX = "_param_"
+
+_INTEGER_TYPES = {"int", "integer", "unsignedInt", "unsignedShort"}
+
+
+class ParameterError(ValueError):
+    """
+    Undeclared parameter, invalid expression or invalid parameter value.
+    """
+
+
+def _round(x: float) -> float:
+    # OpenSCENARIO rounds half away from zero, Python's round() to even
+    return math.copysign(math.floor(abs(x) + 0.5), x)
+
+
+_FUNCTIONS = {
+    "round": _round,
+    "floor": math.floor,
+    "ceil": math.ceil,
+    "sqrt": math.sqrt,
+    "pow": math.pow,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "abs": abs,
+    "sign": lambda x: math.copysign(1.0, x) if x else 0.0,
+    "min": min,
+    "max": max,
+}
+
+_BINARY = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Mod: lambda a, b: a % b,
+}
+
+_COMPARE = {
+    ast.Eq: lambda a, b: a == b,
+    ast.NotEq: lambda a, b: a != b,
+    ast.Lt: lambda a, b: a < b,
+    ast.LtE: lambda a, b: a <= b,
+    ast.Gt: lambda a, b: a > b,
+    ast.GtE: lambda a, b: a >= b,
+}
+
+
+def evaluate_expression(expression: str, values: Mapping[str, Any]) -> Any:
+    """
+    Value of an OpenSCENARIO expression (the part inside "${...}").
+
+    Supports numbers, true/false, parameter references, + - * / %,
+    comparisons, not/and/or and the functions of the standard (round,
+    floor, ceil, sqrt, pow, trigonometry, abs, sign, min, max). The
+    expression is evaluated on its syntax tree, never with eval().
+    """
+    try:
+        tree = ast.parse(_REFERENCE.sub(lambda m: _PREFIX + m.group(1), expression.strip()), mode="eval")
+        return _evaluate(tree.body, values)
+    except ParameterError:
+        raise
+    except (SyntaxError, TypeError, ValueError, ZeroDivisionError, OverflowError) as e:
+        raise ParameterError(f"Invalid expression {expression!r}: {e}") from None
+
+
+def _evaluate(node: ast.AST, values: Mapping[str, Any]) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id.startswith(_PREFIX):
+            return _lookup(node.id[len(_PREFIX):], values)
+        if node.id in ("true", "false"):
+            return node.id == "true"
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        return _BINARY[type(node.op)](_evaluate(node.left, values), _evaluate(node.right, values))
+    elif isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand, values)
+        if isinstance(node.op, ast.USub):
+            return -operand
+        if isinstance(node.op, ast.UAdd):
+            return +operand
+        if isinstance(node.op, ast.Not):
+            return not operand
+    elif isinstance(node, ast.BoolOp):
+        operands = [_evaluate(v, values) for v in node.values]
+        return all(operands) if isinstance(node.op, ast.And) else any(operands)
+    elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+        left = _evaluate(node.left, values)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _evaluate(comparator, values)
+            if not _COMPARE[type(op)](left, right):
+                return False
+            left = right
+        return True
+    elif (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS and not node.keywords
+    ):
+        return _FUNCTIONS[node.func.id](*(_evaluate(a, values) for a in node.args))
+
+    raise ParameterError(f"Unsupported expression element: {ast.dump(node)}")
+
+
+def _lookup(name: str, values: Mapping[str, Any]) -> Any:
+    try:
+        return values[name]
+    except KeyError:
+        raise ParameterError(f"Undeclared parameter: {name}") from None
+
+
+def is_parameterized(raw: str | None) -> bool:
+    return raw is not None and raw.startswith("$")
+
+
+def substitute(raw: str, values: Mapping[str, Any]) -> Any:
+    """
+    Value of an attribute: the parameter for "$name", the evaluated
+    expression for "${...}", otherwise raw itself.
+    """
+    if not is_parameterized(raw):
+        return raw
+    if raw.startswith("${") and raw.endswith("}"):
+        return evaluate_expression(raw[2:-1], values)
+    return _lookup(raw[1:], values)
+
+
+def _attribute_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def resolve_number(raw: str | None, values: Mapping[str, Any]) -> float | None:
+    """
+    Attribute as a float; None if it is missing, not a number or refers
+    to something that cannot be resolved.
+    """
+    if raw is None:
+        return None
+    try:
+        return float(substitute(raw, values))
+    except (ValueError, TypeError):
+        return None
+
+
+def resolve_attributes(attrib: Mapping[str, str], values: Mapping[str, Any]) -> Mapping[str, str]:
+    """
+    attrib with parameterized values substituted (as text); attrib itself
+    if nothing is parameterized. Unresolvable values are kept as written.
+    """
+    if not any(is_parameterized(v) for v in attrib.values()):
+        return attrib
+    resolved = {}
+    for key, raw in attrib.items():
+        try:
+            resolved[key] = _attribute_text(substitute(raw, values))
+        except ParameterError:
+            resolved[key] = raw
+    return resolved
+
+
+# ----------------------------------------------------------------------
+# Declarations
+# ----------------------------------------------------------------------
+
+class ParameterDeclarations:
+    """
+    The global ParameterDeclaration elements of a scenario, in document
+    order: (name, parameterType, value as written).
+    """
+
+    def __init__(self, declarations: list[tuple[str, str, str]] | None = None):
+        self.declarations = declarations or []
+
+    def __len__(self) -> int:
+        return len(self.declarations)
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _, _ in self.declarations]
+
+    def resolve(self, overrides: Mapping[str, Any] | None = None) -> dict[str, Any]:
+        """
+        Typed value of every parameter. A declared value may refer to the
+        parameters declared before it; overrides replace declared values
+        (like the parameter overrides of a simulator) and must name
+        declared parameters.
+
+        A declared value that cannot be resolved leaves its parameter
+        undefined, so only the values referring to it are affected; an
+        invalid override raises ParameterError.
+        """
+        overrides = overrides or {}
+        unknown = set(overrides) - set(self.names)
+        if unknown:
+            raise ParameterError(f"Undeclared parameters: {', '.join(sorted(unknown))}")
+
+        values: dict[str, Any] = {}
+        for name, parameter_type, raw in self.declarations:
+            value = overrides.get(name, raw)
+            try:
+                if isinstance(value, str):
+                    value = substitute(value, values)
+                values[name] = _typed(name, parameter_type, value)
+            except ParameterError:
+                if name in overrides:
+                    raise
+        return values
+
+
+def _typed(name: str, parameter_type: str, value: Any) -> Any:
+    try:
+        if parameter_type == "double":
+            return float(value)
+        if parameter_type in _INTEGER_TYPES:
+            return int(float(value))
+        if parameter_type == "boolean":
+            return value if isinstance(value, bool) else str(value).lower() in ("true", "1")
+    except (TypeError, ValueError):
+        raise ParameterError(f"Invalid value for {parameter_type} parameter {name}: {value!r}") from None
+    return value if isinstance(value, (int, float, bool)) else str(value)
+
+
+# ----------------------------------------------------------------------
+# Parameter sweeps
+# ----------------------------------------------------------------------
+
+def load_sweep(path: str | Path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def expand_sweep(spec: Mapping[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Parameter bindings of a sweep specification:
+
+        {"parameters": {
+            "EgoSpeed": [10, 15, 20],                       # value set
+            "Gap": {"start": 5, "stop": 30, "step": 5},    # range, stop included
+            "Delay": {"uniform": [0.0, 2.0]},              # stochastic
+            "Friction": {"normal": [0.8, 0.05]}
+         },
+         "samples": 10, "seed": 0}
+
+    Value sets and ranges are combined exhaustively. With stochastic
+    parameters, every combination is repeated samples times (default 1),
+    each time with new random draws (seeded, so reproducible).
+    """
+    parameters = spec.get("parameters", {})
+    deterministic: dict[str, list] = {}
+    stochastic: dict[str, tuple[str, list]] = {}
+
+    for name, values in parameters.items():
+        if isinstance(values, list):
+            deterministic[name] = values
+        elif isinstance(values, dict) and "start" in values:
+            deterministic[name] = _range_values(name, values)
+        elif isinstance(values, dict) and len(values) == 1 and next(iter(values)) in ("uniform", "normal"):
+            stochastic[name] = next(iter(values.items()))
+        else:
+            deterministic[name] = [values]
+
+    rng = random.Random(spec.get("seed", 0))
+    samples = spec.get("samples", 1) if stochastic else 1
+    names = list(deterministic)
+    for combination in itertools.product(*deterministic.values()):
+        for _ in range(samples):
+            binding = dict(zip(names, combination))
+            for name, (kind, (a, b)) in stochastic.items():
+                binding[name] = rng.uniform(a, b) if kind == "uniform" else rng.gauss(a, b)
+            yield binding
+
+
+def _range_values(name: str, spec: Mapping[str, float]) -> list[float]:
+    start, stop, step = spec["start"], spec["stop"], spec.get("step", 1)
+    if step <= 0 or stop < start:
+        raise ParameterError(f"Invalid range for {name}: {dict(spec)}")
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 12) for i in range(count)]
@@ -0,0 +1,342 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from itertools import islice
+from pathlib import Path
+from typing import Dict
+
+from scenario_analysis.model.scenario import (
+    Scenario, Entity, Story, Act, Maneuver, Event, Trigger, Condition, InitPosition
+)
+
+# Binary layout of a stored scenario (little-endian, sections 8-byte aligned):
+#
+#   header    magic, format version, section sizes (_HEADER)
+#   strings   UTF-8 text of all distinct strings, NUL-separated (XML text
+#             cannot contain NUL), split with a single call when loading
+#   sets      u32 words: the distinct condition attribute sets
+#   tree      u32 words: entities, init positions, the storyboard in order
+#   floats    f64: init speeds, position coordinates, event speeds
+#
+# Strings are referenced by index, 0 standing for None. Bump FORMAT_VERSION
+# when the layout or the model changes; stale entries are then ignored.
+# Entries are keyed by file content and parser class only, so bump it as
+# well when a parser change alters the Scenario it produces for the same
+# file; otherwise entries parsed by the old code are still returned.
+
+FORMAT_VERSION = 1
+
+_MAGIC = b"SCNS"
+_HEADER = struct.Struct("<4sHxxIIIII")
+_SEPARATOR = "\0"
+# Trigger word of an event without StartTrigger
+_NO_TRIGGER = 0xFFFFFFFF
+# Flags of an init position: which optional fields are set
+_X, _Y, _S = 1, 2, 4
+
+# The u32 / f64 sections are read in place with memoryview.cast(), which
+# uses the native byte order
+_NATIVE = sys.byteorder == "little"
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+# ----------------------------------------------------------------------
+# Encoding
+# ----------------------------------------------------------------------
+
+class _Encoder:
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.attribute_sets: Dict[tuple, int] = {}
+        self.sets = array("I")
+        self.tree = array("I")
+        self.floats = array("d")
+
+    def string(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings) + 1
+        return index
+
+    def attribute_set(self, condition: Condition) -> int:
+        items = condition.items
+        index = self.attribute_sets.get(items)
+        if index is None:
+            index = self.attribute_sets[items] = len(self.attribute_sets)
+            self.sets.append(len(items))
+            for key, value in items:
+                self.sets.extend((self.string(key), self.string(value)))
+        return index
+
+    def scenario(self, scenario: Scenario) -> None:
+        tree, floats, string = self.tree, self.floats, self.string
+
+        tree.extend((string(scenario.name), string(scenario.author), string(scenario.date)))
+
+        tree.append(len(scenario.entities))
+        for entity in scenario.entities:
+            tree.extend((string(entity.name), string(entity.type)))
+
+        tree.append(len(scenario.init_speeds))
+        floats.extend(scenario.init_speeds)
+
+        tree.append(len(scenario.init_positions))
+        for p in scenario.init_positions:
+            flags = (_X if p.x is not None else 0) | (_Y if p.y is not None else 0) | (_S if p.s is not None else 0)
+            tree.extend((string(p.entity), string(p.kind), string(p.road_id), flags))
+            floats.extend(v for v in (p.x, p.y, p.s) if v is not None)
+
+        tree.append(len(scenario.stories))
+        for story in scenario.stories:
+            tree.extend((string(story.name), len(story.acts)))
+            for act in story.acts:
+                tree.extend((string(act.name), len(act.maneuvers)))
+                for maneuver in act.maneuvers:
+                    tree.extend((string(maneuver.name), len(maneuver.events)))
+                    for event in maneuver.events:
+                        self.event(event)
+
+    def event(self, event: Event) -> None:
+        tree = self.tree
+        tree.append(self.string(event.name))
+        if event.trigger is None:
+            tree.append(_NO_TRIGGER)
+        else:
+            tree.append(len(event.trigger.conditions))
+            for condition in event.trigger.conditions:
+                tree.extend((self.string(condition.type), self.attribute_set(condition)))
+        tree.append(len(event.speeds))
+        self.floats.extend(event.speeds)
+
+    def tobytes(self) -> bytes:
+        blob = _SEPARATOR.join(self.strings).encode("utf-8")
+
+        parts = [_HEADER.pack(_MAGIC, FORMAT_VERSION, len(self.strings), len(blob),
+                              len(self.sets), len(self.tree), len(self.floats))]
+        for section in (blob, self.sets.tobytes(), self.tree.tobytes(), self.floats.tobytes()):
+            parts.append(section)
+            parts.append(b"\0" * _pad(len(section)))
+        return b"".join(parts)
+
+
+def encode_scenario(scenario: Scenario) -> bytes:
+    encoder = _Encoder()
+    encoder.scenario(scenario)
+    return encoder.tobytes()
+
+
+# ----------------------------------------------------------------------
+# Decoding
+# ----------------------------------------------------------------------
+
+class StoreFormatError(ValueError):
+    """
+    Data that is not a stored scenario of the current format version.
+    """
+
+
+def decode_scenario(buffer) -> Scenario:
+    """
+    Scenario from the bytes of encode_scenario(), e.g. a memory-mapped
+    file. The numeric sections are read in place; only the model objects
+    and the distinct strings (interned) are created.
+    """
+    if not _NATIVE:
+        raise StoreFormatError("Stored scenarios are little-endian")
+
+    views = []
+    try:
+        view = memoryview(buffer)
+        views.append(view)
+        if len(view) < _HEADER.size:
+            raise StoreFormatError("Truncated header")
+        magic, version, num_strings, blob_len, num_sets, num_tree, num_floats = _HEADER.unpack_from(view)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise StoreFormatError(f"Unsupported store format {magic!r} v{version}")
+
+        def section(start: int, size: int, fmt: str | None = None) -> tuple[memoryview, int]:
+            if start + size > len(view):
+                raise StoreFormatError("Truncated section")
+            part = view[start:start + size]
+            views.append(part)
+            if fmt is not None:
+                part = part.cast(fmt)
+                views.append(part)
+            return part, start + size + _pad(size)
+
+        blob, pos = section(_HEADER.size, blob_len)
+        sets, pos = section(pos, 4 * num_sets, "I")
+        tree, pos = section(pos, 4 * num_tree, "I")
+        floats, pos = section(pos, 8 * num_floats, "d")
+
+        strings = [None]
+        if num_strings:
+            strings.extend(map(sys.intern, str(blob, "utf-8").split(_SEPARATOR)))
+        if len(strings) != num_strings + 1:
+            raise StoreFormatError("String table does not match the header")
+
+        attribute_sets = []
+        word = iter(sets).__next__
+        for count in iter(word, None):
+            # A list comprehension, so a StopIteration on truncated data
+            # propagates (in a generator it would become a RuntimeError)
+            attribute_sets.append(tuple([(strings[word()], strings[word()]) for _ in range(count)]))
+
+        return _decode_tree(iter(tree).__next__, iter(floats), strings, attribute_sets)
+    except (IndexError, KeyError, StopIteration, UnicodeDecodeError, struct.error) as e:
+        raise StoreFormatError(f"Corrupt stored scenario: {e!r}") from None
+    finally:
+        # Release in reverse order, so a memory map can be closed afterwards
+        for v in reversed(views):
+            v.release()
+
+
+def _decode_tree(word, floats, strings: list, attribute_sets: list) -> Scenario:
+    scenario = Scenario(name=strings[word()], author=strings[word()], date=strings[word()])
+
+    scenario.entities = [Entity(name=strings[word()], type=strings[word()]) for _ in range(word())]
+    scenario.init_speeds = list(islice(floats, word()))
+
+    for _ in range(word()):
+        entity, kind, road_id, flags = strings[word()], strings[word()], strings[word()], word()
+        scenario.init_positions.append(InitPosition(
+            entity=entity,
+            kind=kind,
+            x=next(floats) if flags & _X else None,
+            y=next(floats) if flags & _Y else None,
+            road_id=road_id,
+            s=next(floats) if flags & _S else None,
+        ))
+
+    for _ in range(word()):
+        story = Story(name=strings[word()])
+        for _ in range(word()):
+            act = Act(name=strings[word()])
+            for _ in range(word()):
+                maneuver = Maneuver(name=strings[word()])
+                for _ in range(word()):
+                    name = strings[word()]
+                    num_conditions = word()
+                    trigger = None
+                    if num_conditions != _NO_TRIGGER:
+                        trigger = Trigger([
+                            Condition.from_items(strings[word()], attribute_sets[word()])
+                            for _ in range(num_conditions)
+                        ])
+                    speeds = list(islice(floats, word()))
+                    maneuver.events.append(Event(name=name, trigger=trigger, speeds=speeds))
+                act.maneuvers.append(maneuver)
+            story.acts.append(act)
+        scenario.stories.append(story)
+
+    return scenario
+
+
+# ----------------------------------------------------------------------
+# Store
+# ----------------------------------------------------------------------
+
+class ScenarioStore:
+    """
+    Content-addressed on-disk store of parsed scenarios.
+
+    Entries are keyed by the SHA-256 of the .xosc content and the parser
+    class, written once (atomically, so concurrent writers are harmless)
+    and read back memory-mapped, so an unchanged scenario is never parsed
+    from XML again. The scenario name is taken from the path asked for,
+    as the parsers do.
+
+    Only scenarios parsed with their declared parameter values are
+    stored; overrides always go through the parser.
+
+    Safe to share between threads and processes.
+    """
+
+    def __init__(self, store_dir: str | Path):
+        self.store_dir = Path(store_dir)
+        # (path, size, mtime_ns) -> content hash, as in RoadGraphCache
+        self._hash_memo: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, xosc_path: str | Path, parser) -> tuple[Scenario, bool]:
+        """
+        The scenario of xosc_path and whether it came from the store; it
+        is parsed with parser and stored first if it was not.
+        """
+        key = self._key(xosc_path, parser)
+        scenario = self.load(key)
+        if scenario is not None:
+            with self._lock:
+                self.hits += 1
+            scenario.name = Path(xosc_path).stem
+            return scenario, True
+
+        with self._lock:
+            self.misses += 1
+        scenario = parser.parse(xosc_path)
+        self.store(key, scenario)
+        return scenario, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def content_hash(self, xosc_path: str | Path) -> str:
+        # os.path rather than Path.resolve(): this runs once per scenario
+        path = os.path.abspath(xosc_path)
+        st = os.stat(path)
+        memo_key = (path, st.st_size, st.st_mtime_ns)
+
+        digest = self._hash_memo.get(memo_key)
+        if digest is None:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            with self._lock:
+                self._hash_memo[memo_key] = digest
+
+        return digest
+
+    def _key(self, xosc_path, parser) -> str:
+        variant = f"{FORMAT_VERSION}|{type(parser).__qualname__}"
+        variant_hash = hashlib.sha256(variant.encode("utf-8")).hexdigest()[:16]
+        return f"{self.content_hash(xosc_path)}-{variant_hash}"
+
+    def _path(self, key: str) -> Path:
+        return self.store_dir / key[:2] / f"{key}.scn"
+
+    def load(self, key: str) -> Scenario | None:
+        try:
+            with self._path(key).open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return decode_scenario(data)
+        except (FileNotFoundError, ValueError):
+            # Missing, empty (mmap raises ValueError) or corrupt entry;
+            # parsed again and overwritten
+            return None
+
+    def store(self, key: str, scenario: Scenario) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file and rename, so readers in other processes
+        # never see a partially written entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(encode_scenario(scenario))
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
@@ -0,0 +1,136 @@
+from typing import Any, Mapping
+
+from scenario_analysis.ingestion.parameters import ParameterDeclarations, resolve_attributes, resolve_number
+from scenario_analysis.model.scenario import (
+    Scenario, Story, Act, Maneuver, Event, Trigger, Condition, InitPosition
+)
+
+# Position of an event in the storyboard: (story, act, maneuver, event)
+# indices, maneuvers counted across the maneuver groups of an act
+EventKey = tuple[int, int, int, int]
+
+
+class EventSlots:
+    """
+    The parameterized values of one event: all its target speeds as
+    written (if any is parameterized), and the attributes as written of
+    its parameterized conditions, by condition index.
+    """
+
+    __slots__ = ("speeds", "conditions")
+
+    def __init__(self):
+        self.speeds: list[str] | None = None
+        self.conditions: dict[int, Mapping[str, str]] = {}
+
+
+class ScenarioTemplate:
+    """
+    A parsed scenario whose parameter references are not resolved yet.
+
+    scenario holds everything that does not depend on parameters. bind()
+    produces a Scenario for one set of parameter values without touching
+    the XML again; objects without parameterized values (entities,
+    unaffected stories, acts, events) are shared by all bound scenarios,
+    only the paths down to parameterized values are rebuilt.
+
+    Treat bound scenarios as read-only, since they share objects.
+    """
+
+    def __init__(
+        self,
+        scenario: Scenario,
+        declarations: ParameterDeclarations,
+        init_speeds: list[str] | None = None,
+        init_positions: list[tuple[str, str, Mapping[str, str]]] | None = None,
+        events: dict[EventKey, EventSlots] | None = None,
+    ):
+        self.scenario = scenario
+        self.declarations = declarations
+        # Raw values of all init speeds / positions if any is parameterized
+        self.init_speeds = init_speeds
+        self.init_positions = init_positions
+        self.events = events or {}
+
+        # story -> act -> maneuver -> event -> slots
+        self._tree: dict = {}
+        for (s, a, m, e), slots in self.events.items():
+            self._tree.setdefault(s, {}).setdefault(a, {}).setdefault(m, {})[e] = slots
+
+    @property
+    def parameterized(self) -> bool:
+        return self.init_speeds is not None or self.init_positions is not None or bool(self.events)
+
+    def bind(self, parameters: Mapping[str, Any] | None = None) -> Scenario:
+        """
+        The scenario with the declared parameter values, overridden by
+        parameters. Values that cannot be resolved are dropped (speeds,
+        positions) or kept as written (condition attributes), like
+        malformed literal values.
+        """
+        values = self.declarations.resolve(parameters)
+        base = self.scenario
+        if not self.parameterized:
+            return base
+
+        init_speeds = base.init_speeds
+        if self.init_speeds is not None:
+            init_speeds = self._numbers(self.init_speeds, values)
+
+        init_positions = base.init_positions
+        if self.init_positions is not None:
+            init_positions = []
+            for entity, kind, attrib in self.init_positions:
+                position = InitPosition.from_attributes(entity, kind, resolve_attributes(attrib, values))
+                if position is not None:
+                    init_positions.append(position)
+
+        stories = base.stories
+        if self._tree:
+            stories = list(stories)
+            for s, acts in self._tree.items():
+                stories[s] = self._bind_story(stories[s], acts, values)
+
+        return Scenario(
+            name=base.name,
+            author=base.author,
+            date=base.date,
+            entities=base.entities,
+            stories=stories,
+            init_speeds=init_speeds,
+            init_positions=init_positions,
+        )
+
+    def _bind_story(self, story: Story, acts: dict, values: dict) -> Story:
+        new_acts = list(story.acts)
+        for a, maneuvers in acts.items():
+            act = story.acts[a]
+            new_maneuvers = list(act.maneuvers)
+            for m, events in maneuvers.items():
+                maneuver = act.maneuvers[m]
+                new_events = list(maneuver.events)
+                for e, slots in events.items():
+                    new_events[e] = self._bind_event(maneuver.events[e], slots, values)
+                new_maneuvers[m] = Maneuver(name=maneuver.name, events=new_events)
+            new_acts[a] = Act(name=act.name, maneuvers=new_maneuvers)
+        return Story(name=story.name, acts=new_acts)
+
+    def _bind_event(self, event: Event, slots: EventSlots, values: dict) -> Event:
+        trigger = event.trigger
+        if slots.conditions:
+            conditions = list(trigger.conditions)
+            for c, attrib in slots.conditions.items():
+                conditions[c] = Condition(type=conditions[c].type, attributes=resolve_attributes(attrib, values))
+            trigger = Trigger(conditions=conditions)
+
+        speeds = event.speeds
+        if slots.speeds is not None:
+            speeds = self._numbers(slots.speeds, values)
+
+        return Event(name=event.name, trigger=trigger, speeds=speeds)
+
+    @staticmethod
+    def _numbers(raw_values: list[str], values: dict) -> list[float]:
+        numbers = (resolve_number(raw, values) for raw in raw_values)
+        return [n for n in numbers if n is not None]
+
@@ -0,0 +1,270 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+@dataclass
+class StageRecord:
+    """
+    Measurements of one pipeline stage for one scenario.
+
+    cpu_s is the CPU time of the thread that ran the stage. peak_bytes is
+    only set when memory tracing is on. cache is the tier that served the
+    stage ("memory", "disk", "miss" for the road network; "hit", "miss"
+    for the LLM response cache), or None when no cache was involved.
+    """
+    stage: str
+    wall_s: float
+    cpu_s: float
+    peak_bytes: int | None = None
+    cache: str | None = None
+    scenario: str | None = None
+
+
+# ----------------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------------
+
+class _Stage:
+    __slots__ = ("instrumentation", "name", "cache", "_wall", "_cpu", "_mem")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.cache = None
+
+    def note_cache(self, result: str | None) -> None:
+        self.cache = result
+
+    def __enter__(self):
+        if self.instrumentation.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        peak = None
+        if self.instrumentation.trace_memory:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - self._mem)
+
+        self.instrumentation.emit(StageRecord(self.name, wall, cpu, peak, self.cache))
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def note_cache(self, result: str | None) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """
+    Records wall time, CPU time and (optionally) peak allocated memory per
+    pipeline stage and hands each StageRecord to the sinks.
+
+    Usage:
+
+        with instrumentation.stage("parse") as stage:
+            ...
+            stage.note_cache("hit")
+
+    With buffer=True records are also kept until drain(), which is how
+    worker processes return their measurements with each batch record.
+    trace_memory uses tracemalloc, which slows Python code down noticeably.
+    """
+
+    enabled = True
+
+    def __init__(self, sinks: Iterable = (), trace_memory: bool = False, buffer: bool = False):
+        self.sinks = list(sinks)
+        self.trace_memory = trace_memory
+        self._buffer: List[StageRecord] | None = [] if buffer else None
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def emit(self, record: StageRecord) -> None:
+        if self._buffer is not None:
+            self._buffer.append(record)
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def drain(self) -> List[StageRecord]:
+        if not self._buffer:
+            return []
+        records, self._buffer = self._buffer, []
+        return records
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class NullInstrumentation:
+    """
+    Instrumentation that records nothing; the default everywhere.
+    """
+
+    enabled = False
+    sinks = ()
+    trace_memory = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def emit(self, record: StageRecord) -> None:
+        pass
+
+    def drain(self) -> List[StageRecord]:
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+# ----------------------------------------------------------------------
+# Aggregation
+# ----------------------------------------------------------------------
+
+def aggregate(records: Iterable[StageRecord]) -> Dict[str, dict]:
+    """
+    Per-stage totals: count, wall/CPU time, maximum peak memory and cache
+    results. Stages keep the order in which they were first seen.
+    """
+    summary = {}
+    for r in records:
+        s = summary.get(r.stage)
+        if s is None:
+            s = summary[r.stage] = {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+                                    "peak_bytes": None, "cache": {}}
+        s["count"] += 1
+        s["wall_s"] += r.wall_s
+        s["cpu_s"] += r.cpu_s
+        s["max_wall_s"] = max(s["max_wall_s"], r.wall_s)
+        if r.peak_bytes is not None:
+            s["peak_bytes"] = max(s["peak_bytes"] or 0, r.peak_bytes)
+        if r.cache is not None:
+            s["cache"][r.cache] = s["cache"].get(r.cache, 0) + 1
+    return summary
+
+
+def format_report(summary: Dict[str, dict]) -> str:
+    total_wall = sum(s["wall_s"] for s in summary.values()) or 1.0
+    lines = [
+        f"{'Stufe':<14} {'Anzahl':>7} {'Wall [s]':>10} {'Anteil':>7} {'Ø [ms]':>9} "
+        f"{'Max [ms]':>9} {'CPU [s]':>9} {'Peak [MiB]':>11}  Cache"
+    ]
+    for stage, s in summary.items():
+        peak = f"{s['peak_bytes'] / 2**20:.1f}" if s["peak_bytes"] is not None else "-"
+        cache = ", ".join(f"{k}={v}" for k, v in sorted(s["cache"].items())) or "-"
+        lines.append(
+            f"{stage:<14} {s['count']:>7} {s['wall_s']:>10.3f} {s['wall_s'] / total_wall:>7.1%} "
+            f"{s['wall_s'] / s['count'] * 1000:>9.2f} {s['max_wall_s'] * 1000:>9.2f} "
+            f"{s['cpu_s']:>9.3f} {peak:>11}  {cache}"
+        )
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Sinks
+# ----------------------------------------------------------------------
+
+class CollectorSink:
+    """
+    Keeps all records in memory, e.g. for the --profile report.
+    """
+
+    def __init__(self):
+        self.records: List[StageRecord] = []
+
+    def emit(self, record: StageRecord) -> None:
+        self.records.append(record)
+
+    def summary(self) -> Dict[str, dict]:
+        return aggregate(self.records)
+
+    def close(self) -> None:
+        pass
+
+
+class JSONLinesSink:
+    """
+    Appends one JSON object per record to a file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("a", encoding="utf-8")
+
+    def emit(self, record: StageRecord) -> None:
+        self._f.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class PrometheusTextSink:
+    """
+    Aggregates records and writes them in the Prometheus text exposition
+    format on close(), e.g. for the node_exporter textfile collector.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.collector = CollectorSink()
+
+    def emit(self, record: StageRecord) -> None:
+        self.collector.emit(record)
+
+    def close(self) -> None:
+        summary = self.collector.summary()
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        metric("scenario_stage_runs_total", "counter", "Number of stage executions.",
+               [({"stage": st}, s["count"]) for st, s in summary.items()])
+        metric("scenario_stage_wall_seconds_total", "counter", "Wall time spent per stage.",
+               [({"stage": st}, repr(s["wall_s"])) for st, s in summary.items()])
+        metric("scenario_stage_cpu_seconds_total", "counter", "CPU time spent per stage.",
+               [({"stage": st}, repr(s["cpu_s"])) for st, s in summary.items()])
+        metric("scenario_stage_peak_bytes", "gauge", "Largest peak allocation of a single stage run.",
+               [({"stage": st}, s["peak_bytes"]) for st, s in summary.items() if s["peak_bytes"] is not None])
+        metric("scenario_stage_cache_total", "counter", "Cache results per stage.",
+               [({"stage": st, "result": k}, v) for st, s in summary.items() for k, v in sorted(s["cache"].items())])
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.path)
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import random
+
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+from scenario_analysis.llm.openai_client import (
+    MODEL, TEMPERATURE, SYSTEM_MESSAGE, RESPONSE_MODES, RESULT_FORMAT, RESULT_KEYS,
+    CachedLLMClient, StreamingJSONObject, build_messages, parse_json_safely,
+)
+from scenario_analysis.llm.response_cache import LLMResponseCache
+
+
+# Errors worth retrying: rate limits and transient server/network failures
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+class AsyncOpenAIClient(CachedLLMClient):
+    """
+    asyncio counterpart of OpenAIClient.
+
+    - At most max_concurrency requests are in flight at any time
+    - Rate limits and transient errors are retried with exponential
+      backoff and jitter, honouring a Retry-After header when present
+    - base_url allows pointing the client at a local stub server
+    - cache / cache_only and response_mode / stop_after behave as for
+      OpenAIClient; in "fast" mode the stream is closed once the needed
+      keys are parsed
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        model: str = MODEL,
+        temperature: float = TEMPERATURE,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        cache: LLMResponseCache | None = None,
+        cache_only: bool = False,
+        response_mode: str = "fast",
+        stop_after: tuple[str, ...] | None = None,
+    ):
+        if cache_only and cache is None:
+            raise ValueError("cache_only requires a response cache")
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Unknown response mode {response_mode!r} (allowed: {', '.join(RESPONSE_MODES)})")
+        if stop_after is not None and (response_mode != "fast" or not set(stop_after) <= set(RESULT_KEYS)):
+            raise ValueError("stop_after requires the fast response mode and keys of RESULT_KEYS")
+
+        self.model = model
+        self.temperature = temperature
+        self.system_message = SYSTEM_MESSAGE
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.cache = cache
+        self.cache_only = cache_only
+        self.response_mode = response_mode
+        self.stop_after = stop_after
+        self.client = None
+
+        if not cache_only:
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("OPENAI_API_KEY not set")
+            # Retries are handled here, so the SDK must not retry on its own
+            self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def analyze_scenario(self, prompt: str) -> dict:
+        cached = self.cached_result(prompt)
+        if cached is not None:
+            return cached
+
+        async with self._semaphore:
+            if self.response_mode == "fast":
+                result = await self._stream_with_retry(prompt)
+            else:
+                result = parse_json_safely(await self._complete_with_retry(prompt))
+
+        self.remember(prompt, result)
+        return result
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+
+    # --------------------------------------------------
+    # Retry handling
+    # --------------------------------------------------
+
+    async def _complete_with_retry(self, prompt: str) -> str:
+        response = await self._create_with_retry(prompt)
+        return response.choices[0].message.content
+
+    async def _stream_with_retry(self, prompt: str) -> dict:
+        # Only opening the stream is retried; a stream that breaks off
+        # fails the request
+        stream = await self._create_with_retry(prompt, response_format=RESULT_FORMAT, stream=True)
+        reader = StreamingJSONObject(self.stop_after or RESULT_KEYS)
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content and reader.feed(chunk.choices[0].delta.content):
+                    break
+        finally:
+            # Closing the connection stops the generation
+            await stream.close()
+        return reader.result()
+
+    async def _create_with_retry(self, prompt: str, **options):
+        attempt = 0
+        while True:
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=build_messages(prompt, self.system_message),
+                    temperature=self.temperature,
+                    **options,
+                )
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logging.info(f"{type(e).__name__}, retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after is not None:
+                try:
+                    return min(self.max_delay, float(retry_after))
+                except ValueError:
+                    pass
+
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        # Full jitter keeps concurrent retries from synchronising
+        return random.uniform(0, delay)
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import time
+
+from scenario_analysis.llm.openai_client import (
+    MODEL, TEMPERATURE, SYSTEM_MESSAGE, RESULT_FORMAT, build_messages, parse_json_safely
+)
+
+
+FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+class OpenAIBatchClient:
+    """
+    Submits many prompts as one OpenAI Batch API job.
+
+    Intended for large corpora where latency does not matter: requests are
+    billed at the batch rate and do not count against the synchronous rate
+    limits. Prompts are identified by a caller-chosen custom_id.
+
+    With a response_format (e.g. RESULT_FORMAT for the "fast" response
+    mode), every request asks for structured output. Answers are not
+    streamed, so they are always complete.
+    """
+
+    def __init__(
+        self,
+        model: str = MODEL,
+        temperature: float = TEMPERATURE,
+        base_url: str | None = None,
+        completion_window: str = "24h",
+        response_format: dict | None = None,
+        client=None,
+    ):
+        self.model = model
+        self.temperature = temperature
+        self.system_message = SYSTEM_MESSAGE
+        self.completion_window = completion_window
+        self.response_format = response_format
+
+        if client is None:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("OPENAI_API_KEY not set")
+            from openai import OpenAI
+            client = OpenAI(api_key=api_key, base_url=base_url)
+        self.client = client
+
+    @classmethod
+    def for_client(cls, llm, **kwargs) -> "OpenAIBatchClient":
+        """
+        Batch client sending the requests llm would send (model,
+        temperature, system message, response mode) over its API client.
+        """
+        if llm.client is None:
+            raise RuntimeError("No API client in cache-only mode")
+        if llm.stop_after:
+            raise ValueError("Batch API answers are not streamed; stop_after is not supported")
+        batch_client = cls(
+            model=llm.model,
+            temperature=llm.temperature,
+            response_format=RESULT_FORMAT if llm.response_mode == "fast" else None,
+            client=llm.client,
+            **kwargs,
+        )
+        batch_client.system_message = llm.system_message
+        return batch_client
+
+    def submit(self, prompts: dict[str, str]) -> str:
+        """
+        Upload the prompts and start a batch job. Returns the batch id.
+        """
+        options = {"response_format": self.response_format} if self.response_format is not None else {}
+        lines = []
+        for custom_id, prompt in prompts.items():
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": build_messages(prompt, self.system_message),
+                    "temperature": self.temperature,
+                    **options,
+                },
+            }))
+
+        batch_input = self.client.files.create(
+            file=("scenario_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window,
+        )
+
+        logging.info(f"Submitted batch {batch.id} with {len(prompts)} prompts")
+        return batch.id
+
+    def wait(self, batch_id: str, poll_interval: float = 30.0, timeout: float | None = None):
+        """
+        Poll until the batch reaches a final state and return it.
+        """
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in FINAL_STATES:
+                return batch
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise TimeoutError(f"Batch {batch_id} still {batch.status} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def collect(self, batch_id: str) -> dict[str, dict]:
+        """
+        Return the parsed results of a finished batch, keyed by custom_id.
+
+        Requests that failed inside the batch are missing from the result.
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.output_file_id is None:
+            return {}
+
+        results = {}
+        content = self.client.files.content(batch.output_file_id).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                continue
+            raw_text = response["body"]["choices"][0]["message"]["content"]
+            results[item["custom_id"]] = parse_json_safely(raw_text)
+
+        return results
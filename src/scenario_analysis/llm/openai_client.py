@@ -1,64 +1,354 @@
 import os
 import json
 import re
-from openai import OpenAI
 
+from scenario_analysis.llm.response_cache import LLMResponseCache, ResponseCacheMiss, is_cacheable
 
-class OpenAIClient:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise RuntimeError("OPENAI_API_KEY not set")
 
-        self.client = OpenAI(api_key=api_key)
+MODEL = "gpt-4.1-mini"
+TEMPERATURE = 0.2
+SYSTEM_MESSAGE = (
+    "You are an expert in autonomous driving scenarios. "
+    "Always respond with valid JSON."
+)
+
+
+# Response modes. "fast": the result keys only, as schema-constrained
+# structured output read from a stream that is closed as soon as the
+# needed keys are in. "audit": free-form JSON including the step-by-step
+# reasoning_path, which is kept in the result.
+RESPONSE_MODES = ("fast", "audit")
+
+# Keys of a fast response, in the order they are generated: the risk
+# comes first, so the stream can be cut off after RISK_KEYS
+RESULT_KEYS = (
+    "riskEstimate", "riskLevel", "scenarioComplexity", "scenarioType",
+    "potentialRiskFactors", "interactionDescription",
+)
+RISK_KEYS = ("riskEstimate", "riskLevel")
+
+RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "riskEstimate": {"type": "number"},
+        "riskLevel": {"type": "string", "enum": ["low", "medium", "high"]},
+        "scenarioComplexity": {"type": "integer"},
+        "scenarioType": {"type": "string"},
+        "potentialRiskFactors": {"type": "array", "items": {"type": "string"}},
+        "interactionDescription": {"type": "string"},
+    },
+    "required": list(RESULT_KEYS),
+    "additionalProperties": False,
+}
+
+
+def json_schema_format(name: str, schema: dict) -> dict:
+    # response_format of a strict structured output request
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+RESULT_FORMAT = json_schema_format("scenario_analysis", RESULT_SCHEMA)
+
+
+def build_messages(prompt: str, system_message: str = SYSTEM_MESSAGE) -> list[dict]:
+    return [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class CachedLLMClient:
+    """
+    Response cache handling shared by OpenAIClient and AsyncOpenAIClient,
+    so both use the same keys and storage rules. Subclasses set model,
+    temperature, system_message, stop_after, cache and cache_only.
+    """
+
+    def cached_result(self, prompt: str) -> dict | None:
+        """
+        Cached response to prompt, None if there is none (or no cache);
+        raises ResponseCacheMiss on a miss in cache-only mode.
+        """
+        cache_key = self._cache_key(prompt)
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None and self.cache_only:
+            raise ResponseCacheMiss("No cached LLM response for this prompt (cache-only mode)")
+        return cached
+
+    def remember(self, prompt: str, result: dict) -> None:
+        """
+        Store a parsed response to prompt in the response cache, if any.
+        """
+        cache_key = self._cache_key(prompt)
+        if cache_key is not None and is_cacheable(result):
+            self.cache.put(cache_key, self.model, result)
+
+    def _cache_key(self, prompt: str) -> str | None:
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.model, self.temperature, self.system_message, prompt,
+                                   variant=stop_after_variant(self.stop_after))
+
+
+class OpenAIClient(CachedLLMClient):
+    """
+    Synchronous chat completions client.
+
+    With a response cache, identical requests are answered from the cache
+    and successful responses are stored. In cache_only mode no API client
+    is created at all (no key needed) and a miss raises ResponseCacheMiss,
+    which allows offline re-scoring.
+
+    response_mode is one of RESPONSE_MODES. In "fast" mode the answer is
+    streamed and reading stops once the keys of stop_after (default: all
+    RESULT_KEYS) are parsed; with stop_after=RISK_KEYS the descriptive
+    keys are never generated. Results cut short like this are cached
+    separately from full ones.
+
+    The openai package is imported on construction of the API client, so
+    importing this module (e.g. for the prompt helpers) stays cheap.
+    """
+
+    def __init__(
+        self,
+        model: str = MODEL,
+        temperature: float = TEMPERATURE,
+        base_url: str | None = None,
+        cache: LLMResponseCache | None = None,
+        cache_only: bool = False,
+        response_mode: str = "fast",
+        stop_after: tuple[str, ...] | None = None,
+    ):
+        if cache_only and cache is None:
+            raise ValueError("cache_only requires a response cache")
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Unknown response mode {response_mode!r} (allowed: {', '.join(RESPONSE_MODES)})")
+        if stop_after is not None and (response_mode != "fast" or not set(stop_after) <= set(RESULT_KEYS)):
+            raise ValueError("stop_after requires the fast response mode and keys of RESULT_KEYS")
+
+        self.model = model
+        self.temperature = temperature
+        self.system_message = SYSTEM_MESSAGE
+        self.cache = cache
+        self.cache_only = cache_only
+        self.response_mode = response_mode
+        self.stop_after = stop_after
+        self.client = None
+
+        if not cache_only:
+            api_key = os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise RuntimeError("OPENAI_API_KEY not set")
+            from openai import OpenAI
+            self.client = OpenAI(api_key=api_key, base_url=base_url)
 
     def analyze_scenario(self, prompt: str) -> dict:
+        cached = self.cached_result(prompt)
+        if cached is not None:
+            return cached
+
+        if self.response_mode == "fast":
+            result = self._stream_result(prompt)
+        else:
+            result = self._parse_json_safely(self.complete(prompt))
+        self.remember(prompt, result)
+        return result
+
+    def complete(self, prompt: str, response_format: dict | None = None) -> str:
+        """
+        The raw answer to prompt, bypassing the response cache (e.g. for
+        packed multi-scenario requests, whose items are cached one by one).
+        """
+        if self.client is None:
+            raise ResponseCacheMiss("No API client in cache-only mode")
+
+        options = {"response_format": response_format} if response_format is not None else {}
         response = self.client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert in autonomous driving scenarios. "
-                               "Always respond with valid JSON."
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
+            model=self.model,
+            messages=build_messages(prompt, self.system_message),
+            temperature=self.temperature,
+            **options,
         )
+        return response.choices[0].message.content
 
-        raw_text = response.choices[0].message.content
+    def _stream_result(self, prompt: str) -> dict:
+        if self.client is None:
+            raise ResponseCacheMiss("No API client in cache-only mode")
 
-        return self._parse_json_safely(raw_text)
+        reader = StreamingJSONObject(self.stop_after or RESULT_KEYS)
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=build_messages(prompt, self.system_message),
+            temperature=self.temperature,
+            response_format=RESULT_FORMAT,
+            stream=True,
+        )
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content and reader.feed(chunk.choices[0].delta.content):
+                    break
+        finally:
+            # Closing the connection stops the generation
+            stream.close()
+        return reader.result()
 
     # --------------------------------------------------
     # Robust JSON extraction
     # --------------------------------------------------
 
     def _parse_json_safely(self, text: str) -> dict:
-        """
-        Extract and parse JSON from an LLM response.
-        Falls back to raw text if parsing fails.
-        """
+        return parse_json_safely(text)
+
 
-        # 1. Remove Markdown fences ```json ... ```
-        cleaned = re.sub(r"```json|```", "", text).strip()
+def parse_json_safely(text: str) -> dict:
+    """
+    Extract and parse JSON from an LLM response.
+    Falls back to raw text if parsing fails.
+    """
 
-        # 2. Try direct JSON parsing
+    # 1. Remove Markdown fences ```json ... ```
+    cleaned = re.sub(r"```json|```", "", text).strip()
+
+    # 2. Try direct JSON parsing
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+
+    # 3. Try to extract first JSON object via regex
+    match = re.search(r"\{.*\}", cleaned, re.DOTALL)
+    if match:
         try:
-            return json.loads(cleaned)
+            return json.loads(match.group(0))
         except json.JSONDecodeError:
             pass
 
-        # 3. Try to extract first JSON object via regex
-        match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-        if match:
+    # 4. Fallback: return raw text
+    return {
+        "raw_llm_output": text,
+        "parsing_error": True
+    }
+
+
+def parse_json_items_safely(text: str) -> list[dict]:
+    """
+    Extract the objects of an LLM response that should be a JSON array
+    of objects. Tolerates Markdown fences, an object wrapping the array
+    and surrounding text; from a truncated or otherwise broken array,
+    every complete object is returned.
+    """
+    cleaned = re.sub(r"```json|```", "", text).strip()
+
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError:
+        parsed = None
+
+    if isinstance(parsed, dict):
+        # {"results": [...]} or a single object
+        lists = [v for v in parsed.values() if isinstance(v, list)]
+        parsed = lists[0] if len(lists) == 1 else [parsed]
+    if isinstance(parsed, list):
+        return [item for item in parsed if isinstance(item, dict)]
+
+    # Salvage the complete objects one by one
+    decoder = json.JSONDecoder()
+    items = []
+    pos = cleaned.find("{")
+    while pos != -1:
+        try:
+            item, end = decoder.raw_decode(cleaned, pos)
+        except json.JSONDecodeError:
+            pos = cleaned.find("{", pos + 1)
+            continue
+        if isinstance(item, dict):
+            items.append(item)
+        pos = cleaned.find("{", end)
+    return items
+
+
+def stop_after_variant(stop_after: tuple[str, ...] | None) -> str:
+    # Cache key variant of results that were cut short after these keys
+    return f"stop_after={','.join(stop_after)}" if stop_after else ""
+
+
+class StreamingJSONObject:
+    """
+    Incremental reader of a JSON object streamed in text deltas.
+
+    Top-level members are parsed as soon as their value is complete, so
+    the caller can stop reading once the wanted keys are in: feed()
+    returns True when all keys are parsed or the object is closed.
+    Text around the object (e.g. Markdown fences) is ignored.
+    """
+
+    def __init__(self, keys=RESULT_KEYS):
+        self.keys = tuple(keys)
+        self.members: dict = {}
+        self.closed = False
+        self._chunks: list[str] = []
+        # Text of the current top-level member
+        self._member: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    @property
+    def complete(self) -> bool:
+        return self.closed or all(key in self.members for key in self.keys)
+
+    def feed(self, delta: str) -> bool:
+        self._chunks.append(delta)
+        member = self._member
+        for char in delta:
+            if self.closed:
+                break
+            if self._in_string:
+                member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                # Text before the object
+                if char == "{":
+                    self._depth = 1
+            elif self._depth == 1 and char in ",}":
+                self._parse_member()
+                self.closed = char == "}"
+            else:
+                member.append(char)
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+        return self.complete
+
+    def _parse_member(self) -> None:
+        text = "".join(self._member)
+        self._member.clear()
+        if text.strip():
             try:
-                return json.loads(match.group(0))
+                self.members.update(json.loads("{" + text + "}"))
             except json.JSONDecodeError:
                 pass
 
-        # 4. Fallback: return raw text
-        return {
-            "raw_llm_output": text,
-            "parsing_error": True
-        }
+    def result(self) -> dict:
+        """
+        The parsed members once complete. A stream that ended before that
+        (truncated answer, no object at all) gives a parsing error result,
+        which is not cached.
+        """
+        if self.complete:
+            return dict(self.members)
+        return {"raw_llm_output": self.text, "parsing_error": True}
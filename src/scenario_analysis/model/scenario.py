@@ -1,52 +1,184 @@
 # src/scenario_analysis/model/scenario.py
 
+import sys
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import List, Dict, Mapping
 
+# The model classes use __slots__ and intern their type and name strings:
+# a corpus held in memory repeats the same few condition types, attribute
+# names and default names ("unnamed_event") thousands of times.
 
-@dataclass
+# Distinct condition attribute sets shared between Condition objects. The
+# table is bounded, so a corpus with unusually many distinct sets stops
+# sharing instead of growing without limit.
+_ATTRIBUTE_SETS: Dict[tuple, tuple] = {}
+_MAX_ATTRIBUTE_SETS = 1 << 16
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _shared_attributes(attributes: Mapping[str, str]) -> tuple:
+    return _share(tuple((sys.intern(k), _intern(v)) for k, v in attributes.items()))
+
+
+def _share(items: tuple) -> tuple:
+    shared = _ATTRIBUTE_SETS.get(items)
+    if shared is not None:
+        return shared
+    if len(_ATTRIBUTE_SETS) < _MAX_ATTRIBUTE_SETS:
+        _ATTRIBUTE_SETS[items] = items
+    return items
+
+
+@dataclass(slots=True)
 class Entity:
     name: str
     type: str
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.type = _intern(self.type)
 
-@dataclass
-class Condition:
-    type: str
-    attributes: Dict[str, str]
 
-
-@dataclass
+class Condition:
+    """
+    A trigger condition: its element type and attributes.
+
+    The attributes are stored as a shared tuple of (name, value) pairs;
+    the attributes property returns them as a new dict on every access,
+    so changes to that dict do not affect the condition.
+    """
+
+    __slots__ = ("type", "_attributes")
+
+    def __init__(self, type: str, attributes: Mapping[str, str]):
+        self.type = sys.intern(type)
+        self._attributes = _shared_attributes(attributes)
+
+    @classmethod
+    def from_items(cls, type: str, items: tuple) -> "Condition":
+        """
+        Condition whose attributes are given as a tuple of (name, value)
+        pairs of interned strings, e.g. the items of another condition;
+        skips building the pairs from a mapping.
+        """
+        condition = cls.__new__(cls)
+        condition.type = sys.intern(type)
+        condition._attributes = _share(items)
+        return condition
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        return dict(self._attributes)
+
+    @property
+    def items(self) -> tuple:
+        # The shared (name, value) pairs; do not modify
+        return self._attributes
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.type == other.type and self.attributes == other.attributes
+
+    def __repr__(self) -> str:
+        return f"Condition(type={self.type!r}, attributes={self.attributes!r})"
+
+    def __getstate__(self):
+        return self.type, self._attributes
+
+    def __setstate__(self, state):
+        type, attributes = state
+        self.type = sys.intern(type)
+        self._attributes = _shared_attributes(dict(attributes))
+
+
+@dataclass(slots=True)
 class Trigger:
     conditions: List[Condition] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class Event:
     name: str
     trigger: Trigger | None
     speeds: List[float] = field(default_factory=list)
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
 
-@dataclass
+
+@dataclass(slots=True)
 class Maneuver:
     name: str
     events: List[Event] = field(default_factory=list)
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
+
 
-@dataclass
+@dataclass(slots=True)
 class Act:
     name: str
     maneuvers: List[Maneuver] = field(default_factory=list)
 
+    def __post_init__(self):
+        self.name = _intern(self.name)
 
-@dataclass
+
+@dataclass(slots=True)
 class Story:
     name: str
     acts: List[Act] = field(default_factory=list)
 
-
-@dataclass
+    def __post_init__(self):
+        self.name = _intern(self.name)
+
+
+@dataclass(slots=True)
+class InitPosition:
+    """
+    Start position of an entity from a TeleportAction in the Init.
+
+    kind is "world" (x, y set) or "lane" / "road" (road_id and s set).
+    """
+    entity: str
+    kind: str
+    x: float | None = None
+    y: float | None = None
+    road_id: str | None = None
+    s: float | None = None
+
+    def __post_init__(self):
+        self.entity = _intern(self.entity)
+        self.kind = _intern(self.kind)
+        self.road_id = _intern(self.road_id)
+
+    @classmethod
+    def from_attributes(cls, entity: str, element: str, attrib: Mapping[str, str]) -> "InitPosition | None":
+        """
+        InitPosition from the attributes of a WorldPosition, LanePosition
+        or RoadPosition element; None for other position types or
+        unusable attributes.
+        """
+        try:
+            if element == "WorldPosition":
+                return cls(entity=entity, kind="world", x=float(attrib["x"]), y=float(attrib["y"]))
+            if element in ("LanePosition", "RoadPosition"):
+                return cls(
+                    entity=entity,
+                    kind="lane" if element == "LanePosition" else "road",
+                    road_id=attrib["roadId"],
+                    s=float(attrib["s"]),
+                )
+        except (KeyError, ValueError):
+            pass
+        return None
+
+
+@dataclass(slots=True)
 class Scenario:
     name: str
     author: str
@@ -54,3 +186,4 @@ class Scenario:
     entities: List[Entity] = field(default_factory=list)
     stories: List[Story] = field(default_factory=list)
     init_speeds: List[float] = field(default_factory=list)
+    init_positions: List[InitPosition] = field(default_factory=list)
@@ -0,0 +1,28 @@
+import json
+from pathlib import Path
+
+
+class BatchResultWriter:
+    """
+    Streams batch results into one aggregated JSON Lines file.
+
+    Every line is one scenario record as produced by the batch runner,
+    successful or not, so a corpus run always yields a single output file.
+    """
+
+    def __init__(self, output_path: str | Path):
+        self.output_path = Path(output_path)
+        self._file = None
+
+    def __enter__(self):
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.output_path.open("w", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        self._file = None
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
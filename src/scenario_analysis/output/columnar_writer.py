@@ -0,0 +1,316 @@
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+
+SCHEMA_FILE = "_schema.json"
+_PARTITION = re.compile(r"part-(\d+)")
+# Written outside the part-* pattern, so an interrupted compaction is
+# neither read nor counted as a partition
+_COMPACTING = ".compacting"
+
+# Fill values for rows that do not have a column (e.g. a trigger type that
+# never occurs in a scenario counts as 0)
+_MISSING = {"b": False, "i": 0, "f": np.nan, "U": ""}
+
+
+# ----------------------------------------------------------------------
+# Flattening
+# ----------------------------------------------------------------------
+
+def flatten_feature_vector(feature_vector: dict, prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten a feature vector into {column name: scalar or list}.
+
+    - Nested dicts become dotted columns (trigger_types.SimulationTimeCondition)
+    - Lists of scalars stay list columns (network_risk_summary.types_present)
+    - Lists of dicts become one list column per key (risk_hotspots.severity)
+
+    Empty lists are left out; readers see them as empty list entries.
+    """
+    flat = {}
+
+    for key, value in feature_vector.items():
+        name = f"{prefix}{key}"
+
+        if isinstance(value, dict):
+            flat.update(flatten_feature_vector(value, prefix=f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                continue
+            if all(isinstance(item, dict) for item in value):
+                keys = []
+                for item in value:
+                    keys.extend(k for k in item if k not in keys)
+                for k in keys:
+                    flat[f"{name}.{k}"] = [item.get(k) for item in value]
+            else:
+                flat[name] = list(value)
+        elif value is not None:
+            flat[name] = value
+
+    return flat
+
+
+def _infer_dtype(values: List[Any]) -> np.dtype:
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, (bool, np.bool_)) for v in present):
+        return np.dtype(bool)
+    if present and all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in present):
+        return np.dtype(np.int64)
+    if present and all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in present):
+        return np.dtype(np.float64)
+    return np.dtype(str)
+
+
+def _to_array(values: List[Any]) -> np.ndarray:
+    dtype = _infer_dtype(values)
+    fill = _MISSING[dtype.kind]
+    if dtype.kind == "U":
+        return np.array(["" if v is None else str(v) for v in values], dtype=str)
+    return np.array([fill if v is None else v for v in values], dtype=dtype)
+
+
+# ----------------------------------------------------------------------
+# List columns
+# ----------------------------------------------------------------------
+
+class ListColumn:
+    """
+    A column of variable-length lists stored Arrow-style as one flat values
+    array plus offsets: row i is values[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray):
+        self.values = values
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_lists(self) -> List[list]:
+        return [row.tolist() for row in self]
+
+    @classmethod
+    def from_lists(cls, rows: List[list | None]) -> "ListColumn":
+        lengths = [len(r) if r is not None else 0 for r in rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        values = _to_array([v for r in rows if r is not None for v in r])
+        return cls(values, offsets)
+
+
+def _concat_values(arrays: List[np.ndarray]) -> np.ndarray:
+    kinds = {a.dtype.kind for a in arrays}
+    if "U" in kinds and len(kinds) > 1:
+        arrays = [a.astype(str) for a in arrays]
+    return np.concatenate(arrays)
+
+
+# ----------------------------------------------------------------------
+# Writer
+# ----------------------------------------------------------------------
+
+class ColumnarFeatureWriter:
+    """
+    Appends flattened feature vectors to a partitioned columnar dataset.
+
+    Rows are buffered and written as one partition (a directory of .npy
+    column files) every rows_per_partition rows and on close(). Appending
+    to an existing dataset adds new partitions, so a corpus can be written
+    incrementally across runs.
+    """
+
+    def __init__(self, path: str | Path, rows_per_partition: int = 10_000):
+        self.path = Path(path)
+        self.rows_per_partition = rows_per_partition
+        self._rows: List[Dict[str, Any]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def append(self, feature_vector: dict, **extra) -> None:
+        row = flatten_feature_vector(extra)
+        row.update(flatten_feature_vector(feature_vector))
+        self._rows.append(row)
+        if len(self._rows) >= self.rows_per_partition:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+
+        names = []
+        for row in self._rows:
+            names.extend(n for n in row if n not in names)
+
+        columns = {}
+        for name in names:
+            values = [row.get(name) for row in self._rows]
+            if any(isinstance(v, list) for v in values):
+                # A scalar next to lists (e.g. potentialRiskFactors given
+                # as a single string) is a one-element list
+                columns[name] = ListColumn.from_lists(
+                    [v if v is None or isinstance(v, list) else [v] for v in values]
+                )
+            else:
+                columns[name] = _to_array(values)
+
+        write_partition(self._next_partition_dir(), columns, len(self._rows))
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+
+    def _next_partition_dir(self) -> Path:
+        self.path.mkdir(parents=True, exist_ok=True)
+        indices = [int(m.group(1)) for p in self.path.iterdir() if (m := _PARTITION.fullmatch(p.name))]
+        return self.path / f"part-{max(indices, default=-1) + 1:05d}"
+
+
+def write_partition(part_dir: Path, columns: Dict[str, np.ndarray | ListColumn], num_rows: int) -> None:
+    part_dir.mkdir(parents=True)
+    schema = {"num_rows": num_rows, "columns": {}}
+
+    # Column names may contain arbitrary characters, so files are numbered
+    for i, (name, column) in enumerate(columns.items()):
+        stem = f"c{i:05d}"
+        if isinstance(column, ListColumn):
+            np.save(part_dir / f"{stem}.values.npy", column.values)
+            np.save(part_dir / f"{stem}.offsets.npy", column.offsets)
+            schema["columns"][name] = {"file": stem, "kind": "list", "dtype": column.values.dtype.str}
+        else:
+            np.save(part_dir / f"{stem}.npy", column)
+            schema["columns"][name] = {"file": stem, "kind": "scalar", "dtype": column.dtype.str}
+
+    with (part_dir / SCHEMA_FILE).open("w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=2, ensure_ascii=False)
+
+
+# ----------------------------------------------------------------------
+# Reader
+# ----------------------------------------------------------------------
+
+class ColumnarFeatureReader:
+    """
+    Reads a dataset written by ColumnarFeatureWriter.
+
+    Column files are memory-mapped; a single-partition dataset (see
+    compact()) is returned without copying. Partitions lacking a column
+    are filled with 0 / NaN / False / "" for scalars and empty lists; a
+    column stored as scalars in one partition and as lists in another is
+    read as lists, with one-element rows for the scalars.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def partitions(self) -> List[Path]:
+        return sorted(p for p in self.path.glob("part-*") if (p / SCHEMA_FILE).exists())
+
+    def columns(self) -> List[str]:
+        names = []
+        for part in self.partitions():
+            names.extend(n for n in self._schema(part)["columns"] if n not in names)
+        return names
+
+    def read(self, columns: List[str] | None = None) -> Dict[str, np.ndarray | ListColumn]:
+        parts = [(p, self._schema(p)) for p in self.partitions()]
+        names = columns if columns is not None else self.columns()
+
+        result = {}
+        for name in names:
+            pieces = [self._load(p, schema, name) for p, schema in parts]
+            if all(piece is None for piece in pieces):
+                raise KeyError(f"Unknown column: {name}")
+            result[name] = self._combine(pieces, [schema["num_rows"] for _, schema in parts])
+        return result
+
+    def compact(self) -> None:
+        """
+        Rewrite all partitions into one, so reads are pure memory maps.
+        """
+        parts = self.partitions()
+        if len(parts) <= 1:
+            return
+
+        data = {name: self._materialize(col) for name, col in self.read().items()}
+        num_rows = sum(self._schema(p)["num_rows"] for p in parts)
+
+        tmp_dir = self.path / _COMPACTING
+        if tmp_dir.exists():
+            # Left over from an interrupted compaction
+            shutil.rmtree(tmp_dir)
+        write_partition(tmp_dir, data, num_rows)
+        for part in parts:
+            for f in part.iterdir():
+                f.unlink()
+            part.rmdir()
+        tmp_dir.rename(self.path / "part-00000")
+
+    # ------------------------------------------------------------------
+
+    def _schema(self, part: Path) -> dict:
+        with (part / SCHEMA_FILE).open(encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load(self, part: Path, schema: dict, name: str):
+        info = schema["columns"].get(name)
+        if info is None:
+            return None
+        if info["kind"] == "list":
+            return ListColumn(
+                np.load(part / f"{info['file']}.values.npy", mmap_mode="r"),
+                np.load(part / f"{info['file']}.offsets.npy", mmap_mode="r"),
+            )
+        return np.load(part / f"{info['file']}.npy", mmap_mode="r")
+
+    def _combine(self, pieces: list, row_counts: List[int]):
+        present = [p for p in pieces if p is not None]
+        is_list = any(isinstance(p, ListColumn) for p in present)
+
+        if len(pieces) == 1:
+            return pieces[0]
+
+        if is_list:
+            pieces = [
+                ListColumn(p, np.arange(len(p) + 1, dtype=np.int64)) if isinstance(p, np.ndarray) else p
+                for p in pieces
+            ]
+            values, offsets, base = [], [np.zeros(1, dtype=np.int64)], 0
+            for piece, n in zip(pieces, row_counts):
+                if piece is None:
+                    offsets.append(np.full(n, base, dtype=np.int64))
+                    continue
+                values.append(piece.values)
+                offsets.append(np.asarray(piece.offsets[1:]) - piece.offsets[0] + base)
+                base += len(piece.values)
+            return ListColumn(_concat_values(values), np.concatenate(offsets))
+
+        kinds = {p.dtype.kind for p in present}
+        kind = "U" if "U" in kinds else "f" if "f" in kinds else present[0].dtype.kind
+        filled = [
+            piece if piece is not None else np.full(n, _MISSING[kind], dtype=str if kind == "U" else None)
+            for piece, n in zip(pieces, row_counts)
+        ]
+        return _concat_values(filled)
+
+    @staticmethod
+    def _materialize(column):
+        if isinstance(column, ListColumn):
+            return ListColumn(np.asarray(column.values), np.asarray(column.offsets))
+        return np.asarray(column)
@@ -0,0 +1,26 @@
+import json
+from pathlib import Path
+
+
+class JSONFeatureWriter:
+    """
+    Writes a single feature vector as a pretty-printed JSON file.
+    """
+
+    def __init__(self, output_dir: str | Path):
+        self.output_dir = Path(output_dir)
+
+    def write(self, feature_vector: dict, scenario_name: str, source: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        output_path = self.output_dir / f"{scenario_name}.json"
+        payload = {
+            "scenario_name": scenario_name,
+            "source": source,
+            "features": feature_vector,
+        }
+
+        with output_path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+
+        return output_path
@@ -0,0 +1,69 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from scenario_analysis.pipeline.batch import ScenarioJob, ScenarioPipeline, error_record, ok_record
+
+
+class AsyncScenarioRunner:
+    """
+    Runs a corpus through one pipeline with overlapping LLM requests.
+
+    Parsing and road graph work run on a worker thread while the LLM
+    requests of other scenarios are in flight; the number of concurrent
+    requests is bounded by the async client. max_pending caps how many
+    scenarios are held in memory at once.
+
+    The deterministic stages share one thread because the parser and the
+    road graph cache of a pipeline are not meant for concurrent use.
+    The pipeline's semantic extractor must be backed by an async client
+    such as AsyncOpenAIClient.
+
+    Scenarios overlap, so stage measurements cannot be attributed to a
+    single record; they stay in the pipeline's instrumentation (see
+    ScenarioPipeline.profile()).
+    """
+
+    def __init__(self, pipeline: ScenarioPipeline, max_pending: int = 64):
+        self.pipeline = pipeline
+        self.max_pending = max_pending
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> list[dict]:
+        """
+        Run the jobs on a new event loop, then close the async client,
+        whose connections belong to that loop. arun() leaves closing to
+        the caller.
+        """
+        return asyncio.run(self._run_and_close(jobs))
+
+    async def _run_and_close(self, jobs: Iterable[ScenarioJob]) -> list[dict]:
+        try:
+            return await self.arun(jobs)
+        finally:
+            close = getattr(getattr(self.pipeline.semantic_extractor, "llm", None), "close", None)
+            if close is not None:
+                await close()
+
+    async def arun(self, jobs: Iterable[ScenarioJob]) -> list[dict]:
+        pending = asyncio.Semaphore(self.max_pending)
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="deterministic") as executor:
+
+            async def run_one(job: ScenarioJob) -> dict:
+                async with pending:
+                    try:
+                        return await self._run_job(job, executor)
+                    except Exception as e:
+                        return error_record(job, e)
+
+            # gather keeps the job order regardless of completion order
+            return await asyncio.gather(*(run_one(job) for job in jobs))
+
+    async def _run_job(self, job: ScenarioJob, executor: ThreadPoolExecutor) -> dict:
+        loop = asyncio.get_running_loop()
+        xodr = await loop.run_in_executor(executor, self.pipeline.resolve_xodr, job)
+        scenario = await loop.run_in_executor(executor, self.pipeline.parse, job.xosc)
+        builder = self.pipeline.builder(xodr)
+        feature_vector = await builder.abuild(scenario, executor)
+
+        return ok_record(job.xosc, xodr, feature_vector, builder)
@@ -0,0 +1,447 @@
+import csv
+import glob
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.openscenario_stream import StreamingOpenScenarioParser
+from scenario_analysis.ingestion.scenario_store import ScenarioStore
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.features.feature_vector import STAGES, FeatureVectorBuilder
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.instrumentation import Instrumentation, NULL_INSTRUMENTATION
+
+
+MANIFEST_SUFFIXES = {".csv", ".json", ".jsonl", ".txt"}
+
+# RoadNetworkEntry.source -> RoadGraphCache.stats() counter
+CACHE_COUNTERS = {"memory": "memory_hits", "disk": "disk_hits", "miss": "misses"}
+
+
+@dataclass(frozen=True)
+class ScenarioJob:
+    """
+    One (xosc, xodr) pair of a batch run.
+
+    If xodr is None, the road network is taken from the scenario's
+    RoadNetwork/LogicFile reference.
+    """
+    xosc: str
+    xodr: str | None = None
+
+
+# ----------------------------------------------------------------------
+# Job discovery
+# ----------------------------------------------------------------------
+
+def discover_jobs(source: str | Path, default_xodr: str | None = None) -> list[ScenarioJob]:
+    """
+    Build the job list from a directory, a glob pattern or a manifest file.
+
+    - Directory: every *.xosc below it (recursive)
+    - Manifest (.csv/.txt): rows of "xosc,xodr" (xodr optional, header optional)
+    - Manifest (.json/.jsonl): objects with "xosc" and optional "xodr" keys
+    - Anything else is treated as a glob pattern
+    """
+    path = Path(source)
+
+    if path.is_dir():
+        xosc_files = sorted(str(p) for p in path.rglob("*.xosc"))
+        return [ScenarioJob(xosc=f, xodr=default_xodr) for f in xosc_files]
+
+    if path.is_file() and path.suffix.lower() in MANIFEST_SUFFIXES:
+        return _read_manifest(path, default_xodr)
+
+    xosc_files = sorted(glob.glob(str(source), recursive=True))
+    return [ScenarioJob(xosc=f, xodr=default_xodr) for f in xosc_files]
+
+
+def _read_manifest(path: Path, default_xodr: str | None) -> list[ScenarioJob]:
+    base = path.parent
+
+    def resolve(p: str | None) -> str | None:
+        if not p:
+            return default_xodr
+        return str(base / p) if not Path(p).is_absolute() else p
+
+    jobs = []
+
+    if path.suffix.lower() in {".json", ".jsonl"}:
+        text = path.read_text(encoding="utf-8").strip()
+        if text.startswith("["):
+            entries = json.loads(text)
+        else:
+            entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+        for entry in entries:
+            jobs.append(ScenarioJob(xosc=resolve(entry["xosc"]), xodr=resolve(entry.get("xodr"))))
+        return jobs
+
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            row = [cell.strip() for cell in row]
+            if not row or not row[0] or row[0].startswith("#"):
+                continue
+            if row[0].lower() == "xosc":
+                continue  # header
+            xodr = row[1] if len(row) > 1 else None
+            jobs.append(ScenarioJob(xosc=resolve(row[0]), xodr=resolve(xodr)))
+
+    return jobs
+
+
+# ----------------------------------------------------------------------
+# Per-worker pipeline
+# ----------------------------------------------------------------------
+
+class ScenarioPipeline:
+    """
+    The extractors of one worker process.
+
+    Constructed once per worker and reused for every scenario the worker
+    handles, so imports, parser setup and the LLM client are paid per
+    process instead of per file.
+
+    With an enabled instrumentation (buffer=True), the stage measurements
+    of each scenario are returned in its record under "profile".
+
+    stages selects the feature stages (see STAGES); extractors of stages
+    that are not selected may be None. Without the road stage, no .xodr
+    is needed.
+
+    With a scenario_store, unchanged scenarios are loaded from their
+    stored binary form instead of being parsed from XML again.
+
+    With stage_threads > 0, the independent stages of each scenario
+    (parsing, road network, structural features + LLM request) run
+    concurrently on a thread pool of that size, created on first use;
+    not with memory tracing, which needs them one after another.
+    """
+
+    def __init__(
+        self,
+        parser: OpenScenarioXMLParser,
+        structural_extractor: BasicStatsExtractor | None,
+        semantic_extractor: AISemanticFeatureExtractor | None,
+        road_graph_extractor: RoadGraphExtractor | None,
+        road_graph_feature_extractor: RoadGraphFeatureExtractor | None,
+        road_graph_cache: RoadGraphCache | None = None,
+        risk_estimator: AccidentRiskEstimator | None = None,
+        instrumentation: Instrumentation | None = None,
+        local_radius: float | None = None,
+        stages: tuple[str, ...] = STAGES,
+        stage_threads: int = 0,
+        scenario_store: ScenarioStore | None = None,
+    ):
+        self.parser = parser
+        self.structural_extractor = structural_extractor
+        self.semantic_extractor = semantic_extractor
+        self.road_graph_extractor = road_graph_extractor
+        self.road_graph_feature_extractor = road_graph_feature_extractor
+        self.road_graph_cache = road_graph_cache
+        self.risk_estimator = risk_estimator or AccidentRiskEstimator()
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        self.local_radius = local_radius
+        self.stages = stages
+        self.stage_threads = stage_threads
+        self.scenario_store = scenario_store
+        self._executor: ThreadPoolExecutor | None = None
+
+    def resolve_xodr(self, job: ScenarioJob) -> str:
+        if job.xodr:
+            return job.xodr
+        logic_file = self.parser.find_logic_file(job.xosc)
+        if logic_file is None:
+            raise ValueError(f"No --xodr given and no RoadNetwork/LogicFile in {job.xosc}")
+        return str(logic_file)
+
+    def builder(self, xodr: str | None) -> FeatureVectorBuilder:
+        # Memory tracing measures stages one after another (see FeatureVectorBuilder)
+        if self.stage_threads > 0 and self._executor is None and not self.instrumentation.trace_memory:
+            self._executor = ThreadPoolExecutor(self.stage_threads, thread_name_prefix="stage")
+        return FeatureVectorBuilder(
+            structural_extractor=self.structural_extractor,
+            semantic_extractor=self.semantic_extractor,
+            road_graph_extractor=self.road_graph_extractor,
+            road_graph_feature_extractor=self.road_graph_feature_extractor,
+            xodr_path=xodr,
+            road_graph_cache=self.road_graph_cache,
+            risk_estimator=self.risk_estimator,
+            instrumentation=self.instrumentation,
+            local_radius=self.local_radius,
+            executor=self._executor,
+        )
+
+    def parse(self, xosc: str):
+        with self.instrumentation.stage("parse") as stage:
+            if self.scenario_store is None:
+                return self.parser.parse(xosc)
+            scenario, hit = self.scenario_store.get(xosc, self.parser)
+            stage.note_cache("hit" if hit else "miss")
+            return scenario
+
+    def profile(self) -> list[dict]:
+        """
+        Stage measurements recorded since the last call, as plain dicts.
+        """
+        return [asdict(r) for r in self.instrumentation.drain()]
+
+    def run(self, job: ScenarioJob, semantic: bool = True) -> dict:
+        """
+        Feature vector record of one job; semantic=False skips the LLM
+        even if the semantic stage is selected.
+        """
+        self.instrumentation.drain()
+        stages = self.stages if semantic else tuple(s for s in self.stages if s != "semantic")
+        xodr = self.resolve_xodr(job) if "road" in stages else job.xodr
+        builder = self.builder(xodr)
+        _, feature_vector = builder.parse_and_build(lambda: self.parse(job.xosc), stages)
+
+        record = ok_record(job.xosc, xodr, feature_vector, builder)
+        if self.instrumentation.enabled:
+            record["profile"] = self.profile()
+
+        return record
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """
+    Options for default_pipeline; picklable so it can be sent to workers.
+
+    - cache_dir: on-disk tier of the road graph cache (shared by workers)
+    - streaming: use the iterparse-based scenario parser
+    - async_llm: build the semantic extractor on AsyncOpenAIClient
+      (for AsyncScenarioRunner), with llm_concurrency requests in flight
+    - llm_cache: SQLite file of the LLM response cache
+    - llm_cache_only: answer from llm_cache only, never call the API
+    - profile: record per-stage timings (returned in each record's
+      "profile"); profile_memory adds tracemalloc peak memory
+    - local_radius: road features from the roads within this many meters
+      of the entity start positions only (see FeatureVectorBuilder)
+    - stages: feature stages to run; extractors (and the LLM client) of
+      other stages are not constructed
+    - scenario_store: directory of the binary store of parsed scenarios
+      (shared by workers), so unchanged .xosc files are not parsed again
+    - stage_threads: run the independent stages of a scenario on a thread
+      pool of this size (see ScenarioPipeline); 0 runs them in sequence,
+      as does profile_memory
+    - compact_prompts: summarize repeated structure in the LLM prompt;
+      prompt_token_budget (implies it) caps its estimated tokens (see
+      AISemanticFeatureExtractor)
+    - llm_reasoning: ask the LLM for its step-by-step reasoning and keep
+      it in the result ("audit" response mode); otherwise the answer is
+      streamed structured output without it ("fast", see OpenAIClient)
+    - llm_risk_only: in fast mode, stop reading the answer once the risk
+      keys (RISK_KEYS) are parsed
+    """
+    cache_dir: str | None = None
+    streaming: bool = False
+    async_llm: bool = False
+    llm_concurrency: int = 8
+    llm_cache: str | None = None
+    llm_cache_only: bool = False
+    llm_cache_ttl: float | None = None
+    llm_cache_max_entries: int | None = None
+    profile: bool = False
+    profile_memory: bool = False
+    local_radius: float | None = None
+    stages: tuple[str, ...] = STAGES
+    stage_threads: int = 0
+    scenario_store: str | None = None
+    compact_prompts: bool = False
+    prompt_token_budget: int | None = None
+    llm_reasoning: bool = False
+    llm_risk_only: bool = False
+
+
+def default_pipeline(
+    config: PipelineConfig = PipelineConfig(),
+    road_graph_cache: RoadGraphCache | None = None,
+) -> ScenarioPipeline:
+    """
+    Pipeline factory used by the CLI: the stages of config.stages, by
+    default the full pipeline including the LLM.
+
+    Every worker gets its own in-memory road graph cache (unless one is
+    passed in, e.g. shared by the threads of the scoring service) and its
+    own connection to the LLM response cache.
+    """
+    semantic_extractor = None
+    if "semantic" in config.stages:
+        semantic_extractor = AISemanticFeatureExtractor(
+            _llm_client(config),
+            compact=config.compact_prompts,
+            token_budget=config.prompt_token_budget,
+        )
+
+    road = "road" in config.stages
+    return ScenarioPipeline(
+        parser=StreamingOpenScenarioParser() if config.streaming else OpenScenarioXMLParser(),
+        structural_extractor=BasicStatsExtractor() if "structural" in config.stages else None,
+        semantic_extractor=semantic_extractor,
+        road_graph_extractor=RoadGraphExtractor() if road else None,
+        road_graph_feature_extractor=RoadGraphFeatureExtractor() if road else None,
+        road_graph_cache=(road_graph_cache or RoadGraphCache(cache_dir=config.cache_dir)) if road else None,
+        instrumentation=(
+            Instrumentation(trace_memory=config.profile_memory, buffer=True) if config.profile else None
+        ),
+        local_radius=config.local_radius,
+        stages=config.stages,
+        stage_threads=config.stage_threads,
+        scenario_store=ScenarioStore(config.scenario_store) if config.scenario_store else None,
+    )
+
+
+def _llm_client(config: PipelineConfig):
+    from scenario_analysis.llm.openai_client import RISK_KEYS
+    response = {
+        "response_mode": "audit" if config.llm_reasoning else "fast",
+        "stop_after": RISK_KEYS if config.llm_risk_only else None,
+    }
+
+    response_cache = None
+    if config.llm_cache:
+        from scenario_analysis.llm.response_cache import LLMResponseCache
+        response_cache = LLMResponseCache(
+            config.llm_cache,
+            ttl_seconds=config.llm_cache_ttl,
+            max_entries=config.llm_cache_max_entries,
+        )
+
+    if config.async_llm:
+        from scenario_analysis.llm.async_openai_client import AsyncOpenAIClient
+        return AsyncOpenAIClient(
+            max_concurrency=config.llm_concurrency,
+            cache=response_cache,
+            cache_only=config.llm_cache_only,
+            **response,
+        )
+
+    from scenario_analysis.llm.openai_client import OpenAIClient
+    return OpenAIClient(cache=response_cache, cache_only=config.llm_cache_only, **response)
+
+
+# Set once per worker process by _init_worker
+_worker_pipeline: ScenarioPipeline | None = None
+_worker_error: Exception | None = None
+
+
+def _init_worker(pipeline_factory: Callable[[], ScenarioPipeline]) -> None:
+    global _worker_pipeline, _worker_error
+    try:
+        _worker_pipeline, _worker_error = pipeline_factory(), None
+    except Exception as e:
+        # An exception in the initializer breaks the whole process pool;
+        # instead every job of the worker fails with it (e.g. a missing
+        # OPENAI_API_KEY)
+        _worker_pipeline, _worker_error = None, e
+
+
+def worker_pipeline() -> ScenarioPipeline:
+    """
+    The pipeline of the current worker (for functions passed to map());
+    raises the error of the pipeline factory if it failed.
+    """
+    if _worker_error is not None:
+        raise RuntimeError(f"Pipeline could not be created: {_worker_error}") from _worker_error
+    return _worker_pipeline
+
+
+def _run_job(job: ScenarioJob) -> dict:
+    """
+    Process one job with per-file error isolation.
+    """
+    try:
+        return worker_pipeline().run(job)
+    except Exception as e:
+        return error_record(job, e)
+
+
+def ok_record(xosc: str, xodr: str | None, feature_vector: dict, builder: FeatureVectorBuilder) -> dict:
+    """
+    Record of a scenario whose feature vector builder just built, with
+    the cache tier of its road network and its prompt size if known.
+    """
+    record = {
+        "xosc": xosc,
+        "xodr": xodr,
+        "status": "ok",
+        "feature_vector": feature_vector,
+    }
+
+    if builder.road_network_source is not None:
+        # Which tier served this scenario's road network
+        record["road_graph_cache"] = CACHE_COUNTERS[builder.road_network_source]
+
+    if builder.prompt_size is not None:
+        record["prompt_size"] = builder.prompt_size
+
+    return record
+
+
+def error_record(job: ScenarioJob, error: Exception) -> dict:
+    logging.error(f"Fehler bei {job.xosc}: {error}")
+    return {
+        "xosc": job.xosc,
+        "xodr": job.xodr,
+        "status": "error",
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+class BatchScenarioRunner:
+    """
+    Fans scenario jobs out over a process pool.
+
+    Results are yielded in job order. A failing scenario produces an
+    error record instead of aborting the run.
+    """
+
+    def __init__(
+        self,
+        pipeline_factory: Callable[[], ScenarioPipeline] = default_pipeline,
+        workers: int | None = None,
+        chunksize: int = 4,
+    ):
+        # The factory is sent to the workers, so it must be picklable
+        # (i.e. a module-level function).
+        self.pipeline_factory = pipeline_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> Iterator[dict]:
+        return self.map(_run_job, jobs)
+
+    def map(self, fn: Callable, items: Iterable) -> Iterator:
+        """
+        Apply a module-level function to every item inside the workers,
+        where it can use the worker's pipeline. Results keep item order.
+        """
+        items = list(items)
+
+        if self.workers == 1:
+            # In-process path, handy for debugging and small runs
+            _init_worker(self.pipeline_factory)
+            for item in items:
+                yield fn(item)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.pipeline_factory,),
+        ) as pool:
+            yield from pool.map(fn, items, chunksize=self.chunksize)
@@ -0,0 +1,98 @@
+from collections import Counter
+from typing import Iterable, Iterator
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.features.feature_vector import FeatureVectorBuilder
+from scenario_analysis.llm.response_cache import ResponseCacheMiss
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob, error_record, worker_pipeline
+from scenario_analysis.pipeline.dedup import PreparedScenario, prepare_scenario
+
+
+def _prepare_job(job: ScenarioJob) -> PreparedScenario:
+    try:
+        return prepare_scenario(worker_pipeline(), job)
+    except Exception as e:
+        return PreparedScenario(error_record(job, e))
+
+
+def _analyze_batch(item: tuple[list[str], float]) -> tuple[list[tuple[dict, bool] | None], str | None, list[dict]]:
+    prompts, poll_interval = item
+    pipeline = worker_pipeline()
+    pipeline.instrumentation.drain()
+    with pipeline.instrumentation.stage("llm"):
+        results, batch_id = pipeline.semantic_extractor.analyze_batch(prompts, poll_interval=poll_interval)
+    profile = pipeline.profile() if pipeline.instrumentation.enabled else []
+    return results, batch_id, profile
+
+
+class BatchAPIRunner:
+    """
+    Batch runner that submits the LLM requests of a corpus as one OpenAI
+    Batch API job (see AISemanticFeatureExtractor.analyze_batch).
+
+    Batch jobs are billed at a lower rate and do not count against the
+    synchronous rate limits, but may take up to the completion window
+    (24 hours) to finish; use it where latency does not matter.
+
+    Like PackedLLMRunner, the run has three passes over the wrapped
+    runner's workers: deterministic stages and prompt for every job, the
+    batch job (submitted, polled every poll_interval seconds and
+    collected in one worker), then the risk estimate per scenario. Each
+    record notes the id of the batch job under "llm_batch", unless all
+    prompts were answered from the response cache. With profiling, the
+    wall and CPU time of the "llm" stage are split evenly across the
+    scenarios.
+
+    The pipeline must include the semantic stage and use a synchronous
+    OpenAIClient without stop_after. Records are yielded in job order
+    once the batch job is done.
+    """
+
+    def __init__(
+        self,
+        runner: BatchScenarioRunner,
+        poll_interval: float = 30.0,
+        risk_estimator: AccidentRiskEstimator | None = None,
+    ):
+        self.runner = runner
+        self.poll_interval = poll_interval
+        self.finalizer = FeatureVectorBuilder(None, None, None, None, None, risk_estimator=risk_estimator)
+        self.stats: Counter = Counter()
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> Iterator[dict]:
+        prepared = list(self.runner.map(_prepare_job, jobs))
+        self.stats["scenarios"] += len(prepared)
+
+        ok = [i for i, item in enumerate(prepared) if item.prompt is not None]
+        if ok:
+            prompts = [prepared[i].prompt for i in ok]
+            [(results, batch_id, profile)] = self.runner.map(_analyze_batch, [(prompts, self.poll_interval)])
+        else:
+            results, batch_id, profile = [], None, []
+        if batch_id is not None:
+            self.stats["batch_jobs"] += 1
+        share = [
+            {**stage, "wall_s": stage["wall_s"] / len(ok), "cpu_s": stage["cpu_s"] / len(ok)}
+            for stage in profile
+        ]
+        semantic = dict(zip(ok, results))
+
+        for i, item in enumerate(prepared):
+            if i not in semantic:
+                yield item.record
+                continue
+
+            record = item.record
+            if semantic[i] is None:
+                # Not in the cache in cache-only mode
+                job = ScenarioJob(xosc=record["xosc"], xodr=record["xodr"])
+                yield error_record(job, ResponseCacheMiss("No cached LLM response for this prompt (cache-only mode)"))
+                continue
+            feature_vector = record["feature_vector"]
+            feature_vector["semantic_analysis"] = semantic[i][0]
+            record["feature_vector"] = self.finalizer.finalize(feature_vector, item.scenario_name)
+            if batch_id is not None:
+                record["llm_batch"] = batch_id
+            if share:
+                record.setdefault("profile", []).extend(dict(stage) for stage in share)
+            yield record
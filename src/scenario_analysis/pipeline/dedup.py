@@ -0,0 +1,172 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.features.feature_vector import FeatureVectorBuilder
+from scenario_analysis.features.fingerprint import FingerprintCollector, MinHasher, NearDuplicateIndex
+from scenario_analysis.pipeline.batch import (
+    BatchScenarioRunner, ScenarioJob, ScenarioPipeline, error_record, ok_record, worker_pipeline
+)
+
+
+# MinHash signature length; 16 LSH bands of 4 rows (see NearDuplicateIndex)
+NUM_PERM = 64
+
+
+@dataclass
+class PreparedScenario:
+    """
+    A scenario after the deterministic stages, waiting for its semantic
+    analysis. record is the batch record with the unfinished feature
+    vector (or the error record, with prompt None).
+    """
+    record: dict
+    scenario_name: str | None = None
+    prompt: str | None = None
+    digest: str | None = None
+    signature: np.ndarray | None = None
+
+
+def prepare_scenario(pipeline: ScenarioPipeline, job: ScenarioJob, near_duplicates: bool = False) -> PreparedScenario:
+    """
+    Deterministic stages, LLM prompt and structural fingerprint of one
+    job, from a single traversal. The MinHash signature is only computed
+    for near-duplicate detection.
+    """
+    pipeline.instrumentation.drain()
+    xodr = pipeline.resolve_xodr(job) if "road" in pipeline.stages else job.xodr
+    scenario = pipeline.parse(job.xosc)
+    builder = pipeline.builder(xodr)
+
+    fingerprint_collector = FingerprintCollector()
+    feature_vector, prompt = builder.prepare(scenario, pipeline.stages, [fingerprint_collector])
+    fingerprint = fingerprint_collector.result()
+
+    record = ok_record(job.xosc, xodr, feature_vector, builder)
+    if pipeline.instrumentation.enabled:
+        record["profile"] = pipeline.profile()
+
+    signature = MinHasher(NUM_PERM).signature(fingerprint.shingles) if near_duplicates else None
+    return PreparedScenario(record, scenario.name, prompt, fingerprint.digest, signature)
+
+
+def _prepare_job(item: tuple[ScenarioJob, bool]) -> PreparedScenario:
+    job, near_duplicates = item
+    try:
+        return prepare_scenario(worker_pipeline(), job, near_duplicates)
+    except Exception as e:
+        return PreparedScenario(error_record(job, e))
+
+
+def _analyze_prompt(prompt: str) -> tuple[dict | Exception, bool, list[dict]]:
+    pipeline = worker_pipeline()
+    pipeline.instrumentation.drain()
+    try:
+        semantic, ok = pipeline.builder(None).semantic_features(prompt)
+    except Exception as e:
+        # E.g. a cache miss in cache-only mode; fails the whole group
+        semantic, ok = e, False
+    return semantic, ok, pipeline.profile() if pipeline.instrumentation.enabled else []
+
+
+class DeduplicatingRunner:
+    """
+    Batch runner that sends one LLM request per group of structurally
+    identical scenarios and fans the answer out to the whole group.
+
+    Generated suites are full of variants that differ only in parameter
+    values, which the prompt does not contain. The run has three passes
+    over the wrapped runner's workers: deterministic stages plus
+    fingerprint for every job, one LLM request per group representative
+    (the first job of the group), then the risk estimate per scenario
+    with its group's semantic analysis.
+
+    With near_threshold, scenarios whose fingerprint shingles have an
+    estimated Jaccard similarity of at least near_threshold to a
+    representative join its group too (MinHash/LSH). Each record notes
+    its representative and whether it matched "exact" or "near".
+
+    The pipeline must include the semantic stage. Records are yielded in
+    job order once all LLM requests are done.
+    """
+
+    def __init__(
+        self,
+        runner: BatchScenarioRunner,
+        near_threshold: float | None = None,
+        risk_estimator: AccidentRiskEstimator | None = None,
+    ):
+        self.runner = runner
+        self.near_threshold = near_threshold
+        self.finalizer = FeatureVectorBuilder(None, None, None, None, None, risk_estimator=risk_estimator)
+        self.stats: Counter = Counter()
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> Iterator[dict]:
+        near = self.near_threshold is not None
+        prepared = list(self.runner.map(_prepare_job, [(job, near) for job in jobs]))
+
+        groups = self.group(prepared)
+        representatives = sorted({leader for leader, _ in groups if leader is not None})
+        answers = dict(zip(
+            representatives,
+            self.runner.map(_analyze_prompt, [prepared[i].prompt for i in representatives]),
+        ))
+
+        self.stats["scenarios"] += len(prepared)
+        self.stats["llm_requests"] += len(representatives)
+
+        for i, (item, (leader, match)) in enumerate(zip(prepared, groups)):
+            if leader is None:
+                yield item.record
+                continue
+
+            self.stats[match] += 1
+            semantic, _, profile = answers[leader]
+            record = item.record
+            if isinstance(semantic, Exception):
+                yield error_record(ScenarioJob(xosc=record["xosc"], xodr=record["xodr"]), semantic)
+                continue
+            feature_vector = record["feature_vector"]
+            feature_vector["semantic_analysis"] = dict(semantic)
+            record["feature_vector"] = self.finalizer.finalize(feature_vector, item.scenario_name)
+            record["llm_group"] = {"representative": prepared[leader].record["xosc"], "match": match}
+            if i == leader and profile:
+                record.setdefault("profile", []).extend(profile)
+            yield record
+
+    def group(self, prepared: list[PreparedScenario]) -> list[tuple[int | None, str | None]]:
+        """
+        (representative index, match) per prepared scenario, where match
+        is "representative", "exact" or "near"; (None, None) for failed
+        scenarios.
+        """
+        index = NearDuplicateIndex(self.near_threshold, NUM_PERM) if self.near_threshold is not None else None
+        # Representative of each digest, and of each signature in the index
+        by_digest: dict[str, int] = {}
+        indexed: list[int] = []
+
+        groups = []
+        for i, item in enumerate(prepared):
+            if item.prompt is None:
+                groups.append((None, None))
+                continue
+
+            if item.digest in by_digest:
+                groups.append((by_digest[item.digest], "exact"))
+                continue
+
+            similar = index.match(item.signature) if index is not None else None
+            if similar is not None:
+                leader, match = indexed[similar], "near"
+            else:
+                leader, match = i, "representative"
+                if index is not None:
+                    index.add(item.signature)
+                    indexed.append(i)
+
+            by_digest[item.digest] = leader
+            groups.append((leader, match))
+        return groups
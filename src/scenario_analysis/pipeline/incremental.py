@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scenario_analysis.pipeline.batch import (
+    BatchScenarioRunner, ScenarioJob, ScenarioPipeline, error_record, worker_pipeline
+)
+
+
+# Bump whenever structural or road feature extraction changes its output,
+# so stored stage results are recomputed
+FEATURE_CODE_VERSION = "2"
+
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path: str | Path, previous: dict | None = None) -> dict:
+    """
+    Content hash of a file plus the stat data it was computed from.
+
+    If size and mtime match the previous fingerprint, its hash is reused
+    instead of re-reading the file.
+    """
+    st = os.stat(path)
+    if previous and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        return previous
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+    return {"sha256": h.hexdigest(), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _digest(value):
+    return value.get("sha256") if isinstance(value, dict) else value
+
+
+def risk_config_hash(pipeline: ScenarioPipeline) -> str:
+    config = asdict(pipeline.risk_estimator.config)
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class IncrementalManifest:
+    """
+    Per-scenario record of the inputs and stage outputs of the last run.
+
+    Keyed by .xosc path. Each entry holds the file fingerprints of the
+    .xosc and .xodr, the prompt template and prompt hashes, the feature
+    code version and risk config hash, plus the stored outputs of the
+    structural, road and semantic stages.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data["entries"]
+
+    def get(self, xosc: str) -> dict | None:
+        return self.entries.get(xosc)
+
+    def put(self, xosc: str, entry: dict) -> None:
+        self.entries[xosc] = entry
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def run_incremental(pipeline: ScenarioPipeline, job: ScenarioJob, previous: dict | None) -> tuple[dict, dict]:
+    """
+    Bring one scenario up to date, recomputing only stages whose inputs
+    changed. Returns the batch record and the new manifest entry.
+
+    - structural: .xosc content or feature code version changed
+    - road: .xodr content, feature code version or local radius changed;
+      with a local radius also when the .xosc changed (start positions)
+    - semantic: prompt template changed, or the .xosc changed and yields
+      a different prompt; fallback results are always retried
+    - risk: always re-estimated from the (stored) stage outputs
+    """
+    previous = previous or {}
+    pipeline.instrumentation.drain()
+    old_inputs = previous.get("inputs", {})
+    stages = dict(previous.get("stages", {}))
+
+    xosc_fingerprint = file_fingerprint(job.xosc, old_inputs.get("xosc"))
+    if not job.xodr and previous.get("xodr") and _digest(xosc_fingerprint) == _digest(old_inputs.get("xosc")):
+        # Same scenario file, so the same LogicFile reference
+        xodr = previous["xodr"]
+    else:
+        xodr = pipeline.resolve_xodr(job)
+    builder = pipeline.builder(xodr)
+    semantic_extractor = pipeline.semantic_extractor
+
+    inputs = {
+        "xosc": xosc_fingerprint,
+        "xodr": file_fingerprint(xodr, old_inputs.get("xodr")),
+        "code": FEATURE_CODE_VERSION,
+        "local_radius": builder.local_radius,
+        "prompt_template": semantic_extractor.template_fingerprint(),
+        "prompt": old_inputs.get("prompt"),
+        "risk_config": risk_config_hash(pipeline),
+    }
+
+    def changed(*keys: str) -> bool:
+        # Files compare by content only; a touched file is not a change
+        return any(_digest(inputs[k]) != _digest(old_inputs.get(k)) for k in keys)
+
+    recomputed = []
+    scenario = None
+    scenario_name = previous.get("scenario_name")
+
+    def parsed():
+        nonlocal scenario, scenario_name
+        if scenario is None:
+            scenario = pipeline.parse(job.xosc)
+            scenario_name = scenario.name
+        return scenario
+
+    prompt = None
+    if "structural" not in stages or changed("xosc", "code"):
+        # The prompt is collected in the same traversal
+        stages["structural"], prompt = builder.structural_features_and_prompt(parsed())
+        recomputed.append("structural")
+
+    local = builder.local_radius is not None
+    if "road" not in stages or changed("xodr", "code", "local_radius") or (local and changed("xosc")):
+        stages["road"] = builder.road_features(parsed() if local else None)
+        recomputed.append("road")
+
+    semantic_ok = previous.get("semantic_ok", False)
+    if "semantic" not in stages or not semantic_ok or changed("xosc", "prompt_template"):
+        if prompt is None:
+            prompt = semantic_extractor.build_prompt(parsed())
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        reusable = (
+            "semantic" in stages
+            and semantic_ok
+            and prompt_hash == old_inputs.get("prompt")
+            and not changed("prompt_template")
+        )
+        if not reusable:
+            stages["semantic"], semantic_ok = builder.semantic_features(prompt)
+            recomputed.append("semantic")
+        inputs["prompt"] = prompt_hash
+
+    if recomputed or changed("risk_config"):
+        recomputed.append("risk")
+        feature_vector = builder.assemble(
+            stages["structural"], stages["road"], stages["semantic"], scenario_name
+        )
+    else:
+        feature_vector = previous["feature_vector"]
+
+    entry = {
+        "xodr": xodr,
+        "scenario_name": scenario_name,
+        "inputs": inputs,
+        "stages": stages,
+        "semantic_ok": semantic_ok,
+        "feature_vector": feature_vector,
+    }
+    record = {
+        "xosc": job.xosc,
+        "xodr": xodr,
+        "status": "ok",
+        "feature_vector": feature_vector,
+        "recomputed": recomputed,
+    }
+    if pipeline.instrumentation.enabled:
+        record["profile"] = pipeline.profile()
+    return record, entry
+
+
+def _run_incremental_job(item: tuple[ScenarioJob, dict | None]) -> tuple[dict, dict | None]:
+    job, previous = item
+    try:
+        return run_incremental(worker_pipeline(), job, previous)
+    except Exception as e:
+        return error_record(job, e), None
+
+
+class IncrementalRunner:
+    """
+    Batch runner that skips work already recorded in a manifest.
+
+    Unchanged scenarios cost a stat() per input file; the manifest is
+    saved after the run.
+    """
+
+    def __init__(self, runner: BatchScenarioRunner, manifest: IncrementalManifest):
+        self.runner = runner
+        self.manifest = manifest
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> Iterator[dict]:
+        items = [(job, self.manifest.get(job.xosc)) for job in jobs]
+        try:
+            for record, entry in self.runner.map(_run_incremental_job, items):
+                if entry is not None:
+                    self.manifest.put(record["xosc"], entry)
+                yield record
+        finally:
+            self.manifest.save()
@@ -0,0 +1,123 @@
+from collections import Counter
+from typing import Iterable, Iterator
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.features.feature_vector import FeatureVectorBuilder
+from scenario_analysis.features.semantic_ai import plan_packs
+from scenario_analysis.llm.response_cache import ResponseCacheMiss
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob, error_record, worker_pipeline
+from scenario_analysis.pipeline.dedup import PreparedScenario, prepare_scenario
+
+
+# Defaults: scenarios per request, and the estimated prompt tokens of a
+# request (descriptions plus instructions; the answer is not counted).
+# Checked against the word-piece estimate_tokens: small scenarios (about
+# 90-140 tokens per description) fill max_items long before the budget,
+# which only splits packs of large scenarios (700 tokens and more)
+MAX_ITEMS = 8
+TOKEN_BUDGET = 6000
+
+
+def _prepare_job(job: ScenarioJob) -> PreparedScenario:
+    try:
+        return prepare_scenario(worker_pipeline(), job)
+    except Exception as e:
+        return PreparedScenario(error_record(job, e))
+
+
+def _analyze_pack(items: list[tuple[str, str]]) -> tuple[list[tuple[dict, bool]], int, list[dict]]:
+    pipeline = worker_pipeline()
+    pipeline.instrumentation.drain()
+    extractor = pipeline.semantic_extractor
+    requests_before = extractor.packed_requests
+    with pipeline.instrumentation.stage("llm"):
+        results = extractor.analyze_packed(items)
+    profile = pipeline.profile() if pipeline.instrumentation.enabled else []
+    return results, extractor.packed_requests - requests_before, profile
+
+
+class PackedLLMRunner:
+    """
+    Batch runner that sends several scenarios per LLM request.
+
+    A single-scenario request repeats the system message and the long
+    instruction block for every scenario, and the per-request overhead
+    (latency, requests-per-minute limits) dominates for small scenarios.
+    Here the scenario descriptions are packed into requests of at most
+    max_items scenarios and token_budget estimated prompt tokens (see
+    plan_packs), and the JSON array answer is split back per scenario
+    (see AISemanticFeatureExtractor.analyze_packed).
+
+    Like DeduplicatingRunner, the run has three passes over the wrapped
+    runner's workers: deterministic stages and prompt for every job, one
+    packed request per pack, then the risk estimate per scenario. Each
+    record notes the size of its pack under "llm_pack". With profiling,
+    the wall and CPU time of a pack's "llm" stage are split evenly across
+    its scenarios, so per-stage totals stay those of the run.
+
+    The pipeline must include the semantic stage and use a synchronous
+    OpenAIClient. Records are yielded in job order once all requests are
+    done.
+    """
+
+    def __init__(
+        self,
+        runner: BatchScenarioRunner,
+        max_items: int = MAX_ITEMS,
+        token_budget: int = TOKEN_BUDGET,
+        risk_estimator: AccidentRiskEstimator | None = None,
+    ):
+        self.runner = runner
+        self.max_items = max_items
+        self.token_budget = token_budget
+        self.finalizer = FeatureVectorBuilder(None, None, None, None, None, risk_estimator=risk_estimator)
+        self.stats: Counter = Counter()
+
+    def run(self, jobs: Iterable[ScenarioJob]) -> Iterator[dict]:
+        prepared = list(self.runner.map(_prepare_job, jobs))
+
+        ok = [i for i, item in enumerate(prepared) if item.prompt is not None]
+        items = [(prepared[i].scenario_name, prepared[i].prompt) for i in ok]
+        packs = [[ok[j] for j in pack] for pack in plan_packs(items, self.token_budget, self.max_items)]
+        answers = self.runner.map(
+            _analyze_pack,
+            [[(prepared[i].scenario_name, prepared[i].prompt) for i in pack] for pack in packs],
+        )
+
+        semantic: dict[int, dict] = {}
+        pack_sizes: dict[int, int] = {}
+        profiles: dict[int, list[dict]] = {}
+        for pack, (results, requests, profile) in zip(packs, answers):
+            self.stats["packs"] += 1
+            self.stats["llm_requests"] += requests
+            for i, result in zip(pack, results):
+                # None: not in the cache in cache-only mode
+                semantic[i] = result[0] if result is not None else None
+                pack_sizes[i] = len(pack)
+            if profile:
+                share = [
+                    {**stage, "wall_s": stage["wall_s"] / len(pack), "cpu_s": stage["cpu_s"] / len(pack)}
+                    for stage in profile
+                ]
+                for i in pack:
+                    profiles[i] = share
+
+        self.stats["scenarios"] += len(prepared)
+
+        for i, item in enumerate(prepared):
+            if i not in semantic:
+                yield item.record
+                continue
+
+            record = item.record
+            if semantic[i] is None:
+                job = ScenarioJob(xosc=record["xosc"], xodr=record["xodr"])
+                yield error_record(job, ResponseCacheMiss("No cached LLM response for this prompt (cache-only mode)"))
+                continue
+            feature_vector = record["feature_vector"]
+            feature_vector["semantic_analysis"] = semantic[i]
+            record["feature_vector"] = self.finalizer.finalize(feature_vector, item.scenario_name)
+            record["llm_pack"] = {"size": pack_sizes[i]}
+            if i in profiles:
+                record.setdefault("profile", []).extend(dict(stage) for stage in profiles[i])
+            yield record
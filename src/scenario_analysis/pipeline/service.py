@@ -0,0 +1,226 @@
+import json
+import logging
+import queue
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from scenario_analysis.pipeline.batch import ScenarioJob, ScenarioPipeline, error_record
+
+
+class QueueFull(Exception):
+    """
+    Raised by ScoringService.submit when the work queue is at capacity.
+    """
+
+
+class ScoringService:
+    """
+    Long-running pool of scoring workers behind a bounded work queue.
+
+    The pipelines are built once when the service starts, one per worker
+    thread, and kept for its lifetime: imports, the LLM client with its
+    connection pool and the response cache stay warm. Pipelines built by
+    the factory should share one RoadGraphCache, so every road network is
+    parsed once per service instead of once per request.
+
+    submit() never blocks: a full queue raises QueueFull, so callers get
+    back-pressure instead of unbounded latency.
+    """
+
+    def __init__(
+        self,
+        pipeline_factory: Callable[[], ScenarioPipeline],
+        workers: int = 4,
+        queue_size: int = 64,
+    ):
+        self.pipeline_factory = pipeline_factory
+        self.workers = workers
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._pipelines: list[ScenarioPipeline] = []
+
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Seconds from submit() to result of the most recent requests
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    def start(self) -> "ScoringService":
+        # Built here rather than in the threads, so a broken setup (e.g.
+        # a missing API key) fails on startup instead of per request
+        self._pipelines = [self.pipeline_factory() for _ in range(self.workers)]
+        for i, pipeline in enumerate(self._pipelines):
+            thread = threading.Thread(target=self._work, args=(pipeline,), name=f"scoring-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self) -> None:
+        """
+        Let the workers finish the queued requests, then stop them.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def submit(self, job: ScenarioJob, semantic: bool = True) -> Future:
+        """
+        Queue a job; the future resolves to its batch record (status "ok"
+        or "error"). Without semantic, the LLM is skipped.
+        """
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((job, semantic, future, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull(f"Warteschlange voll ({self._queue.maxsize} Aufträge)") from None
+        return future
+
+    def score(self, job: ScenarioJob, semantic: bool = True, timeout: float | None = None) -> dict:
+        return self.submit(job, semantic).result(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": len(self._threads),
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "processed": self.processed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+            }
+        cache = self._pipelines[0].road_graph_cache if self._pipelines else None
+        if cache is not None:
+            stats["road_graph_cache"] = cache.stats()
+        return stats
+
+    def _work(self, pipeline: ScenarioPipeline) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            job, semantic, future, submitted = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                record = pipeline.run(job, semantic=semantic)
+            except Exception as e:
+                record = error_record(job, e)
+
+            with self._lock:
+                self.processed += 1
+                if record["status"] != "ok":
+                    self.failed += 1
+                self._latencies.append(time.perf_counter() - submitted)
+            future.set_result(record)
+
+
+# ----------------------------------------------------------------------
+# HTTP front end
+# ----------------------------------------------------------------------
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """
+    Local HTTP front end of a ScoringService.
+
+    - POST /score  {"xosc": ..., "xodr": ... (optional), "semantic": true}
+      returns the batch record (200, or 422 if the scenario failed);
+      503 if the queue is full, 504 if the request timed out
+    - GET /health  service and cache statistics
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: ScoringService, request_timeout: float = 300.0):
+        super().__init__(address, _ScoringRequestHandler)
+        self.service = service
+        self.request_timeout = request_timeout
+
+
+class _ScoringRequestHandler(BaseHTTPRequestHandler):
+    server: ScoringHTTPServer
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok", **self.server.service.stats()})
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unbekannter Pfad: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unbekannter Pfad: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job = ScenarioJob(xosc=request["xosc"], xodr=request.get("xodr"))
+            semantic = bool(request.get("semantic", True))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"Ungültige Anfrage: {e}"})
+            return
+
+        try:
+            future = self.server.service.submit(job, semantic)
+        except QueueFull as e:
+            self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}, {"Retry-After": "1"})
+            return
+
+        try:
+            record = future.result(self.server.request_timeout)
+        except TimeoutError:
+            future.cancel()
+            self._send(HTTPStatus.GATEWAY_TIMEOUT, {"error": "Zeitüberschreitung bei der Bewertung"})
+            return
+
+        status = HTTPStatus.OK if record["status"] == "ok" else HTTPStatus.UNPROCESSABLE_ENTITY
+        self._send(status, record)
+
+    def _send(self, status: HTTPStatus, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+
+def serve(service: ScoringService, host: str = "127.0.0.1", port: int = 8765,
+          request_timeout: float = 300.0) -> None:
+    """
+    Run the HTTP front end until interrupted, then drain the service.
+    """
+    with service, ScoringHTTPServer((host, port), service, request_timeout) as server:
+        logging.info(f"Bewertungsdienst läuft auf http://{host}:{server.server_address[1]} ({service.workers} Worker)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.info("Bewertungsdienst wird beendet...")
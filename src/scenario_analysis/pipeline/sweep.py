@@ -0,0 +1,62 @@
+from typing import Any, Iterable, Iterator, Mapping
+
+from scenario_analysis.pipeline.batch import ScenarioJob, ScenarioPipeline, error_record, ok_record
+
+
+class SweepRunner:
+    """
+    Runs the variants of one parameterized scenario through a pipeline.
+
+    The scenario is parsed once into a ScenarioTemplate and every variant
+    is bound from it in memory, so a sweep of thousands of parameter sets
+    reads the XML once. The road network comes from the pipeline's road
+    graph cache after the first variant. Parameter values do not change
+    the LLM prompt (names and types only), so the semantic stage runs
+    once per distinct prompt, normally once per sweep.
+    """
+
+    def __init__(self, pipeline: ScenarioPipeline):
+        self.pipeline = pipeline
+        self.llm_requests = 0
+
+    def run(self, job: ScenarioJob, bindings: Iterable[Mapping[str, Any]]) -> Iterator[dict]:
+        """
+        One record per parameter binding, in order; records carry the
+        variant index and its parameters. A binding that cannot be
+        resolved produces an error record. Errors of the scenario itself
+        (missing file, road network) and of the bindings iterable are
+        raised.
+        """
+        pipeline = self.pipeline
+        xodr = pipeline.resolve_xodr(job) if "road" in pipeline.stages else job.xodr
+        with pipeline.instrumentation.stage("parse"):
+            template = pipeline.parser.parse_template(job.xosc)
+        builder = pipeline.builder(xodr)
+        semantic = "semantic" in pipeline.stages
+        # Semantic analysis per prompt; fallback results are not kept, so
+        # the next variant asks the LLM again
+        analyses: dict[str, dict] = {}
+
+        for variant, parameters in enumerate(bindings):
+            parameters = dict(parameters)
+            try:
+                scenario = template.bind(parameters)
+                feature_vector, prompt = builder.prepare(scenario, pipeline.stages)
+                if semantic:
+                    analysis = analyses.get(prompt)
+                    if analysis is None:
+                        analysis, from_llm = builder.semantic_features(prompt)
+                        self.llm_requests += 1
+                        if from_llm:
+                            analyses[prompt] = analysis
+                    feature_vector["semantic_analysis"] = dict(analysis)
+                feature_vector = builder.finalize(feature_vector, scenario.name, semantic=semantic)
+                record = ok_record(job.xosc, xodr, feature_vector, builder)
+            except Exception as e:
+                record = error_record(job, e)
+
+            record["variant"] = variant
+            record["parameters"] = parameters
+            if pipeline.instrumentation.enabled:
+                record["profile"] = pipeline.profile()
+            yield record
@@ -0,0 +1,70 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable
+
+
+@dataclass(frozen=True)
+class StageTask:
+    """
+    One stage of a dependency graph: fn is called with the results of the
+    after stages, in that order.
+    """
+    name: str
+    fn: Callable[..., Any]
+    after: tuple[str, ...] = ()
+
+
+def run_stages(tasks: Iterable[StageTask], executor: Executor | None = None) -> Dict[str, Any]:
+    """
+    Run tasks in dependency order; the results by task name.
+
+    With an executor, every task is submitted as soon as the tasks it
+    depends on are done, so independent tasks (e.g. I/O-bound LLM request
+    and lxml parsing, which releases the GIL) overlap. Without one, tasks
+    run one after another in the given order, which must then respect the
+    dependencies.
+
+    If tasks fail, no further tasks are started, the running ones are
+    waited for and the exception of the first failed task (in the given
+    order) is raised, so errors do not depend on thread timing.
+    """
+    tasks = list(tasks)
+    names = {task.name for task in tasks}
+    for task in tasks:
+        missing = set(task.after) - names
+        if missing:
+            raise ValueError(f"Stage {task.name} depends on unknown stages: {', '.join(sorted(missing))}")
+
+    results: Dict[str, Any] = {}
+    if executor is None:
+        for task in tasks:
+            results[task.name] = task.fn(*(results[name] for name in task.after))
+        return results
+
+    pending = list(tasks)
+    running: Dict[Future, StageTask] = {}
+    errors: Dict[str, BaseException] = {}
+
+    while pending or running:
+        if not errors:
+            for task in [t for t in pending if all(name in results for name in t.after)]:
+                pending.remove(task)
+                future = executor.submit(task.fn, *(results[name] for name in task.after))
+                running[future] = task
+        if not running:
+            if errors:
+                break
+            raise ValueError(f"Cyclic stage dependencies: {', '.join(t.name for t in pending)}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = running.pop(future)
+            error = future.exception()
+            if error is not None:
+                errors[task.name] = error
+            else:
+                results[task.name] = future.result()
+
+    if errors:
+        raise next(errors[task.name] for task in tasks if task.name in errors)
+    return results
@@ -0,0 +1,258 @@
+import json
+import re
+from email.parser import BytesParser
+from email.policy import HTTP
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+from scenario_analysis.pipeline.batch import ScenarioPipeline
+
+# Test data and the stub pipeline shared by the test modules
+DATA = Path(__file__).parent / "data"
+XOSC = DATA / "xosc" / "CutIn.xosc"
+XODR = DATA / "xodr" / "junction.xodr"
+
+
+class StubLLM:
+    def analyze_scenario(self, prompt: str) -> dict:
+        return {"riskEstimate": 0.4, "riskLevel": "medium"}
+
+
+def stub_pipeline() -> ScenarioPipeline:
+    # Module-level, so it can be sent to batch worker processes
+    return ScenarioPipeline(
+        parser=OpenScenarioXMLParser(),
+        structural_extractor=BasicStatsExtractor(),
+        semantic_extractor=AISemanticFeatureExtractor(StubLLM()),
+        road_graph_extractor=RoadGraphExtractor(),
+        road_graph_feature_extractor=RoadGraphFeatureExtractor(),
+    )
+
+
+class OpenAIStub:
+    """
+    Minimal local stand-in for the OpenAI chat completions endpoint.
+
+    reply(request_body) returns the assistant message content; the first
+    rate_limited requests are answered with HTTP 429. Requests with
+    stream=True are answered as server-sent events, one chunk per token.
+    Every token takes token_delay seconds to "generate"; output_tokens
+    counts the tokens sent (a stream closed early by the client stops).
+
+    The Batch API endpoints (file upload, batch creation and retrieval,
+    file content) answer every request of a batch with reply(); a batch
+    reports "in_progress" once before it is "completed". The bodies of
+    batch requests are recorded in requests too, batches counts the jobs.
+    """
+
+    def __init__(self):
+        self.reply = lambda body: json.dumps({"riskEstimate": 0.4, "riskLevel": "medium"})
+        self.rate_limited = 0
+        self.delay = 0.0
+        self.token_delay = 0.0
+        self.output_tokens = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.batches = 0
+        self._files = {}
+        self._batches = {}
+        self._lock = threading.Lock()
+        self.server = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def handle(self, handler: BaseHTTPRequestHandler) -> None:
+        length = int(handler.headers.get("content-length", 0))
+        data = handler.rfile.read(length)
+        if handler.path.endswith("/files"):
+            self._upload(handler, data)
+            return
+        body = json.loads(data or b"{}")
+        if handler.path.endswith("/batches"):
+            self._create_batch(handler, body)
+            return
+
+        with self._lock:
+            self.requests.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            limited = self.rate_limited > 0
+            if limited:
+                self.rate_limited -= 1
+        try:
+            time.sleep(self.delay)
+            if limited:
+                self._send(handler, 429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                           {"retry-after": "0"})
+                return
+            content = self.reply(body)
+            if body.get("stream"):
+                self._stream(handler, body, content)
+                return
+            tokens = _tokens(content)
+            time.sleep(self.token_delay * len(tokens))
+            with self._lock:
+                self.output_tokens += len(tokens)
+            self._send(handler, 200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            })
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def handle_get(self, handler: BaseHTTPRequestHandler) -> None:
+        parts = handler.path.split("/")
+        if parts[-2] == "batches":
+            self._send(handler, 200, self._retrieve_batch(parts[-1]))
+        else:
+            # /files/{id}/content
+            data = self._files[parts[-2]]
+            handler.send_response(200)
+            handler.send_header("content-type", "application/octet-stream")
+            handler.send_header("content-length", str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+
+    def _upload(self, handler, data):
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"content-type: {handler.headers['content-type']}\r\n\r\n".encode("ascii") + data
+        )
+        content = next(part.get_content() for part in message.iter_parts() if part.get_filename())
+        with self._lock:
+            file_id = f"file-{len(self._files)}"
+            self._files[file_id] = content if isinstance(content, bytes) else content.encode("utf-8")
+        self._send(handler, 200, {
+            "id": file_id, "object": "file", "bytes": len(self._files[file_id]), "created_at": 0,
+            "filename": "batch.jsonl", "purpose": "batch", "status": "processed",
+        })
+
+    def _create_batch(self, handler, body):
+        with self._lock:
+            self.batches += 1
+            batch_id = f"batch-{self.batches}"
+            self._batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+                "input_file_id": body["input_file_id"], "completion_window": body["completion_window"],
+                "status": "in_progress", "created_at": 0, "output_file_id": None,
+            }
+            batch = dict(self._batches[batch_id])
+        self._send(handler, 200, batch)
+
+    def _retrieve_batch(self, batch_id):
+        with self._lock:
+            batch = self._batches[batch_id]
+            if batch["status"] == "completed":
+                return dict(batch)
+            if batch["output_file_id"] is None and batch.get("polled"):
+                batch["status"] = "completed"
+                batch["output_file_id"] = self._run_batch(batch["input_file_id"])
+            batch["polled"] = True
+            return {key: value for key, value in batch.items() if key != "polled"}
+
+    def _run_batch(self, input_file_id):
+        # Called with the lock held
+        lines = []
+        for line in self._files[input_file_id].decode("utf-8").splitlines():
+            request = json.loads(line)
+            self.requests.append(request["body"])
+            lines.append(json.dumps({
+                "id": f"response-{len(lines)}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply(request["body"])}}],
+                }},
+                "error": None,
+            }))
+        output_id = f"file-{len(self._files)}"
+        self._files[output_id] = "\n".join(lines).encode("utf-8")
+        return output_id
+
+    def _stream(self, handler, body, content):
+        handler.send_response(200)
+        handler.send_header("content-type", "text/event-stream")
+        handler.end_headers()
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        try:
+            handler.wfile.write(event({"role": "assistant", "content": ""}))
+            for token in _tokens(content):
+                time.sleep(self.token_delay)
+                handler.wfile.write(event({"content": token}))
+                handler.wfile.flush()
+                with self._lock:
+                    self.output_tokens += 1
+            handler.wfile.write(event({}, "stop") + b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client closed the stream
+            pass
+
+    def _send(self, handler, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("content-type", "application/json")
+        handler.send_header("content-length", str(len(data)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+def _tokens(text: str) -> list[str]:
+    # Words, numbers and single symbols, with their leading whitespace
+    return re.findall(r"\s*(?:\w+|[^\w\s])", text) or [text]
+
+
+@pytest.fixture
+def openai_stub(monkeypatch):
+    stub = OpenAIStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            stub.handle(self)
+
+        def do_GET(self):
+            stub.handle_get(self)
+
+        def log_message(self, *args):
+            pass
+
+    stub.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    try:
+        yield stub
+    finally:
+        stub.server.shutdown()
+        stub.server.server_close()
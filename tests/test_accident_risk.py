@@ -0,0 +1,45 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator, RiskConfig
+from scenario_analysis.analysis.accident_risk_batch import BatchAccidentRiskEstimator, feature_table
+
+
+def _feature_vectors(n):
+    rng = random.Random(7)
+    risks = [0.1, 0.75, 1.3, "high", "Moderate risk", "unknown", None]
+    return [
+        {
+            "num_entities": rng.randint(0, 15),
+            "num_roads": rng.randint(0, 80),
+            "num_intersections": rng.randint(0, 12),
+            "num_triggers": rng.randint(0, 20),
+            "max_speed_ms": rng.uniform(0, 45),
+            "risk_hotspots": [{"severity": rng.choice([0.5, 0.7, 0.8])} for _ in range(rng.randint(0, 9))],
+            "semantic_analysis": {"riskEstimate": rng.choice(risks)},
+        }
+        for _ in range(n)
+    ]
+
+
+def test_batch_estimate_matches_scalar_estimator():
+    vectors = _feature_vectors(200)
+    result = BatchAccidentRiskEstimator().estimate(feature_table(vectors))
+
+    scalar = AccidentRiskEstimator()
+    assert result["Rstruct"].tolist() == [scalar.structural_risk(fv) for fv in vectors]
+    assert [round(v, 3) for v in result["Rfinal"].tolist()] == [scalar.estimate(fv) for fv in vectors]
+
+
+def test_grid_evaluates_every_configuration():
+    vectors = _feature_vectors(50)
+    configs = [RiskConfig(), replace(RiskConfig(), w_struct=0.5, w_llm=0.5), replace(RiskConfig(), max_speed=20.0)]
+
+    grid = BatchAccidentRiskEstimator().estimate_grid(feature_table(vectors), configs)
+
+    assert grid["Rfinal"].shape == (3, 50)
+    for row, config in zip(grid["Rfinal"], configs):
+        estimator = AccidentRiskEstimator(config)
+        assert np.allclose(row, [estimator.estimate(fv) for fv in vectors], atol=5e-4)
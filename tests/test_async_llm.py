@@ -0,0 +1,75 @@
+import asyncio
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+from scenario_analysis.llm.async_openai_client import AsyncOpenAIClient
+from scenario_analysis.llm.openai_client import RISK_KEYS, OpenAIClient
+from scenario_analysis.llm.response_cache import LLMResponseCache
+from scenario_analysis.pipeline.async_runner import AsyncScenarioRunner
+from scenario_analysis.pipeline.batch import ScenarioJob, ScenarioPipeline
+
+from conftest import XOSC
+
+
+def test_concurrency_is_bounded_and_rate_limits_are_retried(openai_stub):
+    openai_stub.delay = 0.05
+    openai_stub.rate_limited = 2
+    client = AsyncOpenAIClient(max_concurrency=2, base_delay=0.01, base_url=openai_stub.base_url)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(client.analyze_scenario(f"prompt {i}") for i in range(6)))
+        finally:
+            await client.close()
+
+    results = asyncio.run(run())
+
+    assert results == [{"riskEstimate": 0.4, "riskLevel": "medium"}] * 6
+    assert len(openai_stub.requests) == 8
+    assert openai_stub.max_in_flight == 2
+
+
+def test_async_runner_builds_feature_vectors(openai_stub):
+    pipeline = ScenarioPipeline(
+        parser=OpenScenarioXMLParser(),
+        structural_extractor=BasicStatsExtractor(),
+        semantic_extractor=AISemanticFeatureExtractor(
+            AsyncOpenAIClient(max_concurrency=4, base_url=openai_stub.base_url)
+        ),
+        road_graph_extractor=RoadGraphExtractor(),
+        road_graph_feature_extractor=RoadGraphFeatureExtractor(),
+        road_graph_cache=RoadGraphCache(),
+    )
+    jobs = [ScenarioJob(xosc=str(XOSC)), ScenarioJob(xosc="missing.xosc", xodr="missing.xodr")]
+
+    records = AsyncScenarioRunner(pipeline).run(jobs)
+    assert pipeline.semantic_extractor.llm.client.is_closed()
+
+    assert [r["status"] for r in records] == ["ok", "error"]
+    feature_vector = records[0]["feature_vector"]
+    assert feature_vector["semantic_analysis"] == {"riskEstimate": 0.4, "riskLevel": "medium"}
+    assert list(feature_vector)[-3:] == ["semantic_analysis", "scenario_name", "accident_probability"]
+    # Same record fields as the synchronous pipeline
+    assert records[0]["road_graph_cache"] == "misses"
+    assert records[0]["prompt_size"]["tokens"] > 0
+
+
+def test_async_and_sync_clients_share_cache_entries(openai_stub, tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    for stop_after in (None, RISK_KEYS):
+        OpenAIClient(base_url=openai_stub.base_url, cache=cache, stop_after=stop_after).analyze_scenario("prompt")
+    requests = len(openai_stub.requests)
+
+    async def run(stop_after):
+        client = AsyncOpenAIClient(base_url=openai_stub.base_url, cache=cache, stop_after=stop_after)
+        try:
+            return await client.analyze_scenario("prompt")
+        finally:
+            await client.close()
+
+    assert asyncio.run(run(None)) == asyncio.run(run(RISK_KEYS)) == {"riskEstimate": 0.4, "riskLevel": "medium"}
+    assert len(openai_stub.requests) == requests
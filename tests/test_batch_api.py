@@ -0,0 +1,67 @@
+import json
+import shutil
+import sys
+
+from scenario_analysis.benchmark.synthetic import generate_openscenario
+from scenario_analysis.cli import main
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.llm.openai_client import OpenAIClient
+from scenario_analysis.llm.response_cache import LLMResponseCache
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob
+from scenario_analysis.pipeline.batch_api import BatchAPIRunner
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def test_batch_api_runner_submits_one_job_and_caches_answers(openai_stub, tmp_path):
+    paths = [generate_openscenario(tmp_path / f"scenario{i}.xosc", num_entities=2 + i) for i in range(3)]
+    copy = tmp_path / "copy" / "CutIn.xosc"
+    copy.parent.mkdir()
+    shutil.copy(XOSC, copy)
+    jobs = [ScenarioJob(xosc=str(p), xodr=str(XODR)) for p in [*paths, XOSC, copy]]
+    jobs.append(ScenarioJob(xosc="missing.xosc", xodr=str(XODR)))
+    cache_path = tmp_path / "llm.sqlite"
+
+    def pipeline():
+        p = stub_pipeline()
+        p.semantic_extractor = AISemanticFeatureExtractor(
+            OpenAIClient(base_url=openai_stub.base_url, cache=LLMResponseCache(cache_path))
+        )
+        return p
+
+    runner = BatchAPIRunner(BatchScenarioRunner(pipeline, workers=1), poll_interval=0.01)
+    records = list(runner.run(jobs))
+
+    assert [r["status"] for r in records] == ["ok"] * 5 + ["error"]
+    assert {r["llm_batch"] for r in records[:5]} == {"batch-1"}
+    assert openai_stub.batches == 1
+    # Identical prompts are submitted once, as structured output requests
+    assert len(openai_stub.requests) == 4
+    assert all("response_format" in body for body in openai_stub.requests)
+    assert records[3]["feature_vector"] == stub_pipeline().run(jobs[3])["feature_vector"]
+    assert dict(runner.stats) == {"scenarios": 6, "batch_jobs": 1}
+
+    # A second run is answered from the response cache
+    records = list(BatchAPIRunner(BatchScenarioRunner(pipeline, workers=1)).run(jobs[:5]))
+    assert [r["status"] for r in records] == ["ok"] * 5
+    assert not any("llm_batch" in r for r in records)
+    assert openai_stub.batches == 1
+
+
+def test_cli_batch_with_batch_api(openai_stub, tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i in range(2):
+        generate_openscenario(input_dir / f"scenario{i}.xosc", num_entities=2 + i)
+    output = tmp_path / "features.jsonl"
+    monkeypatch.setenv("OPENAI_BASE_URL", openai_stub.base_url)
+    monkeypatch.setattr(sys, "argv", [
+        "cli.py", "batch", "--input", str(input_dir), "--xodr", str(XODR), "--output", str(output),
+        "--workers", "1", "--llm-batch-api", "--llm-batch-poll", "0.01",
+    ])
+
+    main()
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["llm_batch"] for r in records] == ["batch-1"] * 2
+    assert openai_stub.batches == 1
@@ -0,0 +1,72 @@
+import json
+from pathlib import Path
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.pipeline.batch import (
+    BatchScenarioRunner, ScenarioJob, ScenarioPipeline, discover_jobs
+)
+
+from conftest import DATA, XODR, XOSC, stub_pipeline
+
+
+def test_discover_jobs_from_directory_and_manifest(tmp_path):
+    jobs = discover_jobs(DATA / "xosc")
+    assert jobs == [ScenarioJob(xosc=str(XOSC), xodr=None)]
+
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(f"xosc,xodr\n{XOSC},{XODR}\n", encoding="utf-8")
+    assert discover_jobs(manifest) == [ScenarioJob(xosc=str(XOSC), xodr=str(XODR))]
+
+
+def test_batch_isolates_failures_and_keeps_order(tmp_path):
+    jobs = [
+        ScenarioJob(xosc=str(XOSC)),
+        ScenarioJob(xosc=str(tmp_path / "missing.xosc"), xodr=str(XODR)),
+        ScenarioJob(xosc=str(XOSC), xodr=str(XODR)),
+    ]
+
+    records = list(BatchScenarioRunner(stub_pipeline, workers=2, chunksize=1).run(jobs))
+
+    assert [r["status"] for r in records] == ["ok", "error", "ok"]
+    assert Path(records[0]["xodr"]) == XODR.resolve()
+    assert records[0]["feature_vector"]["num_entities"] == 3
+    assert records[0]["feature_vector"] == records[2]["feature_vector"]
+    json.dumps(records)
+
+
+def _pipeline_without_api_key() -> ScenarioPipeline:
+    raise RuntimeError("OPENAI_API_KEY not set")
+
+
+def test_failing_pipeline_factory_gives_error_records():
+    jobs = [ScenarioJob(xosc=str(XOSC), xodr=str(XODR))] * 3
+
+    records = list(BatchScenarioRunner(_pipeline_without_api_key, workers=2, chunksize=1).run(jobs))
+
+    assert [r["status"] for r in records] == ["error"] * 3
+    assert "OPENAI_API_KEY not set" in records[0]["error"]
+
+
+def test_local_radius_restricts_road_features():
+    pipeline = stub_pipeline()
+    pipeline.local_radius = 30.0
+
+    feature_vector = pipeline.run(ScenarioJob(xosc=str(XOSC), xodr=str(XODR)))["feature_vector"]
+    assert feature_vector["local_radius"] == 30.0
+    assert feature_vector["num_roads"] == 1
+    assert feature_vector["network_risk_summary"]["total_hotspots_detected"] == 0
+
+
+def test_deterministic_stages_skip_llm_and_road_network():
+    pipeline = ScenarioPipeline(OpenScenarioXMLParser(), BasicStatsExtractor(), None, None, None,
+                                stages=("structural",))
+
+    record = pipeline.run(ScenarioJob(xosc=str(XOSC)))
+    feature_vector = record["feature_vector"]
+    assert record["status"] == "ok"
+    assert record["xodr"] is None
+    assert feature_vector["num_entities"] == 3
+    assert feature_vector["accident_probability"] is None
+    assert 0 <= feature_vector["structural_risk"] <= 1
+    assert "num_roads" not in feature_vector
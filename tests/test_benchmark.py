@@ -0,0 +1,55 @@
+import json
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.benchmark.synthetic import generate_openscenario, generate_opendrive
+from scenario_analysis.benchmark.suite import BenchmarkCase, compare, run_benchmarks, run_corpus
+
+
+def test_generators_scale_as_requested(tmp_path):
+    xodr = generate_opendrive(tmp_path / "net.xodr", num_junctions=3, connections_per_junction=4)
+    xosc = generate_openscenario(
+        tmp_path / "scn.xosc", num_entities=6, num_stories=2, events_per_story=7,
+        conditions_per_event=3, logic_file=xodr.name,
+    )
+
+    parser = OpenScenarioXMLParser()
+    assert parser.find_logic_file(xosc) == xodr.resolve()
+
+    features = BasicStatsExtractor().extract(parser.parse(xosc))
+    assert features["num_entities"] == 6
+    assert features["num_stories"] == 2
+    assert features["num_events"] == 14
+    assert features["num_conditions"] == 42
+    assert features["max_trigger_depth"] == 3
+
+    graph = RoadGraphExtractor().extract(xodr)
+    assert sum(1 for n in graph.nodes if "num_lanes" in graph.nodes[n]) == 3 * 5 + 1
+
+
+def test_run_benchmarks_times_every_stage(tmp_path):
+    case = BenchmarkCase("tiny", 2, 1, 2, 1, 1)
+    results = run_benchmarks([case], tmp_path, repeat=1)
+
+    stages = [r["stage"] for r in results["results"]]
+    assert stages == [
+        "parse_openscenario", "load_scenario_store", "road_graph", "road_graph_features", "road_graph_features_bulk",
+        "road_graph_features_local", "structural_features", "semantic_llm_stub", "accident_risk",
+        "cli_startup", "cli_no_llm",
+    ]
+    assert all(r["median_s"] >= 0 for r in results["results"])
+    assert len(compare(results, results)) == len(stages)
+    json.dumps(results)
+
+
+def test_run_corpus_reports_throughput(tmp_path):
+    generate_openscenario(tmp_path / "a.xosc", num_entities=3)
+    (tmp_path / "broken.xosc").write_text("<OpenSCENARIO>", encoding="utf-8")
+
+    rows = run_corpus(tmp_path, repeat=1, threads=2)
+
+    assert [r["stage"] for r in rows] == ["parse_corpus", "parse_corpus_threads", "load_corpus_store"]
+    assert rows[0]["params"]["num_files"] == 1
+    assert rows[0]["params"]["failed_files"] == 1
+    assert all(r["files_per_s"] > 0 for r in rows)
@@ -0,0 +1,45 @@
+import json
+import logging
+import sys
+
+import pytest
+
+from scenario_analysis.cli import get_parser, main, selected_stages
+
+from conftest import XODR, XOSC
+
+
+def test_options_before_the_subcommand_are_kept():
+    parser = get_parser()
+
+    args = parser.parse_args(["--no-llm", "--profile", "--param", "Speed=10", "sweep", "--xosc", "a.xosc"])
+    assert selected_stages(args) == ("structural", "road")
+    assert args.profile and args.param == ["Speed=10"]
+
+    args = parser.parse_args(["sweep", "--xosc", "a.xosc", "--no-llm"])
+    assert selected_stages(args) == ("structural", "road")
+    assert args.param == []
+
+    args = parser.parse_args(["--streaming", "--stage-threads", "3", "batch", "--input", "in"])
+    assert args.streaming and args.stage_threads == 3
+    # Unset, so single runs and batch runs apply their own default
+    assert parser.parse_args(["batch", "--input", "in"]).stage_threads is None
+
+    # --xodr works before and after the subcommand
+    for argv in (["--xodr", "map.xodr", "batch", "--input", "in"], ["batch", "--input", "in", "--xodr", "map.xodr"]):
+        assert parser.parse_args(argv).xodr == "map.xodr"
+
+
+def test_sweep_setup_errors_are_reported(tmp_path, monkeypatch, caplog):
+    spec = tmp_path / "sweep.json"
+    spec.write_text(json.dumps({"parameters": {"Gap": {"start": 5, "stop": 1}}}))
+    output = str(tmp_path / "sweep.jsonl")
+
+    for xosc, sweep in ((tmp_path / "missing.xosc", []), (XOSC, ["--sweep", str(spec)])):
+        argv = ["cli.py", "--no-llm", "sweep", "--xosc", str(xosc), "--xodr", str(XODR), "--output", output, *sweep]
+        monkeypatch.setattr(sys, "argv", argv)
+        caplog.clear()
+        with caplog.at_level(logging.ERROR), pytest.raises(SystemExit) as exit_info:
+            main()
+        assert exit_info.value.code == 1
+        assert "Sweep fehlgeschlagen" in caplog.text
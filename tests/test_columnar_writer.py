@@ -0,0 +1,64 @@
+import numpy as np
+
+from scenario_analysis.output.columnar_writer import ColumnarFeatureReader, ColumnarFeatureWriter
+
+
+def _vector(i, trigger_types, hotspots):
+    return {
+        "num_entities": i,
+        "max_speed_ms": 10.0 + i,
+        "trigger_types": trigger_types,
+        "risk_hotspots": hotspots,
+        "network_risk_summary": {"total_hotspots_detected": len(hotspots), "types_present": [h["type"] for h in hotspots]},
+        "semantic_analysis": {"riskEstimate": 0.5, "riskLevel": "medium"},
+        "scenario_name": f"s{i}",
+    }
+
+
+def test_append_and_read_back_across_partitions(tmp_path):
+    hotspot = {"road_id": "3", "type": "Merge / Bottleneck", "severity": 0.7}
+    with ColumnarFeatureWriter(tmp_path / "ds", rows_per_partition=2) as writer:
+        writer.append(_vector(0, {"SimulationTimeCondition": 2}, [hotspot, hotspot]), xosc="a.xosc")
+        writer.append(_vector(1, {}, []), xosc="b.xosc")
+        writer.append(_vector(2, {"TimeToCollisionCondition": 1}, [hotspot]), xosc="c.xosc")
+
+    reader = ColumnarFeatureReader(tmp_path / "ds")
+    assert len(reader.partitions()) == 2
+
+    data = reader.read()
+    assert data["xosc"].tolist() == ["a.xosc", "b.xosc", "c.xosc"]
+    assert data["num_entities"].tolist() == [0, 1, 2]
+    assert data["trigger_types.SimulationTimeCondition"].tolist() == [2, 0, 0]
+    assert data["trigger_types.TimeToCollisionCondition"].tolist() == [0, 0, 1]
+    assert data["risk_hotspots.severity"].to_lists() == [[0.7, 0.7], [], [0.7]]
+    assert data["network_risk_summary.types_present"][2].tolist() == ["Merge / Bottleneck"]
+
+    reader.compact()
+    compacted = reader.read()
+    assert len(reader.partitions()) == 1
+    assert isinstance(compacted["num_entities"], np.memmap)
+    assert compacted["risk_hotspots.road_id"].to_lists() == [["3", "3"], [], ["3"]]
+
+
+def test_scalars_in_list_columns_and_interrupted_compaction(tmp_path):
+    path = tmp_path / "ds"
+    with ColumnarFeatureWriter(path) as writer:
+        writer.append({"factors": ["short gap", "speed difference"], "level": 1})
+        writer.append({"factors": "late braking", "level": [2, 3]})
+        writer.append({})
+    # A later partition with the column as scalars only
+    with ColumnarFeatureWriter(path) as writer:
+        writer.append({"factors": "wet road", "level": 4})
+
+    # Interrupted compaction leaves a temp dir behind
+    (path / ".compacting").mkdir()
+    with ColumnarFeatureWriter(path) as writer:
+        writer.append({"level": 5})
+    assert (path / "part-00002").is_dir()
+
+    reader = ColumnarFeatureReader(path)
+    reader.compact()
+    data = reader.read()
+    assert data["factors"].to_lists() == [["short gap", "speed difference"], ["late braking"], [], ["wet road"], []]
+    assert data["level"].to_lists() == [[1], [2, 3], [], [4], [5]]
+    assert not (path / ".compacting").exists()
@@ -0,0 +1,79 @@
+from scenario_analysis.benchmark.synthetic import generate_openscenario
+from scenario_analysis.features.fingerprint import MinHasher, NearDuplicateIndex
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob
+from scenario_analysis.pipeline.dedup import DeduplicatingRunner
+
+from conftest import XODR, XOSC, stub_pipeline
+
+PROMPTS = []
+
+
+class CountingLLM:
+    def analyze_scenario(self, prompt: str) -> dict:
+        PROMPTS.append(prompt)
+        return {"riskEstimate": 0.4, "riskLevel": "medium"}
+
+
+def counting_pipeline():
+    pipeline = stub_pipeline()
+    pipeline.semantic_extractor.llm = CountingLLM()
+    return pipeline
+
+
+def _variants(tmp_path):
+    text = XOSC.read_text(encoding="utf-8")
+    files = {
+        "original": text,
+        # Other parameter values and speeds: same prompt up to the name
+        "retimed": text.replace('value="4"', 'value="7"').replace('value="13.9"', 'value="20"'),
+        "renamed": text.replace('name="BrakeEvent"', 'name="StopEvent"'),
+    }
+    paths = []
+    for name, content in files.items():
+        path = tmp_path / f"{name}.xosc"
+        path.write_text(content, encoding="utf-8")
+        paths.append(path)
+    paths.append(generate_openscenario(tmp_path / "other.xosc", num_entities=5, events_per_story=6))
+    paths.append(tmp_path / "missing.xosc")
+    return [ScenarioJob(xosc=str(p), xodr=str(XODR)) for p in paths]
+
+
+def test_exact_duplicates_share_one_llm_request(tmp_path):
+    PROMPTS.clear()
+    jobs = _variants(tmp_path)
+    runner = DeduplicatingRunner(BatchScenarioRunner(counting_pipeline, workers=1))
+
+    records = list(runner.run(jobs))
+
+    assert [r["status"] for r in records] == ["ok", "ok", "ok", "ok", "error"]
+    assert [r["llm_group"]["match"] for r in records[:4]] == ["representative", "exact", "representative", "representative"]
+    assert records[1]["llm_group"]["representative"] == jobs[0].xosc
+    assert len(PROMPTS) == 3
+    assert dict(runner.stats) == {"scenarios": 5, "llm_requests": 3, "representative": 3, "exact": 1}
+
+    # Fanned-out records equal what a run without deduplication produces
+    expected = stub_pipeline().run(jobs[1])["feature_vector"]
+    assert records[1]["feature_vector"] == expected
+
+
+def test_near_duplicates_join_the_closest_group(tmp_path):
+    PROMPTS.clear()
+    jobs = _variants(tmp_path)
+    runner = DeduplicatingRunner(BatchScenarioRunner(counting_pipeline, workers=1), near_threshold=0.6)
+
+    records = list(runner.run(jobs))
+
+    assert [r["llm_group"]["match"] for r in records[:4]] == ["representative", "exact", "near", "representative"]
+    assert records[2]["llm_group"]["representative"] == jobs[0].xosc
+    assert len(PROMPTS) == 2
+
+
+def test_lsh_index_finds_similar_signatures():
+    hasher = MinHasher()
+    base = {f"shingle-{i}" for i in range(100)}
+    index = NearDuplicateIndex(threshold=0.8)
+    first = index.add(hasher.signature(base))
+    index.add(hasher.signature({f"other-{i}" for i in range(100)}))
+
+    assert index.match(hasher.signature(base - {"shingle-0", "shingle-1"})) == first
+    assert index.match(hasher.signature({f"shingle-{i}" for i in range(50)})) is None
@@ -0,0 +1,57 @@
+import shutil
+from dataclasses import replace
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator, RiskConfig
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob
+from scenario_analysis.pipeline.incremental import IncrementalManifest, IncrementalRunner
+
+from conftest import XODR, XOSC, StubLLM, stub_pipeline
+
+
+class CountingLLM(StubLLM):
+    calls = 0
+
+    def analyze_scenario(self, prompt):
+        CountingLLM.calls += 1
+        return super().analyze_scenario(prompt)
+
+
+def counting_pipeline():
+    pipeline = stub_pipeline()
+    pipeline.semantic_extractor.llm = CountingLLM()
+    return pipeline
+
+
+def rescored_pipeline():
+    pipeline = counting_pipeline()
+    pipeline.risk_estimator = AccidentRiskEstimator(replace(RiskConfig(), w_struct=0.5, w_llm=0.5))
+    return pipeline
+
+
+def _run(tmp_path, factory=counting_pipeline):
+    xosc = tmp_path / "CutIn.xosc"
+    runner = BatchScenarioRunner(factory, workers=1)
+    manifest = IncrementalManifest(tmp_path / "manifest.json")
+    job = ScenarioJob(xosc=str(xosc), xodr=str(XODR))
+    return list(IncrementalRunner(runner, manifest).run([job]))[0]
+
+
+def test_only_changed_stages_are_recomputed(tmp_path):
+    shutil.copy(XOSC, tmp_path / "CutIn.xosc")
+    CountingLLM.calls = 0
+
+    first = _run(tmp_path)
+    assert first["recomputed"] == ["structural", "road", "semantic", "risk"]
+
+    (tmp_path / "CutIn.xosc").touch()
+    assert _run(tmp_path)["recomputed"] == []
+
+    rescored = _run(tmp_path, rescored_pipeline)
+    assert rescored["recomputed"] == ["risk"]
+    assert rescored["feature_vector"]["accident_probability"] != first["feature_vector"]["accident_probability"]
+
+    # A parameter-only edit changes the structural stage but not the prompt
+    xosc = tmp_path / "CutIn.xosc"
+    xosc.write_text(xosc.read_text().replace('value="16.7"', 'value="25.0"'))
+    assert _run(tmp_path)["recomputed"] == ["structural", "risk"]
+    assert CountingLLM.calls == 1
@@ -0,0 +1,57 @@
+import json
+
+from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+from scenario_analysis.instrumentation import (
+    CollectorSink, Instrumentation, JSONLinesSink, PrometheusTextSink, StageRecord, aggregate, format_report
+)
+from scenario_analysis.pipeline.batch import ScenarioJob
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def test_pipeline_records_every_stage():
+    pipeline = stub_pipeline()
+    pipeline.road_graph_cache = RoadGraphCache()
+    pipeline.instrumentation = Instrumentation(trace_memory=True, buffer=True)
+    # Memory tracing runs the stages one after another
+    pipeline.stage_threads = 2
+    assert pipeline.builder(str(XODR)).executor is None
+
+    first = pipeline.run(ScenarioJob(str(XOSC), str(XODR)))
+    second = pipeline.run(ScenarioJob(str(XOSC), str(XODR)))
+
+    stages = [p["stage"] for p in first["profile"]]
+    assert stages == ["parse", "structural", "road_network", "llm", "risk"]
+    assert all(p["wall_s"] >= 0 and p["peak_bytes"] is not None for p in first["profile"])
+    assert [p["cache"] for p in second["profile"] if p["stage"] == "road_network"] == ["memory"]
+    json.dumps(first)
+
+
+def test_disabled_instrumentation_adds_no_profile():
+    record = stub_pipeline().run(ScenarioJob(str(XOSC), str(XODR)))
+    assert "profile" not in record
+
+
+def test_sinks(tmp_path):
+    collector = CollectorSink()
+    instrumentation = Instrumentation([
+        collector, JSONLinesSink(tmp_path / "m.jsonl"), PrometheusTextSink(tmp_path / "m.prom")
+    ])
+    instrumentation.emit(StageRecord("llm", 0.5, 0.1, cache="hit"))
+    instrumentation.emit(StageRecord("llm", 1.5, 0.1, cache="miss"))
+    with instrumentation.stage("parse") as stage:
+        stage.note_cache(None)
+    instrumentation.close()
+
+    summary = aggregate(collector.records)
+    assert summary["llm"]["count"] == 2
+    assert summary["llm"]["wall_s"] == 2.0
+    assert summary["llm"]["cache"] == {"hit": 1, "miss": 1}
+    assert "parse" in format_report(summary)
+
+    lines = (tmp_path / "m.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["stage"] for line in lines] == ["llm", "llm", "parse"]
+
+    prom = (tmp_path / "m.prom").read_text(encoding="utf-8")
+    assert 'scenario_stage_runs_total{stage="llm"} 2' in prom
+    assert 'scenario_stage_cache_total{stage="llm",result="hit"} 1' in prom
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.openscenario_stream import StreamingOpenScenarioParser
+from scenario_analysis.model.scenario import Condition, InitPosition
+
+DATA = Path(__file__).parent / "data"
+XOSC = DATA / "xosc" / "CutIn.xosc"
+
+
+def _namespaced_copy(tmp_path):
+    text = XOSC.read_text(encoding="utf-8").replace(
+        "<OpenSCENARIO>", '<OpenSCENARIO xmlns="http://www.asam.net/OpenSCENARIO">'
+    )
+    path = tmp_path / "CutInNs.xosc"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _edge_case_copy(tmp_path):
+    # Second Action and StartTrigger per event are ignored by find(), a
+    # CatalogReference entity is "misc", event teleports are no Init positions
+    text = XOSC.read_text(encoding="utf-8")
+    text = text.replace(
+        '<Action name="WalkAction">',
+        '<Action name="Extra"><PrivateAction><LongitudinalAction><SpeedAction>'
+        '<SpeedActionTarget><AbsoluteTargetSpeed value="99"/></SpeedActionTarget>'
+        '</SpeedAction></LongitudinalAction></PrivateAction>'
+        '<PrivateAction><TeleportAction><Position><WorldPosition x="1" y="2"/></Position>'
+        '</TeleportAction></PrivateAction></Action>'
+        '<Action name="WalkAction">',
+    )
+    text = text.replace(
+        '<ScenarioObject name="Walker">',
+        '<ScenarioObject name="Catalogued"><CatalogReference catalogName="c" entryName="e"/></ScenarioObject>'
+        '<ScenarioObject name="Walker">',
+    )
+    path = tmp_path / "EdgeCases.xosc"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_parser_reads_structure():
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+
+    assert scenario.name == "CutIn"
+    assert scenario.author == "test"
+    assert [(e.name, e.type) for e in scenario.entities] == [
+        ("Ego", "vehicle"), ("Target", "vehicle"), ("Walker", "pedestrian")
+    ]
+    assert scenario.init_speeds == [13.9, 16.7]
+    assert scenario.init_positions == [
+        InitPosition(entity="Ego", kind="lane", road_id="0", s=20.0),
+        InitPosition(entity="Target", kind="world", x=60.0, y=3.5),
+    ]
+
+    maneuvers = scenario.stories[0].acts[0].maneuvers
+    assert [m.name for m in maneuvers] == ["CutInManeuver", "CrossingManeuver"]
+    brake = maneuvers[0].events[1]
+    assert brake.speeds == [0.0]
+    assert [c.type for c in brake.trigger.conditions] == ["ByValueCondition", "ByEntityCondition"]
+
+
+def test_find_logic_file():
+    assert OpenScenarioXMLParser().find_logic_file(XOSC) == (DATA / "xodr" / "junction.xodr").resolve()
+
+
+@pytest.mark.parametrize("make_file", [lambda tmp: XOSC, _namespaced_copy, _edge_case_copy])
+def test_streaming_parser_matches_tree_parser(tmp_path, make_file):
+    path = make_file(tmp_path)
+    assert StreamingOpenScenarioParser().parse(path) == OpenScenarioXMLParser().parse(path)
+
+
+def test_parser_is_shared_between_threads(tmp_path):
+    # Alternating namespaces: no namespace state may leak between files
+    paths = [XOSC, _namespaced_copy(tmp_path), _edge_case_copy(tmp_path)] * 8
+    parser = OpenScenarioXMLParser()
+    expected = [OpenScenarioXMLParser().parse(path) for path in paths]
+
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(parser.parse, paths)) == expected
+
+
+def test_conditions_share_interned_attributes():
+    first = Condition("SimulationTimeCondition", {"value": "2", "rule": "greaterThan"})
+    second = Condition("".join(["Simulation", "TimeCondition"]), {"value": "2", "rule": "greaterThan"})
+    assert first.type is second.type
+    assert first._attributes is second._attributes
+
+    attributes = first.attributes
+    attributes["value"] = "99"
+    assert first.attributes == {"value": "2", "rule": "greaterThan"}
+    assert first == second
+
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+    assert not hasattr(scenario, "__dict__")
+    assert pickle.loads(pickle.dumps(scenario)) == scenario
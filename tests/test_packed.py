@@ -0,0 +1,105 @@
+import json
+import re
+
+from scenario_analysis.benchmark.synthetic import generate_openscenario
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor, PROMPT_INSTRUCTIONS, plan_packs
+from scenario_analysis.instrumentation import Instrumentation
+from scenario_analysis.llm.openai_client import OpenAIClient, parse_json_items_safely
+from scenario_analysis.llm.response_cache import LLMResponseCache
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob
+from scenario_analysis.pipeline.packed import PackedLLMRunner
+
+from conftest import XODR, stub_pipeline
+
+ANSWER = {"riskEstimate": 0.4, "riskLevel": "medium"}
+
+
+def packed_reply(body: dict, broken: set = frozenset()) -> str:
+    # One answer per "Scenario name:" line; scenarios named in broken get none
+    prompt = body["messages"][-1]["content"]
+    names = re.findall(r"^Scenario name: (.+)$", prompt, re.MULTILINE)
+    if "### Scenario" not in prompt:
+        return json.dumps(ANSWER)
+    items = [{"scenario": name, "reasoning_path": "...", **ANSWER} for name in names if name not in broken]
+    return "```json\n" + json.dumps(items) + "\n```"
+
+
+def _prompt(name: str, lines: int = 3) -> str:
+    return "\n".join([f"Scenario name: {name}"] + ["- Entity: x (vehicle)"] * lines + [PROMPT_INSTRUCTIONS])
+
+
+def test_plan_packs_respects_budget_size_and_names():
+    items = [("a", _prompt("a")), ("b", _prompt("b")), ("a", _prompt("a")), ("c", _prompt("c", 400)), ("d", _prompt("d"))]
+
+    assert plan_packs(items, token_budget=10_000, max_items=8) == [[0, 1], [2, 3, 4]]
+    assert plan_packs(items, token_budget=10_000, max_items=2) == [[0, 1], [2, 3], [4]]
+    assert plan_packs(items, token_budget=500, max_items=8) == [[0, 1], [2], [3], [4]]
+
+
+def test_truncated_arrays_are_salvaged():
+    text = '[{"scenario": "a", "riskEstimate": 0.1}, {"scenario": "b", "riskEstimate": 0.2}, {"scenario": "c", "ri'
+    assert [item["scenario"] for item in parse_json_items_safely(text)] == ["a", "b"]
+    assert parse_json_items_safely('{"results": [{"scenario": "a"}]}') == [{"scenario": "a"}]
+
+
+def test_missing_items_are_retried_and_cached_singly(openai_stub, tmp_path):
+    broken = {"s2"}
+    openai_stub.reply = lambda body: packed_reply(body, broken)
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    extractor = AISemanticFeatureExtractor(OpenAIClient(base_url=openai_stub.base_url, cache=cache))
+    items = [(f"s{i}", _prompt(f"s{i}")) for i in range(4)]
+
+    results = extractor.analyze_packed(items)
+
+    assert results == [(ANSWER, True)] * 4
+    # Packed request, then the missing item on its own
+    assert len(openai_stub.requests) == 2
+    assert extractor.packed_requests == 2
+    assert "### Scenario" not in openai_stub.requests[1]["messages"][-1]["content"]
+
+    # Unpacked runs reuse the packed answers
+    assert extractor.analyze_prompt(items[0][1]) == (ANSWER, True)
+    assert len(openai_stub.requests) == 2
+
+    # Nothing usable in the answer: the pack is halved
+    broken = {"t2"}
+    openai_stub.reply = lambda body: "[]" if "t0" in body["messages"][-1]["content"] and "t3" in body["messages"][-1]["content"] else packed_reply(body, broken)
+    items = [(f"t{i}", _prompt(f"t{i}")) for i in range(4)]
+    assert extractor.analyze_packed(items) == [(ANSWER, True)] * 4
+    # t0-t3 unusable, then t0+t1 and t2+t3 (t2 missing), then t2 alone
+    assert len(openai_stub.requests) == 2 + 4
+
+    # Offline, items missing from the cache get no result instead of fallback data
+    offline = AISemanticFeatureExtractor(OpenAIClient(cache=cache, cache_only=True))
+    assert offline.analyze_packed(items[:2] + [("new", _prompt("new"))]) == [(ANSWER, True)] * 2 + [None]
+
+
+def test_packed_runner_matches_single_requests(openai_stub, tmp_path):
+    openai_stub.reply = packed_reply
+    paths = [generate_openscenario(tmp_path / f"scenario{i}.xosc", num_entities=2 + i) for i in range(5)]
+    jobs = [ScenarioJob(xosc=str(p), xodr=str(XODR)) for p in paths] + [ScenarioJob(xosc="missing.xosc", xodr=str(XODR))]
+
+    def pipeline():
+        p = stub_pipeline()
+        p.semantic_extractor = AISemanticFeatureExtractor(OpenAIClient(base_url=openai_stub.base_url))
+        return p
+
+    runner = PackedLLMRunner(BatchScenarioRunner(pipeline, workers=1), max_items=3)
+    records = list(runner.run(jobs))
+
+    assert [r["status"] for r in records] == ["ok"] * 5 + ["error"]
+    assert [r["llm_pack"]["size"] for r in records[:5]] == [3, 3, 3, 2, 2]
+    assert len(openai_stub.requests) == 2
+    assert dict(runner.stats) == {"packs": 2, "llm_requests": 2, "scenarios": 6}
+    assert records[4]["feature_vector"] == stub_pipeline().run(jobs[4])["feature_vector"]
+
+    # Every scenario of a pack gets its share of the request time
+    def profiled_pipeline():
+        p = pipeline()
+        p.instrumentation = Instrumentation(buffer=True)
+        return p
+
+    runner = PackedLLMRunner(BatchScenarioRunner(profiled_pipeline, workers=1), max_items=3)
+    llm = [[s for s in r["profile"] if s["stage"] == "llm"] for r in runner.run(jobs[:5])]
+    assert [len(stages) for stages in llm] == [1] * 5
+    assert llm[0] == llm[1] == llm[2] and llm[3] == llm[4]
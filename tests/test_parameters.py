@@ -0,0 +1,121 @@
+import pytest
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.openscenario_stream import StreamingOpenScenarioParser
+from scenario_analysis.ingestion.parameters import ParameterError, evaluate_expression, expand_sweep
+from scenario_analysis.pipeline.batch import ScenarioJob
+from scenario_analysis.pipeline.sweep import SweepRunner
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def _parameterized_copy(tmp_path):
+    text = XOSC.read_text(encoding="utf-8")
+    text = text.replace("<ParameterDeclarations/>", (
+        "<ParameterDeclarations>"
+        '<ParameterDeclaration name="EgoSpeed" parameterType="double" value="13.9"/>'
+        '<ParameterDeclaration name="TargetSpeed" parameterType="double" value="${$EgoSpeed + 2.8}"/>'
+        '<ParameterDeclaration name="BrakeTarget" parameterType="integer" value="0"/>'
+        '<ParameterDeclaration name="StartS" parameterType="double" value="20"/>'
+        "</ParameterDeclarations>"
+    ))
+    text = text.replace('<AbsoluteTargetSpeed value="13.9"/>', '<AbsoluteTargetSpeed value="$EgoSpeed"/>')
+    text = text.replace('<AbsoluteTargetSpeed value="16.7"/>', '<AbsoluteTargetSpeed value="$TargetSpeed"/>')
+    text = text.replace('<AbsoluteTargetSpeed value="0.0"/>', '<AbsoluteTargetSpeed value="${$BrakeTarget / 2}"/>')
+    text = text.replace('s="20"/>', 's="$StartS"/>')
+    path = tmp_path / "CutInParameterized.xosc"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _brake_event(scenario):
+    return scenario.stories[0].acts[0].maneuvers[0].events[1]
+
+
+def test_declared_parameters_are_resolved(tmp_path):
+    path = _parameterized_copy(tmp_path)
+    scenario = OpenScenarioXMLParser().parse(path)
+    original = OpenScenarioXMLParser().parse(XOSC)
+
+    assert scenario.init_speeds == pytest.approx([13.9, 16.7])
+    assert scenario.init_positions == original.init_positions
+    assert _brake_event(scenario).speeds == _brake_event(original).speeds == [0.0]
+
+    overrides = {"EgoSpeed": "20", "BrakeTarget": 6}
+    scenario = OpenScenarioXMLParser().parse(path, overrides)
+    assert scenario.init_speeds == pytest.approx([20.0, 22.8])
+    assert _brake_event(scenario).speeds == [3.0]
+
+    for parameters in (None, overrides):
+        assert StreamingOpenScenarioParser().parse(path, parameters) == OpenScenarioXMLParser().parse(path, parameters)
+
+    with pytest.raises(ParameterError):
+        OpenScenarioXMLParser().parse(path, {"Unknown": 1})
+
+
+def test_template_binds_variants_sharing_unchanged_objects(tmp_path):
+    template = OpenScenarioXMLParser().parse_template(_parameterized_copy(tmp_path))
+    first, second = template.bind({"StartS": 35}), template.bind({"StartS": 50, "BrakeTarget": 2})
+
+    assert first.init_positions[0].s == 35.0
+    assert second.init_positions[0].s == 50.0
+    assert first.entities is second.entities
+    lane_change = first.stories[0].acts[0].maneuvers[0].events[0]
+    assert lane_change is second.stories[0].acts[0].maneuvers[0].events[0]
+    assert _brake_event(first).speeds == [0.0]
+    assert _brake_event(second).speeds == [1.0]
+
+
+def test_expressions():
+    values = {"a": 3.0, "b": 4}
+    assert evaluate_expression("$a + 2 * $b", values) == 11.0
+    assert evaluate_expression("sqrt(pow($a, 2) + pow($b, 2))", values) == 5.0
+    assert evaluate_expression("round(2.5) + round(-2.5)", values) == 0.0
+    assert evaluate_expression("$a < $b and not false", values) is True
+
+    for expression in ("$missing + 1", "__import__('os')", "$a.real", "1 / 0"):
+        with pytest.raises(ParameterError):
+            evaluate_expression(expression, values)
+
+
+def test_sweep_expansion():
+    spec = {"parameters": {"EgoSpeed": [10, 20], "StartS": {"start": 0, "stop": 1, "step": 0.25}}}
+    bindings = list(expand_sweep(spec))
+    assert len(bindings) == 10
+    assert bindings[4] == {"EgoSpeed": 10, "StartS": 1.0}
+
+    spec = {"parameters": {"EgoSpeed": [10, 20], "BrakeTime": {"uniform": [1, 5]}}, "samples": 3, "seed": 7}
+    bindings = list(expand_sweep(spec))
+    assert len(bindings) == 6
+    assert all(1 <= b["BrakeTime"] <= 5 for b in bindings)
+    assert bindings == list(expand_sweep(spec))
+
+
+def test_sweep_runner_parses_once_and_asks_llm_once(tmp_path):
+    job = ScenarioJob(xosc=str(_parameterized_copy(tmp_path)), xodr=str(XODR))
+    bindings = [{"EgoSpeed": speed} for speed in (5, 10, 15)] + [{"EgoSpeed": "fast"}]
+
+    runner = SweepRunner(stub_pipeline())
+    records = list(runner.run(job, bindings))
+
+    assert [r["status"] for r in records] == ["ok", "ok", "ok", "error"]
+    assert [r["variant"] for r in records] == [0, 1, 2, 3]
+    assert [r["feature_vector"]["max_speed_ms"] for r in records[:3]] == pytest.approx([7.8, 12.8, 17.8])
+    assert runner.llm_requests == 1
+
+    # A failed request is not reused for the following variants
+    class FlakyLLM:
+        calls = 0
+
+        def analyze_scenario(self, prompt):
+            FlakyLLM.calls += 1
+            if FlakyLLM.calls == 1:
+                raise ConnectionError("temporarily unavailable")
+            return {"riskEstimate": 0.4, "riskLevel": "medium"}
+
+    pipeline = stub_pipeline()
+    pipeline.semantic_extractor.llm = FlakyLLM()
+    runner = SweepRunner(pipeline)
+    records = list(runner.run(job, bindings[:3]))
+    assert ["scenarioType" in r["feature_vector"]["semantic_analysis"] for r in records] == [True, False, False]
+    assert runner.llm_requests == 2
@@ -0,0 +1,79 @@
+from scenario_analysis.benchmark.synthetic import generate_openscenario
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor, PROMPT_INSTRUCTIONS, estimate_tokens
+from scenario_analysis.features.traversal import traverse
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.pipeline.batch import ScenarioJob
+
+from conftest import XODR, XOSC, StubLLM, stub_pipeline
+
+
+def _prompt_and_stats(scenario, **options):
+    collector = AISemanticFeatureExtractor(StubLLM(), **options).prompt_collector()
+    traverse(scenario, [collector])
+    return collector.result(), collector.stats()
+
+
+def test_token_estimate_adds_up_over_lines():
+    assert estimate_tokens("Condition: TimeToCollisionCondition") == 6
+    lines = ["Story: S", "  Act: A", "    Maneuver: M", "      Event: E1 (triggered by ByValueCondition)"]
+    assert estimate_tokens("\n".join(lines)) == sum(map(estimate_tokens, lines))
+
+
+def test_compact_prompt_groups_repeated_structure(tmp_path):
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+    prompt, stats = _prompt_and_stats(scenario, compact=True)
+    full_prompt, full_stats = _prompt_and_stats(scenario)
+
+    assert prompt.startswith("Scenario name: CutIn\nNumber of entities: 3\n- Entities (vehicle): Ego, Target\n")
+    assert "      Event: BrakeEvent (triggered by ByValueCondition, ByEntityCondition)" in prompt
+    assert prompt.endswith("\n" + PROMPT_INSTRUCTIONS)
+    assert stats["full_tokens"] == full_stats["tokens"] == estimate_tokens(full_prompt)
+    assert stats["tokens"] < stats["full_tokens"]
+
+    large = OpenScenarioXMLParser().parse(generate_openscenario(
+        tmp_path / "large.xosc", num_entities=4, events_per_story=40
+    ))
+    prompt, stats = _prompt_and_stats(large, compact=True)
+    assert "      10 events (Event0_0, Event0_4, Event0_8, Event0_12, " in prompt
+    assert stats["tokens"] < 0.7 * stats["full_tokens"]
+
+
+def test_token_budget_keeps_the_risk_relevant_events(tmp_path):
+    scenario = OpenScenarioXMLParser().parse(generate_openscenario(
+        tmp_path / "large.xosc", num_entities=12, num_stories=3, events_per_story=120
+    ))
+
+    prompt, stats = _prompt_and_stats(scenario, compact=True)
+    assert "      10 events (Event0_0, Event0_12, Event0_24, " in prompt
+
+    # Steps over budget: abbreviated names, merged maneuvers, left out events
+    prompt, stats = _prompt_and_stats(scenario, token_budget=stats["tokens"] - 1)
+    assert "      10 events (Event0_0, Event0_12, ..., Event0_108), each triggered by ByValueCondition" in prompt
+    assert "maneuvers (" not in prompt
+
+    prompt, stats = _prompt_and_stats(scenario, token_budget=stats["tokens"] - 1)
+    assert "    6 maneuvers (Maneuver0_0, Maneuver0_3, ..., Maneuver0_11), each with:" in prompt
+    assert "      10 events, each triggered by ByValueCondition" in prompt
+    assert stats["omitted_events"] == 0
+
+    # Value-triggered events go before entity-triggered ones
+    budget = stats["tokens"] - 30
+    prompt, stats = _prompt_and_stats(scenario, token_budget=budget)
+    assert stats["tokens"] <= budget
+    assert 0 < stats["omitted_events"] <= 180
+    assert prompt.count("      10 events, each triggered by ByEntityCondition") == 3
+    assert "    (60 less risk-relevant events of 6 maneuvers omitted)" in prompt
+
+    assert AISemanticFeatureExtractor(StubLLM(), token_budget=budget).template_fingerprint() \
+        != AISemanticFeatureExtractor(StubLLM()).template_fingerprint()
+
+
+def test_records_report_prompt_size():
+    pipeline = stub_pipeline()
+    pipeline.semantic_extractor = AISemanticFeatureExtractor(StubLLM(), compact=True)
+    record = pipeline.run(ScenarioJob(xosc=str(XOSC), xodr=str(XODR)))
+
+    size = record["prompt_size"]
+    assert size["tokens"] < size["full_tokens"]
+    assert size["omitted_events"] == 0
+    assert record["feature_vector"] == stub_pipeline().run(ScenarioJob(xosc=str(XOSC), xodr=str(XODR)))["feature_vector"]
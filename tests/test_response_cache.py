@@ -0,0 +1,55 @@
+import pytest
+
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.llm.openai_client import OpenAIClient
+from scenario_analysis.llm.response_cache import LLMResponseCache, ResponseCacheMiss
+from scenario_analysis.pipeline.batch import BatchScenarioRunner, ScenarioJob
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def test_responses_are_reused_and_cache_only_works_offline(openai_stub, tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    client = OpenAIClient(base_url=openai_stub.base_url, cache=cache)
+
+    assert client.analyze_scenario("same prompt") == client.analyze_scenario("same prompt")
+    assert len(openai_stub.requests) == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    offline = OpenAIClient(cache=LLMResponseCache(tmp_path / "llm.sqlite"), cache_only=True)
+    assert offline.analyze_scenario("same prompt")["riskEstimate"] == 0.4
+    with pytest.raises(ResponseCacheMiss):
+        offline.analyze_scenario("other prompt")
+
+
+def test_parse_errors_are_not_cached_and_offline_misses_fail(openai_stub, tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+    openai_stub.reply = lambda body: "not json at all"
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+
+    extractor = AISemanticFeatureExtractor(OpenAIClient(base_url=openai_stub.base_url, cache=cache))
+    assert extractor.extract(scenario)["parsing_error"] is True
+
+    # No fallback data in place of a missing response
+    offline = AISemanticFeatureExtractor(OpenAIClient(cache=cache, cache_only=True))
+    with pytest.raises(ResponseCacheMiss):
+        offline.extract(scenario)
+    assert cache.stats()["entries"] == 0
+
+    pipeline = stub_pipeline()
+    pipeline.semantic_extractor = offline
+    [record] = BatchScenarioRunner(lambda: pipeline, workers=1).run([ScenarioJob(xosc=str(XOSC), xodr=str(XODR))])
+    assert record["status"] == "error"
+    assert record["error"].startswith("ResponseCacheMiss")
+
+
+def test_eviction_by_size_and_ttl(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite", max_entries=2)
+    for i in range(3):
+        cache.put(f"k{i}", "m", {"i": i})
+    assert cache.get("k0") is None
+    assert cache.get("k2") == {"i": 2}
+
+    expired = LLMResponseCache(tmp_path / "llm.sqlite", ttl_seconds=-1)
+    assert expired.get("k2") is None
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor, FAST_PROMPT_INSTRUCTIONS
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.llm.async_openai_client import AsyncOpenAIClient
+from scenario_analysis.llm.openai_client import RESULT_KEYS, RISK_KEYS, OpenAIClient, StreamingJSONObject
+from scenario_analysis.llm.response_cache import LLMResponseCache
+
+from conftest import XOSC
+
+FAST_ANSWER = {
+    "riskEstimate": 0.7,
+    "riskLevel": "high",
+    "scenarioComplexity": 4,
+    "scenarioType": "Cut-in {lane change}",
+    "potentialRiskFactors": ["short gap, \"late\" braking", "speed difference"],
+    "interactionDescription": "The target vehicle cuts in ahead of the ego vehicle and brakes.",
+}
+AUDIT_ANSWER = {"reasoning_path": "First, the actors: ego and target. " * 20, **FAST_ANSWER}
+
+
+def _reply(body):
+    # Structured output requests get the fast answer
+    return json.dumps(FAST_ANSWER if "response_format" in body else AUDIT_ANSWER)
+
+
+def test_reader_parses_members_as_they_complete():
+    text = "```json\n" + json.dumps(FAST_ANSWER) + "\n```"
+
+    reader = StreamingJSONObject(RISK_KEYS)
+    read = next(i for i in range(len(text)) if reader.feed(text[i]))
+    assert reader.members == {"riskEstimate": 0.7, "riskLevel": "high"}
+    assert text[read] == ","
+
+    reader = StreamingJSONObject()
+    for i in range(0, len(text), 5):
+        reader.feed(text[i:i + 5])
+    assert reader.closed and reader.result() == FAST_ANSWER
+
+    broken = StreamingJSONObject()
+    broken.feed("no json")
+    assert broken.result()["parsing_error"] is True
+
+    # A stream cut off before the object is complete is not a result
+    truncated = StreamingJSONObject()
+    truncated.feed(text[:text.index('"scenarioType"')])
+    assert truncated.members and not truncated.complete
+    assert truncated.result() == {"raw_llm_output": truncated.text, "parsing_error": True}
+
+
+def test_fast_mode_streams_structured_output_and_stops_early(openai_stub, tmp_path):
+    openai_stub.reply = _reply
+    # Generation takes time, so closing the stream stops it
+    openai_stub.token_delay = 0.002
+    cache = LLMResponseCache(tmp_path / "llm.sqlite")
+
+    full = OpenAIClient(base_url=openai_stub.base_url, cache=cache).analyze_scenario("prompt")
+    assert full == FAST_ANSWER
+    request = openai_stub.requests[-1]
+    assert request["stream"] is True
+    assert request["response_format"]["json_schema"]["schema"]["required"] == list(RESULT_KEYS)
+    full_tokens = openai_stub.output_tokens
+
+    # The descriptive keys are never read; cut-short results are cached apart
+    risk_only = OpenAIClient(base_url=openai_stub.base_url, cache=cache, stop_after=RISK_KEYS)
+    assert risk_only.analyze_scenario("prompt") == {"riskEstimate": 0.7, "riskLevel": "high"}
+    assert len(openai_stub.requests) == 2
+    assert openai_stub.output_tokens - full_tokens < full_tokens / 3
+    assert risk_only.analyze_scenario("prompt") == {"riskEstimate": 0.7, "riskLevel": "high"}
+    assert cache.stats()["entries"] == 2
+
+    async def run():
+        client = AsyncOpenAIClient(base_url=openai_stub.base_url, stop_after=RISK_KEYS)
+        try:
+            return await client.analyze_scenario("prompt")
+        finally:
+            await client.close()
+
+    assert asyncio.run(run()) == {"riskEstimate": 0.7, "riskLevel": "high"}
+
+    # A truncated stream gives a parsing error that is not cached
+    openai_stub.reply = lambda body: json.dumps(FAST_ANSWER)[:60]
+    truncated = OpenAIClient(base_url=openai_stub.base_url, cache=cache).analyze_scenario("other prompt")
+    assert truncated["parsing_error"] is True
+    assert cache.stats()["entries"] == 2
+
+
+def test_reasoning_is_kept_only_in_audit_mode(openai_stub):
+    openai_stub.reply = _reply
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+
+    fast = AISemanticFeatureExtractor(OpenAIClient(base_url=openai_stub.base_url))
+    assert fast.extract(scenario) == FAST_ANSWER
+    assert openai_stub.requests[-1]["messages"][1]["content"].endswith(FAST_PROMPT_INSTRUCTIONS)
+
+    audit = AISemanticFeatureExtractor(OpenAIClient(base_url=openai_stub.base_url, response_mode="audit"))
+    assert audit.extract(scenario) == AUDIT_ANSWER
+    assert "response_format" not in openai_stub.requests[-1]
+    assert audit.template_fingerprint() != fast.template_fingerprint()
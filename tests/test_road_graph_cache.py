@@ -0,0 +1,64 @@
+import pickle
+import shutil
+
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+from scenario_analysis.features.road_graph_features import RoadGraphFeatureExtractor
+
+from conftest import XODR
+
+
+def test_cache_is_keyed_by_content_and_shares_disk_tier(tmp_path):
+    copy = tmp_path / "renamed.xodr"
+    shutil.copy(XODR, copy)
+    extractors = (RoadGraphExtractor(), RoadGraphFeatureExtractor())
+
+    cache = RoadGraphCache(cache_dir=tmp_path / "cache")
+    first = cache.get(XODR, *extractors)
+    second = cache.get(copy, *extractors)
+
+    assert first.source == "miss"
+    assert second.source == "memory"
+    assert second.features == RoadGraphFeatureExtractor().extract(RoadGraphExtractor().extract(XODR))
+
+    # A fresh cache (e.g. another worker process) hits the disk tier
+    other = RoadGraphCache(cache_dir=tmp_path / "cache")
+    assert other.get(copy, *extractors).source == "disk"
+    assert other.stats()["disk_hits"] == 1
+
+    # Changed content is a different key
+    copy.write_text(XODR.read_text().replace('id="6"', 'id="7"'))
+    assert other.get(copy, *extractors).source == "miss"
+
+
+def test_extractor_settings_are_part_of_the_key_and_results_are_copies(tmp_path):
+    cache = RoadGraphCache(cache_dir=tmp_path / "cache")
+    extractor = RoadGraphFeatureExtractor()
+
+    entry = cache.get(XODR, RoadGraphExtractor(), extractor)
+    entry.features["risk_hotspots"].clear()
+    entry.features["num_roads"] = -1
+    assert cache.get(XODR, RoadGraphExtractor(), extractor).features == extractor.extract(
+        RoadGraphExtractor().extract(XODR)
+    )
+
+    extractor.min_severity = 0.5
+    assert cache.get(XODR, RoadGraphExtractor(), extractor).source == "miss"
+
+
+def test_stale_and_corrupt_disk_entries_are_misses(tmp_path):
+    extractors = (RoadGraphExtractor(), RoadGraphFeatureExtractor())
+    RoadGraphCache(cache_dir=tmp_path / "cache").get(XODR, *extractors)
+    entry = next((tmp_path / "cache").rglob("*.pkl"))
+
+    stale = [
+        b"cvanished_module\nRoadGraph\n.",                                  # moved module
+        b"cscenario_analysis.analysis.road_graph_cache\nRemovedClass\n.",   # renamed class
+        pickle.dumps(1),                                                     # other layout
+        b"\x80",                                                             # truncated
+    ]
+    for data in stale:
+        entry.write_bytes(data)
+        assert RoadGraphCache(cache_dir=tmp_path / "cache").get(XODR, *extractors).source == "miss"
+        # Rewritten
+        assert RoadGraphCache(cache_dir=tmp_path / "cache").get(XODR, *extractors).source == "disk"
@@ -0,0 +1,134 @@
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from scenario_analysis.analysis.accident_risk import AccidentRiskEstimator
+from scenario_analysis.analysis.road_graph import RoadGraphExtractor
+from scenario_analysis.analysis.road_network import RoadNetwork
+from scenario_analysis.analysis.spatial_index import SpatialGrid
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.road_graph_features import HOTSPOT_TYPES, HotspotTable, RoadGraphFeatureExtractor
+from scenario_analysis.model.scenario import InitPosition
+
+DATA = Path(__file__).parent / "data"
+XODR = DATA / "xodr" / "junction.xodr"
+
+
+def _edges(network):
+    sources, targets = network.edges()
+    return {(str(network.road_ids[s]), str(network.road_ids[t])) for s, t in zip(sources, targets)}
+
+
+def test_network_follows_links_and_junction_connections():
+    network = RoadGraphExtractor().extract_network(XODR)
+
+    assert network.road_ids.tolist() == ["0", "1", "2", "3", "4", "5", "6"]
+    assert network.junction_ids.tolist() == ["100"]
+    assert network.junction.tolist() == [-1, -1, -1, 0, 0, 0, 0]
+    assert network.num_lanes.tolist()[:3] == [3, 2, 2]
+    assert _edges(network) == {
+        ("0", "3"), ("3", "1"), ("1", "4"), ("4", "0"),
+        ("0", "5"), ("5", "2"), ("2", "6"), ("6", "1"),
+    }
+
+    features = RoadGraphFeatureExtractor().extract(network)
+    assert features["num_roads"] == 7
+    assert features["num_intersections"] == 1
+    assert [h["road_id"] for h in features["risk_hotspots"]] == ["1"]
+
+
+def test_connecting_road_entered_at_end_is_reversed(tmp_path):
+    xodr = tmp_path / "reversed.xodr"
+    xodr.write_text(
+        XODR.read_text(encoding="utf-8").replace(
+            '<connection id="3" incomingRoad="2" connectingRoad="6" contactPoint="start">',
+            '<connection id="3" incomingRoad="1" connectingRoad="6" contactPoint="end">',
+        ),
+        encoding="utf-8",
+    )
+    edges = _edges(RoadGraphExtractor().extract_network(xodr))
+    assert ("1", "6") in edges and ("6", "2") in edges
+    assert ("2", "6") not in edges
+
+
+def test_networkx_export_round_trips():
+    network = RoadGraphExtractor().extract_network(XODR)
+    graph = RoadGraphExtractor().extract(XODR)
+
+    assert graph.number_of_nodes() == 7
+    assert graph.nodes["3"]["junction"] == "100"
+    assert set(graph.edges) == _edges(network)
+
+    extractor = RoadGraphFeatureExtractor()
+    assert extractor.extract(graph) == extractor.extract(network)
+    assert _edges(RoadNetwork.from_networkx(graph)) == _edges(network)
+
+
+def test_bulk_hotspots_match_dict_form():
+    graph = nx.gnp_random_graph(200, 0.01, seed=3, directed=True)
+    graph = nx.relabel_nodes(graph, {n: str(n) for n in graph})
+    for i, n in enumerate(graph):
+        graph.nodes[n]["num_lanes"] = i % 7
+
+    extractor = RoadGraphFeatureExtractor()
+    features = extractor.extract(graph)
+    bulk = extractor.extract_bulk(graph)
+    table = bulk["risk_hotspots"]
+
+    assert isinstance(table, HotspotTable)
+    assert len(table) == len(features["risk_hotspots"]) > 0
+    assert set(table.types()) == set(HOTSPOT_TYPES)
+    assert table.to_dicts() == features["risk_hotspots"]
+
+    estimator = AccidentRiskEstimator()
+    assert estimator.structural_risk(bulk) == estimator.structural_risk(features)
+
+
+def test_plan_view_geometry():
+    geometry = RoadGraphExtractor().extract_network(XODR).geometry
+
+    assert geometry.num_roads == 7
+    assert geometry.point_at(0, 20.0) == (20.0, 0.0)
+    assert geometry.point_at(0, 500.0) == (100.0, 0.0)
+    # Quarter circle of radius 10, turning right
+    assert geometry.point_at(5, np.pi * 5) == pytest.approx((110.0, -10.0))
+
+
+def test_spatial_grid_matches_brute_force():
+    rng = np.random.default_rng(7)
+    x, y = rng.uniform(-500, 500, 2000), rng.uniform(-500, 500, 2000)
+    owner = rng.integers(0, 300, 2000)
+    grid = SpatialGrid(x, y, owner, cell_size=37.0)
+
+    qx, qy = np.array([0.0, 480.0, -123.4]), np.array([0.0, -480.0, 77.0])
+    for radius in (5.0, 60.0, 250.0):
+        dist = np.hypot(x[:, None] - qx, y[:, None] - qy).min(axis=1)
+        assert grid.query(qx, qy, radius).tolist() == np.unique(owner[dist <= radius]).tolist()
+
+
+def test_local_features_around_start_positions():
+    network = RoadGraphExtractor().extract_network(XODR)
+    positions = OpenScenarioXMLParser().parse(DATA / "xosc" / "CutIn.xosc").init_positions
+    extractor = RoadGraphFeatureExtractor()
+
+    roads = extractor.local_roads(network, positions, 30.0)
+    assert network.road_ids[roads].tolist() == ["0"]
+
+    roads = extractor.local_roads(network, positions, 45.0)
+    assert network.road_ids[roads].tolist() == ["0", "3", "4", "5"]
+    features = extractor.extract(network, roads)
+    assert features["num_roads"] == 4
+    assert features["num_connections"] == 3
+    assert features["num_intersections"] == 1
+    assert features["num_lanes"] == 6
+
+    # The whole network as neighbourhood gives the global features
+    everything = np.arange(network.num_roads)
+    assert extractor.extract(network, everything) == extractor.extract(network)
+
+    assert extractor.local_roads(network, [], 45.0) is None
+    # A world position far off the network has no roads around it
+    far = [InitPosition(entity="Ego", kind="world", x=1e6, y=1e6)]
+    assert extractor.local_roads(network, far, 45.0) is None
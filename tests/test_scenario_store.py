@@ -0,0 +1,66 @@
+import shutil
+import struct
+
+from scenario_analysis.benchmark.synthetic import generate_openscenario
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.ingestion.scenario_store import ScenarioStore, decode_scenario, encode_scenario
+from scenario_analysis.instrumentation import Instrumentation
+from scenario_analysis.pipeline.batch import ScenarioJob
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def test_encoded_scenarios_round_trip(tmp_path):
+    parser = OpenScenarioXMLParser()
+    synthetic = generate_openscenario(tmp_path / "synthetic.xosc", num_entities=6, conditions_per_event=3)
+
+    for path in (XOSC, synthetic):
+        scenario = parser.parse(path)
+        assert decode_scenario(encode_scenario(scenario)) == scenario
+
+
+def test_store_skips_parsing_of_unchanged_files(tmp_path):
+    store = ScenarioStore(tmp_path / "store")
+    parser = OpenScenarioXMLParser()
+    renamed = tmp_path / "Renamed.xosc"
+    shutil.copy(XOSC, renamed)
+
+    first, hit = store.get(XOSC, parser)
+    assert not hit
+    second, hit = store.get(renamed, parser)
+    assert hit
+    assert second.name == "Renamed"
+    second.name = first.name
+    assert second == first == parser.parse(XOSC)
+
+    # A corrupt entry is parsed and written again
+    entry = next((tmp_path / "store").rglob("*.scn"))
+    entry.write_bytes(entry.read_bytes()[:40])
+    assert store.get(XOSC, parser) == (first, False)
+    assert store.get(XOSC, parser) == (first, True)
+    assert store.stats() == {"hits": 2, "misses": 2}
+
+    # The count of the first attribute set runs past the sets section
+    data = bytearray(entry.read_bytes())
+    header = struct.Struct("<4sHxxIIIII")
+    _, _, _, blob_len, num_sets, _, _ = header.unpack_from(data)
+    assert num_sets > 0
+    struct.pack_into("<I", data, header.size + blob_len + -blob_len % 8, 1000)
+    entry.write_bytes(data)
+    assert store.get(XOSC, parser) == (first, False)
+
+
+def test_pipeline_reads_scenarios_from_store(tmp_path):
+    job = ScenarioJob(xosc=str(XOSC), xodr=str(XODR))
+    expected = stub_pipeline().run(job)["feature_vector"]
+
+    pipeline = stub_pipeline()
+    pipeline.scenario_store = ScenarioStore(tmp_path)
+    pipeline.instrumentation = Instrumentation(buffer=True)
+
+    caches = []
+    for _ in range(2):
+        record = pipeline.run(job)
+        assert record["feature_vector"] == expected
+        caches.append(next(r["cache"] for r in record["profile"] if r["stage"] == "parse"))
+    assert caches == ["miss", "hit"]
@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scenario_analysis.scheduler import StageTask, run_stages
+from scenario_analysis.pipeline.batch import ScenarioJob
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def test_independent_stages_overlap_and_dependencies_are_kept():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_other():
+        # Only returns if both stages run at the same time
+        barrier.wait()
+        return 1
+
+    tasks = [
+        StageTask("a", wait_for_other),
+        StageTask("b", wait_for_other),
+        StageTask("sum", lambda a, b: a + b, after=("a", "b")),
+    ]
+    with ThreadPoolExecutor(2) as executor:
+        assert run_stages(tasks, executor) == {"a": 1, "b": 1, "sum": 2}
+
+
+def test_first_failed_stage_in_order_is_raised():
+    def slow_failure():
+        time.sleep(0.05)
+        raise KeyError("first")
+
+    def fast_failure():
+        raise ValueError("second")
+
+    started = []
+    tasks = [
+        StageTask("slow", slow_failure),
+        StageTask("fast", fast_failure),
+        StageTask("later", lambda fast: started.append(fast), after=("fast",)),
+    ]
+    with ThreadPoolExecutor(2) as executor, pytest.raises(KeyError):
+        run_stages(tasks, executor)
+    assert started == []
+
+
+def test_pipeline_with_stage_threads_matches_sequential_run(tmp_path):
+    job = ScenarioJob(xosc=str(XOSC), xodr=str(XODR))
+    sequential = stub_pipeline()
+    threaded = stub_pipeline()
+    threaded.stage_threads = 2
+
+    for local_radius in (None, 30.0):
+        sequential.local_radius = threaded.local_radius = local_radius
+        expected = sequential.run(job)["feature_vector"]
+        actual = threaded.run(job)["feature_vector"]
+        assert actual == expected
+        assert list(actual) == list(expected)
+
+    missing = ScenarioJob(xosc=str(tmp_path / "missing.xosc"), xodr=str(XODR))
+    with pytest.raises(OSError):
+        threaded.run(missing)
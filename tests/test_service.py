@@ -0,0 +1,76 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from functools import partial
+
+import pytest
+
+from scenario_analysis.analysis.road_graph_cache import RoadGraphCache
+from scenario_analysis.pipeline.batch import ScenarioJob
+from scenario_analysis.pipeline.service import QueueFull, ScoringHTTPServer, ScoringService
+
+from conftest import XODR, XOSC, stub_pipeline
+
+
+def shared_cache_pipeline(cache):
+    pipeline = stub_pipeline()
+    pipeline.road_graph_cache = cache
+    return pipeline
+
+
+def _post(port, body):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/score", data=json.dumps(body).encode("utf-8"), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_service_scores_over_http_with_warm_road_cache(tmp_path):
+    cache = RoadGraphCache()
+    service = ScoringService(partial(shared_cache_pipeline, cache), workers=2)
+
+    with service, ScoringHTTPServer(("127.0.0.1", 0), service) as server:
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            status, record = _post(port, {"xosc": str(XOSC), "xodr": str(XODR), "semantic": False})
+            assert status == 200
+            assert record["feature_vector"]["accident_probability"] is None
+            assert 0 < record["feature_vector"]["structural_risk"] <= 1
+            assert record["road_graph_cache"] == "misses"
+
+            status, record = _post(port, {"xosc": str(XOSC), "xodr": str(XODR)})
+            assert status == 200
+            assert record["feature_vector"]["accident_probability"] is not None
+            assert record["road_graph_cache"] == "memory_hits"
+
+            assert _post(port, {"xodr": str(XODR)})[0] == 400
+            assert _post(port, {"xosc": str(tmp_path / "missing.xosc"), "xodr": str(XODR)})[0] == 422
+
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health") as response:
+                health = json.loads(response.read())
+            assert health["processed"] == 3
+            assert health["failed"] == 1
+            assert health["road_graph_cache"]["misses"] == 1
+        finally:
+            server.shutdown()
+
+
+def test_full_queue_rejects_instead_of_blocking():
+    service = ScoringService(stub_pipeline, workers=1, queue_size=1)
+    job = ScenarioJob(xosc=str(XOSC), xodr=str(XODR))
+
+    # Not started yet, so nothing drains the queue
+    future = service.submit(job, semantic=False)
+    with pytest.raises(QueueFull):
+        service.submit(job)
+    assert service.stats()["rejected"] == 1
+
+    with service:
+        assert future.result(timeout=30)["status"] == "ok"
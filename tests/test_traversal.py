@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from scenario_analysis.ingestion.openscenario_xml import OpenScenarioXMLParser
+from scenario_analysis.features.basic_stats import BasicStatsExtractor
+from scenario_analysis.features.semantic_ai import AISemanticFeatureExtractor
+from scenario_analysis.features.traversal import ScenarioCollector
+
+XOSC = Path(__file__).parent / "data" / "xosc" / "CutIn.xosc"
+
+
+class PedestrianCollector(ScenarioCollector):
+    def start(self, scenario):
+        self.count = 0
+
+    def entity(self, entity):
+        self.count += entity.type == "pedestrian"
+
+    def result(self):
+        return {"num_pedestrians": self.count}
+
+
+class VisitCounter(ScenarioCollector):
+    def start(self, scenario):
+        self.starts = getattr(self, "starts", 0) + 1
+        self.events = 0
+
+    def event(self, event):
+        self.events += 1
+
+
+def test_structural_features():
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+    features = BasicStatsExtractor().extract(scenario)
+
+    assert features["num_entities"] == 3
+    assert features["num_events"] == 3
+    assert features["max_trigger_depth"] == 2
+    assert features["max_speed_ms"] == 16.7
+    assert features["avg_speed_ms"] == (13.9 + 16.7 + 0.0 + 1.5) / 4
+    assert features["trigger_types"]["ByValueCondition"] >= 1
+
+
+def test_plugins_and_prompt_share_one_traversal():
+    scenario = OpenScenarioXMLParser().parse(XOSC)
+    stats = BasicStatsExtractor(plugins=[PedestrianCollector])
+    semantic = AISemanticFeatureExtractor(llm=None)
+
+    counter = VisitCounter()
+    prompt = semantic.prompt_collector()
+    features = stats.extract(scenario, [prompt, counter])
+
+    assert features["num_pedestrians"] == 1
+    assert "num_pedestrians" not in BasicStatsExtractor().extract(scenario)
+    assert counter.starts == 1
+    assert counter.events == features["num_events"]
+    assert prompt.result() == semantic.build_prompt(scenario)
+    assert "      Event: BrakeEvent" in prompt.result().splitlines()